@@ -0,0 +1,32 @@
+"""Project upload state
+
+Revision ID: 3b9e1c4d7a52
+Revises: 787f7d87c72f
+Create Date: 2026-10-19 09:12:40.118392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e1c4d7a52'
+down_revision: Union[str, Sequence[str], None] = '787f7d87c72f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+upload_state = sa.Enum('PENDING', 'UPLOADED', 'FAILED', name='uploadstate')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    upload_state.create(op.get_bind(), checkfirst=True)
+    op.add_column('project', sa.Column('upload_state', upload_state, nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('project', 'upload_state')
+    upload_state.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""Project status/created_at index
+
+Revision ID: 5c2f8e0a9d13
+Revises: 3b9e1c4d7a52
+Create Date: 2026-10-19 14:05:27.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f8e0a9d13'
+down_revision: Union[str, Sequence[str], None] = '3b9e1c4d7a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_project_status_created_at', 'project', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_project_status_created_at', table_name='project')
@@ -0,0 +1,68 @@
+"""Time planning and applying a bulk supervisor assignment.
+
+    python -m benchmarks.assignment --students 10000 --supervisors 400
+"""
+import argparse
+from datetime import datetime, timezone
+
+from benchmarks.common import measure, memory_engine, print_results
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from models.account import StudentAccount, SupervisorAccount
+from services.assignment import apply_plan, plan_assignments
+from services.enums import Role
+
+DEPARTMENTS = ["Computer Science", "Electrical Engineering", "Mathematics", "Physics", "Chemistry", "Biology"]
+
+
+def populate(engine, students: int, supervisors: int):
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        session.execute(insert(SupervisorAccount), [
+            {"id": i, "name": f"Supervisor {i}", "role": Role.SUPERVISOR, "email": f"sup{i}@bench.edu",
+             "department": DEPARTMENTS[i % len(DEPARTMENTS)], "hashed_password": "x", "created_at": now}
+            for i in range(1, supervisors + 1)
+        ])
+        # A fifth of the students already have a supervisor, so loads start uneven.
+        session.execute(insert(StudentAccount), [
+            {"id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"stu{i}@bench.edu",
+             "department": DEPARTMENTS[(i * 7) % len(DEPARTMENTS)], "hashed_password": "x", "created_at": now,
+             "matric_no": f"MAT{i:06d}", "supervisor_id": (i % supervisors) + 1 if i % 5 == 0 else None}
+            for i in range(1, students + 1)
+        ])
+        session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--students", type=int, default=10_000)
+    parser.add_argument("--supervisors", type=int, default=400)
+    parser.add_argument("--capacity", type=int, default=40)
+    args = parser.parse_args()
+
+    engine = memory_engine()
+    populate(engine, args.students, args.supervisors)
+
+    results = {}
+    with Session(engine) as session:
+        with measure(results, "plan", trace_memory=False):
+            plan = plan_assignments(session, capacity=args.capacity)
+        with measure(results, "plan[traced]"):
+            plan_assignments(session, capacity=args.capacity)
+        with measure(results, "apply", trace_memory=False):
+            apply_plan(session, plan)
+
+    loads = [load.after for load in plan.loads]
+    results["plan"].update(
+        assigned=len(plan.assignments),
+        same_department=sum(assignment.same_department for assignment in plan.assignments),
+        unassigned=len(plan.unassigned),
+        load_spread=max(loads) - min(loads),
+    )
+    print_results(f"Assigning {args.students} students to {args.supervisors} supervisors", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compare reviewing projects one request at a time with the batch review path.
+
+    python -m benchmarks.batch_review --projects 200
+"""
+import argparse
+from datetime import datetime, timezone
+
+from benchmarks.common import measure, memory_engine, print_results
+
+from sqlalchemy import event, insert
+from sqlmodel import Session
+
+from models.account import StudentAccount, SupervisorAccount
+from models.projects import Project
+from routers.project import review_project
+from schemas.project import ProjectReviewItem, ProjectReviewRequest
+from services.enums import Role, Status
+from services.review import review_projects
+
+
+def populate(engine, projects: int):
+    now = datetime.now(timezone.utc)
+    with Session(engine) as session:
+        session.execute(insert(SupervisorAccount), [{
+            "id": 1, "name": "Supervisor", "role": Role.SUPERVISOR, "email": "sup@bench.edu",
+            "department": "Computer Science", "hashed_password": "x", "created_at": now, "faculty": "Science",
+        }])
+        session.execute(insert(StudentAccount), [
+            {"id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"stu{i}@bench.edu",
+             "department": "Computer Science", "hashed_password": "x", "created_at": now,
+             "matric_no": f"MAT{i:06d}", "supervisor_id": 1}
+            for i in range(1, projects + 1)
+        ])
+        session.execute(insert(Project), [
+            {"id": i, "title": f"Project {i}", "year": "2025", "description": "lorem ipsum",
+             "status": Status.PENDING, "created_at": now, "updated_at": now,
+             "student_id": i, "supervisor_id": 1, "tags": []}
+            for i in range(1, projects + 1)
+        ])
+        session.commit()
+
+
+def count_statements(engine) -> list:
+    counter = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    return counter
+
+
+def per_item_path(engine, project_ids, status):
+    with Session(engine) as session:
+        supervisor = session.get(SupervisorAccount, 1)
+        for project_id in project_ids:
+            review_project(project_id, ProjectReviewRequest(status=status, review_comment="ok"), session, supervisor)
+
+
+def batch_path(engine, project_ids, status):
+    with Session(engine) as session:
+        supervisor = session.get(SupervisorAccount, 1)
+        reviews = [ProjectReviewItem(project_id=project_id, status=status, review_comment="ok")
+                   for project_id in project_ids]
+        results = review_projects(session, reviews, supervisor)
+    assert all(result.outcome == "updated" for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = memory_engine()
+    populate(engine, args.projects)
+    statements = count_statements(engine)
+    project_ids = list(range(1, args.projects + 1))
+
+    results = {}
+    for attempt in range(args.repeat):
+        # Alternate the outcome so every pass really changes each row.
+        status = Status.APPROVED if attempt % 2 == 0 else Status.REJECTED
+        for name, path in (("per_item", per_item_path), ("batch", batch_path)):
+            statements[0] = 0
+            label = f"{name}[{attempt}]"
+            with measure(results, label, trace_memory=False):
+                path(engine, project_ids, status)
+            results[label]["statements"] = statements[0]
+    print_results(f"Reviewing {args.projects} projects", results)
+
+
+if __name__ == "__main__":
+    main()
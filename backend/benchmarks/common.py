@@ -0,0 +1,53 @@
+"""Shared helpers for the offline benchmarks.
+
+Benchmarks run against a throwaway SQLite database, so the environment has to
+be set before ``config`` is imported anywhere.
+"""
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+os.environ.setdefault("ENV_STATE", "dev")
+os.environ.setdefault("DEV_DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+import models.account  # noqa: F401  (registers every table on the metadata)
+
+
+def memory_engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+@contextmanager
+def measure(results: dict, name: str, trace_memory: bool = True):
+    """Record wall time and (optionally) peak traced allocations for a block."""
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        results[name] = {"seconds": round(elapsed, 4), "peak_kib": peak // 1024 if peak is not None else None}
+
+
+def print_results(title: str, results: dict):
+    print(title)
+    width = max(len(name) for name in results)
+    for name, values in results.items():
+        line = "  ".join(f"{key}={value}" for key, value in values.items())
+        print(f"  {name.ljust(width)}  {line}")
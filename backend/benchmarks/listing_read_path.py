@@ -0,0 +1,102 @@
+"""Compare the ORM listing path with the column-projection read path.
+
+    python -m benchmarks.listing_read_path --rows 50000
+"""
+import argparse
+from datetime import datetime, timezone
+
+from benchmarks.common import measure, memory_engine, print_results
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from models.account import StudentAccount, SupervisorAccount
+from models.projects import Project
+from services.enums import Role, Status, Tags
+from services.read_models import fetch_project_listing, project_listing_statement, serialize_listing
+
+
+def populate(engine, rows: int):
+    now = datetime.now(timezone.utc)
+    students = max(rows // 4, 1)
+    with Session(engine) as session:
+        session.execute(insert(SupervisorAccount), [
+            {"id": i, "name": f"Supervisor {i}", "role": Role.SUPERVISOR, "email": f"sup{i}@bench.edu",
+             "department": "Computer Science", "hashed_password": "x", "created_at": now, "faculty": "Science"}
+            for i in range(1, 51)
+        ])
+        session.execute(insert(StudentAccount), [
+            {"id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"stu{i}@bench.edu",
+             "department": "Computer Science", "hashed_password": "x", "created_at": now,
+             "matric_no": f"MAT{i:06d}", "supervisor_id": i % 50 + 1}
+            for i in range(1, students + 1)
+        ])
+        session.execute(insert(Project), [
+            {"title": f"Project {i}", "year": str(2020 + i % 6), "description": "lorem ipsum " * 20,
+             "status": Status.APPROVED, "created_at": now, "updated_at": now,
+             "student_id": i % students + 1, "supervisor_id": i % 50 + 1, "tags": [Tags.AI.value, Tags.IOT.value]}
+            for i in range(rows)
+        ])
+        session.commit()
+
+
+def orm_path(engine):
+    """Entity load + hand-built dicts, the shape the routers used to produce."""
+    with Session(engine) as session:
+        statement = (
+            select(Project, StudentAccount, SupervisorAccount)
+            .join(StudentAccount, StudentAccount.id == Project.student_id)
+            .outerjoin(SupervisorAccount, SupervisorAccount.id == Project.supervisor_id)
+        )
+        result = []
+        for project, student, supervisor in session.exec(statement):
+            data = {
+                "id": project.id, "title": project.title, "year": project.year,
+                "description": project.description, "file_url": project.file_url,
+                "document_url": project.document_url, "status": project.status,
+                "created_at": project.created_at, "updated_at": project.updated_at,
+                "student_id": project.student_id, "supervisor_id": project.supervisor_id,
+                "tags": project.tags,
+                "student": {"id": student.id, "name": student.name, "email": student.email,
+                            "matric_no": student.matric_no, "department": student.department,
+                            "role": student.role},
+            }
+            if supervisor:
+                data["supervisor"] = {"id": supervisor.id, "name": supervisor.name, "email": supervisor.email,
+                                      "department": supervisor.department, "role": supervisor.role,
+                                      "faculty": supervisor.faculty, "title": supervisor.title}
+            result.append(data)
+        return result
+
+
+def row_path(engine):
+    with Session(engine) as session:
+        return serialize_listing(fetch_project_listing(session, project_listing_statement(include_supervisor=True)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = memory_engine()
+    populate(engine, args.rows)
+
+    results = {}
+    for attempt in range(args.repeat):
+        with measure(results, f"orm[{attempt}]", trace_memory=False):
+            orm_rows = orm_path(engine)
+        with measure(results, f"rows[{attempt}]", trace_memory=False):
+            projected_rows = row_path(engine)
+    # Allocation tracing slows everything down, so peaks get their own pass.
+    with measure(results, "orm[traced]"):
+        orm_path(engine)
+    with measure(results, "rows[traced]"):
+        row_path(engine)
+    assert len(orm_rows) == len(projected_rows) == args.rows
+    print_results(f"Listing read path, {args.rows} rows", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+"""Role-based load test of the API on SQLite with local document storage.
+
+A synthetic campus is seeded from ``--seed``. Virtual users then run a
+weighted mix of scenarios until ``--iterations`` scenarios have finished.
+The mix and the order of scenarios come from the seed, so runs are
+repeatable.
+
+- ``student_browse``: profile, own projects, the catalogue, one project, a tag search
+- ``student_submit``: create a project with a PDF, then poll its upload status
+- ``supervisor_review``: dashboard, pending projects, review one, supervised students
+- ``admin_list``: dashboard, a page each of students, projects and supervisors
+- ``admin_export``: page through every project and student at 200 a page
+
+``--mode asgi`` (the default) drives the app in-process through
+``httpx.ASGITransport``. ``--mode uvicorn`` starts a local uvicorn on the
+same database and drives it over HTTP. Everything runs in a throwaway
+directory: a SQLite database, ``LocalStorage`` for documents, and an
+in-memory Celery broker, so neither Redis nor Cloudinary is needed. Tokens
+are minted directly rather than through the login route, so bcrypt doesn't
+dominate the setup.
+
+Throughput and p50/p95/p99 latency are reported overall, per scenario and per
+route. ``--output`` writes them as JSON. ``--baseline`` compares them with an
+earlier file and exits with status 1 when a percentile is more than
+``--threshold`` slower, or throughput more than ``--threshold`` lower. A
+slowdown must also exceed ``--min-delta-ms``, so sub-millisecond routes
+don't flap. p95 and p99 are only compared from 20 and 100 samples, below
+which they are just the slowest request. Only compare baselines recorded on
+the same machine with the same options.
+
+    python -m benchmarks.load_test --users 8 --iterations 300 --output baseline.json
+    python -m benchmarks.load_test --users 8 --iterations 300 --baseline baseline.json
+"""
+import os
+import tempfile
+
+# The harness needs its own database, storage and broker, whatever the shell says.
+WORKDIR = os.environ.setdefault("LOADTEST_DIR", tempfile.mkdtemp(prefix="scholarbase-loadtest-"))
+os.environ.update({
+    "ENV_STATE": "dev",
+    "DEV_DATABASE_URL": f"sqlite:///{os.path.join(WORKDIR, 'loadtest.db')}",
+    "DEV_CACHE_BACKEND": "memory",
+    "DEV_CELERY_BROKER_URL": "memory://",
+    "DEV_CELERY_RESULT_BACKEND": "cache+memory://",
+    "DEV_QUERY_COUNT_HEADERS": "false",
+    "STORAGE_BACKEND": "local",
+    "LOCAL_STORAGE_ROOT": os.path.join(WORKDIR, "storage"),
+    "UPLOAD_SPOOL_DIR": os.path.join(WORKDIR, "spool"),
+})
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import Session, SQLModel
+
+from main import app
+from models.account import AdminAccount, StudentAccount, SupervisorAccount
+from models.database import engine
+from models.projects import Project
+from services.auth import create_access_token, get_password_hash
+from services.enums import Role, Status, Tags
+
+SCENARIO_WEIGHTS = {
+    "student_browse": 45,
+    "student_submit": 15,
+    "supervisor_review": 25,
+    "admin_list": 10,
+    "admin_export": 5,
+}
+DEPARTMENTS = ("Computer Science", "Electrical Engineering", "Mathematics", "Physics")
+EXPORT_PAGE_SIZE = 200
+OK_STATUSES = {200, 201, 204, 304}
+# Below these counts a nearest-rank p95 or p99 is just the slowest sample, too noisy to compare.
+MIN_SAMPLES = {"p50_ms": 1, "p95_ms": 20, "p99_ms": 100}
+
+
+# Data
+
+class World:
+    """Seeded accounts, their tokens, and the projects known to each student."""
+
+    def __init__(self):
+        self.students: List[dict] = []
+        self.supervisors: List[dict] = []
+        self.admin_headers: Dict[str, str] = {}
+        self.projects: Dict[int, List[int]] = defaultdict(list)
+
+
+def _headers(account_id: int, email: str, role: Role) -> Dict[str, str]:
+    token = create_access_token({"sub": email, "role": role.value, "user_id": account_id}, timedelta(hours=12))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def seed(students: int, supervisors: int, seed_value: int) -> World:
+    rng = random.Random(seed_value)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    password = get_password_hash("loadtest-password")
+    epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    tags = [tag.value for tag in Tags]
+    world = World()
+
+    supervisor_rows = [
+        {"id": i, "name": f"Supervisor {i}", "role": Role.SUPERVISOR, "email": f"supervisor{i}@loadtest.edu",
+         "department": DEPARTMENTS[i % len(DEPARTMENTS)], "faculty": "Science", "hashed_password": password,
+         "created_at": epoch, "phone_number": f"0800{i:07d}"}
+        for i in range(1, supervisors + 1)
+    ]
+    student_rows = []
+    for i in range(1, students + 1):
+        supervisor = supervisor_rows[rng.randrange(supervisors)]
+        student_rows.append({
+            "id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"student{i}@loadtest.edu",
+            "department": supervisor["department"], "hashed_password": password, "created_at": epoch,
+            "matric_no": f"LT{i:06d}", "level": rng.choice(["100", "200", "300", "400"]),
+            "supervisor_id": supervisor["id"],
+        })
+    project_rows = []
+    for student in student_rows:
+        for _ in range(rng.choice([0, 1, 1, 2, 3])):
+            created_at = epoch + timedelta(minutes=len(project_rows))
+            project_rows.append({
+                "id": len(project_rows) + 1, "title": f"Project {len(project_rows) + 1} by {student['name']}",
+                "year": str(rng.choice([2023, 2024, 2025])), "description": "Synthetic load test project. " * 8,
+                "status": rng.choices([Status.PENDING, Status.APPROVED, Status.REJECTED], [4, 4, 2])[0],
+                "created_at": created_at, "updated_at": created_at, "student_id": student["id"],
+                "supervisor_id": student["supervisor_id"], "tags": rng.sample(tags, 2),
+            })
+
+    with Session(engine) as session:
+        session.execute(insert(SupervisorAccount), supervisor_rows)
+        session.execute(insert(StudentAccount), student_rows)
+        session.execute(insert(AdminAccount), [{"id": 1, "name": "Admin", "role": Role.ADMIN,
+                                                "email": "admin@loadtest.edu", "hashed_password": password,
+                                                "created_at": epoch}])
+        if project_rows:
+            session.execute(insert(Project), project_rows)
+        session.commit()
+
+    world.supervisors = [{"id": row["id"], "headers": _headers(row["id"], row["email"], Role.SUPERVISOR)}
+                         for row in supervisor_rows]
+    world.students = [{"id": row["id"], "supervisor_id": row["supervisor_id"],
+                       "headers": _headers(row["id"], row["email"], Role.STUDENT)} for row in student_rows]
+    world.admin_headers = _headers(1, "admin@loadtest.edu", Role.ADMIN)
+    for row in project_rows:
+        world.projects[row["student_id"]].append(row["id"])
+    return world
+
+
+# Recording
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> dict:
+    if not latencies:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 2) if seconds else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.enabled = True
+        self.requests: Dict[str, List[float]] = defaultdict(list)
+        self.scenarios: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.error_samples: List[str] = []
+
+
+class LoadClient:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder):
+        self.client = client
+        self.recorder = recorder
+
+    async def request(self, route: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send one request and record its latency under ``route``, the route template."""
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        if self.recorder.enabled:
+            self.recorder.requests[route].append(elapsed)
+            if response.status_code not in OK_STATUSES:
+                self.recorder.errors[route] += 1
+                if len(self.recorder.error_samples) < 10:
+                    self.recorder.error_samples.append(f"{route} -> {response.status_code} {response.text[:200]}")
+        return response
+
+
+# Scenarios
+
+async def student_browse(client: LoadClient, world: World, rng: random.Random) -> None:
+    student = rng.choice(world.students)
+    headers = student["headers"]
+    await client.request("GET /api/auth/me", "GET", "/api/auth/me", headers=headers)
+    await client.request("GET /api/projects/", "GET", "/api/projects/", headers=headers)
+    await client.request("GET /api/projects/all", "GET", "/api/projects/all", headers=headers)
+    if world.projects[student["id"]]:
+        project_id = rng.choice(world.projects[student["id"]])
+        await client.request("GET /api/projects/{project_id}", "GET", f"/api/projects/{project_id}", headers=headers)
+    await client.request("POST /api/tags/search", "POST", "/api/tags/search", headers=headers,
+                         json=[rng.choice(list(Tags)).value])
+
+
+async def student_submit(client: LoadClient, world: World, rng: random.Random) -> None:
+    student = rng.choice(world.students)
+    headers = student["headers"]
+    # Distinct content each time, so content-addressed storage really writes.
+    document = b"%PDF-1.4\n" + rng.randbytes(16 * 1024) + b"\n%%EOF\n"
+    response = await client.request(
+        "POST /api/projects/", "POST", "/api/projects/", headers=headers,
+        data={"title": f"Submission {rng.randrange(10 ** 9)}", "description": "Load test submission.",
+              "year": "2025", "supervisor_id": str(student["supervisor_id"]),
+              "tags": json.dumps([rng.choice(list(Tags)).value])},
+        files={"document": ("report.pdf", document, "application/pdf")},
+    )
+    if response.status_code == 200:
+        project_id = response.json()["id"]
+        world.projects[student["id"]].append(project_id)
+        await client.request("GET /api/projects/{project_id}/upload-status", "GET",
+                             f"/api/projects/{project_id}/upload-status", headers=headers)
+
+
+async def supervisor_review(client: LoadClient, world: World, rng: random.Random) -> None:
+    headers = rng.choice(world.supervisors)["headers"]
+    await client.request("GET /api/supervisor/dashboard/stats", "GET", "/api/supervisor/dashboard/stats",
+                         headers=headers)
+    response = await client.request("GET /api/supervisor/projects", "GET", "/api/supervisor/projects",
+                                    headers=headers, params={"status": Status.PENDING.value})
+    pending = response.json() if response.status_code == 200 else []
+    if pending:
+        project = rng.choice(pending)
+        await client.request(
+            "PUT /api/projects/{project_id}/review", "PUT", f"/api/projects/{project['id']}/review", headers=headers,
+            json={"status": rng.choice([Status.APPROVED, Status.REJECTED]).value, "review_comment": "Reviewed"},
+        )
+    await client.request("GET /api/supervisor/students", "GET", "/api/supervisor/students", headers=headers)
+
+
+async def admin_list(client: LoadClient, world: World, rng: random.Random) -> None:
+    headers = world.admin_headers
+    await client.request("GET /api/admin/dashboard/stats", "GET", "/api/admin/dashboard/stats", headers=headers)
+    await client.request("GET /api/admin/students", "GET", "/api/admin/students", headers=headers,
+                         params={"page": rng.randint(1, max(1, len(world.students) // 50))})
+    await client.request("GET /api/admin/projects", "GET", "/api/admin/projects", headers=headers,
+                         params={"status": rng.choice(list(Status)).value})
+    await client.request("GET /api/admin/supervisors", "GET", "/api/admin/supervisors", headers=headers)
+
+
+async def admin_export(client: LoadClient, world: World, rng: random.Random) -> None:
+    headers = world.admin_headers
+    for route, path in (("GET /api/admin/projects", "/api/admin/projects"),
+                        ("GET /api/admin/students", "/api/admin/students")):
+        page = 1
+        while True:
+            response = await client.request(route, "GET", path, headers=headers,
+                                            params={"page": page, "per_page": EXPORT_PAGE_SIZE})
+            if response.status_code != 200 or len(response.json()) < EXPORT_PAGE_SIZE:
+                break
+            page += 1
+
+
+SCENARIOS = {
+    "student_browse": student_browse,
+    "student_submit": student_submit,
+    "supervisor_review": supervisor_review,
+    "admin_list": admin_list,
+    "admin_export": admin_export,
+}
+
+
+# Running
+
+async def run_load(client: httpx.AsyncClient, world: World, users: int, iterations: int, warmup: int,
+                   seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    names = list(SCENARIO_WEIGHTS)
+    weights = [SCENARIO_WEIGHTS[name] for name in names]
+    plan = [(index, rng.choices(names, weights)[0]) for index in range(warmup + iterations)]
+    recorder = Recorder()
+    load_client = LoadClient(client, recorder)
+
+    async def run_plan(items) -> None:
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        async def user() -> None:
+            while not queue.empty():
+                index, name = queue.get_nowait()
+                # Each scenario run has its own RNG, so its choices don't depend on scheduling.
+                started = time.perf_counter()
+                await SCENARIOS[name](load_client, world, random.Random(seed_value * 1_000_003 + index))
+                if recorder.enabled:
+                    recorder.scenarios[name].append(time.perf_counter() - started)
+
+        await asyncio.gather(*(user() for _ in range(users)))
+
+    recorder.enabled = False
+    await run_plan(plan[:warmup])
+    recorder.enabled = True
+    started = time.perf_counter()
+    await run_plan(plan[warmup:])
+    seconds = time.perf_counter() - started
+
+    all_latencies = [latency for latencies in recorder.requests.values() for latency in latencies]
+    return {
+        "overall": {**summarize(all_latencies, sum(recorder.errors.values()), seconds), "seconds": round(seconds, 3),
+                    "scenarios_per_second": round(iterations / seconds, 2) if seconds else None},
+        "scenarios": {name: summarize(recorder.scenarios[name], 0, seconds) for name in sorted(recorder.scenarios)},
+        "routes": {route: summarize(recorder.requests[route], recorder.errors[route], seconds)
+                   for route in sorted(recorder.requests)},
+        "error_samples": recorder.error_samples,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.load_test", "--serve", str(port)],
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("uvicorn did not start within 30s")
+
+
+def serve(port: int) -> None:
+    import uvicorn
+
+    engine.echo = False
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+# Baselines
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Regressions of ``current`` against ``baseline``, as readable lines."""
+    regressions = []
+    sections = [("overall", current["overall"], baseline.get("overall", {}))]
+    for group in ("scenarios", "routes"):
+        for name, stats in current.get(group, {}).items():
+            if name in baseline.get(group, {}):
+                sections.append((name, stats, baseline[group][name]))
+
+    for name, stats, base in sections:
+        for key, min_samples in MIN_SAMPLES.items():
+            if min(stats.get("count", 0), base.get("count", 0)) < min_samples:
+                continue
+            if key in stats and key in base and base[key]:
+                delta = stats[key] - base[key]
+                if delta > min_delta_ms and delta / base[key] > threshold:
+                    regressions.append(f"{name} {key}: {base[key]:.2f} -> {stats[key]:.2f} ms "
+                                       f"(+{delta / base[key]:.0%})")
+        if stats.get("rps") and base.get("rps") and (base["rps"] - stats["rps"]) / base["rps"] > threshold:
+            regressions.append(f"{name} rps: {base['rps']:.1f} -> {stats['rps']:.1f} "
+                               f"({(stats['rps'] - base['rps']) / base['rps']:.0%})")
+    return regressions
+
+
+def print_report(results: dict) -> None:
+    meta, overall = results["meta"], results["overall"]
+    print(f"{meta['mode']} mode, {meta['users']} users, {meta['iterations']} scenarios "
+          f"in {overall['seconds']}s ({overall['scenarios_per_second']} scenarios/s)")
+    rows = [("overall", overall)] + list(results["scenarios"].items()) + list(results["routes"].items())
+    width = max(len(name) for name, _ in rows)
+    print(f"  {'':{width}}  {'count':>6} {'errors':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in rows:
+        if not stats.get("count"):
+            continue
+        print(f"  {name:{width}}  {stats['count']:>6} {stats['errors']:>6} {stats['rps']:>8} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+    for sample in results["error_samples"]:
+        print(f"  error: {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Role-based load test against SQLite and local storage.")
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=300, help="scenarios to run and record")
+    parser.add_argument("--warmup", type=int, default=30, help="scenarios to run first without recording")
+    parser.add_argument("--students", type=int, default=400)
+    parser.add_argument("--supervisors", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # SQL echo and per-request logs would dominate the timings.
+    logging.disable(logging.WARNING)
+    if args.serve:
+        serve(args.serve)
+        return
+
+    engine.echo = False
+    world = seed(args.students, args.supervisors, args.seed)
+
+    server = None
+    if args.mode == "uvicorn":
+        port = _free_port()
+        server = _start_server(port)
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+
+    async def drive():
+        async with client:
+            return await run_load(client, world, args.users, args.iterations, args.warmup, args.seed)
+
+    try:
+        results = asyncio.run(drive())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    results = {
+        "meta": {
+            "mode": args.mode, "users": args.users, "iterations": args.iterations, "warmup": args.warmup,
+            "students": args.students, "supervisors": args.supervisors, "seed": args.seed,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        **results,
+    }
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        options = ("mode", "users", "iterations", "students", "supervisors", "seed")
+        if any(baseline["meta"].get(key) != results["meta"][key] for key in options):
+            print(f"warning: the baseline was recorded with different options: "
+                  f"{ {key: baseline['meta'].get(key) for key in options} }")
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
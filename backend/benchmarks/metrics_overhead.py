@@ -0,0 +1,81 @@
+"""Measure the per-request cost of ``MetricsMiddleware``.
+
+Requests are driven straight through the ASGI interface, so neither a server
+nor an HTTP client adds noise. The app's router is called with and without the
+middleware in front of it, using the real route table so route-template
+matching costs what it does in production.
+
+    python -m benchmarks.metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+
+import benchmarks.common  # noqa: F401  (sets up the environment)
+from benchmarks.common import print_results
+
+from starlette.middleware.exceptions import ExceptionMiddleware
+
+from core.metrics import MetricsMiddleware, render
+from main import app
+
+REQUESTS = {
+    # A cheap async endpoint: the worst case for relative overhead.
+    "async": ("GET", "/bench"),
+    # A route near the end of the table; it stops at authentication (401).
+    "late_route": ("DELETE", "/api/uploads/resumable/abc"),
+    "unmatched": ("GET", "/no/such/path"),
+}
+
+
+@app.get("/bench", include_in_schema=False)
+async def bench_endpoint():
+    return {"ok": True}
+
+
+async def drive(asgi, method: str, path: str, requests: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope_template = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method, "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 1234), "server": ("bench", 80), "app": app,
+    }
+    started = time.perf_counter()
+    for _ in range(requests):
+        await asgi(dict(scope_template), receive, send)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    bare = ExceptionMiddleware(app.router, handlers=app.exception_handlers)
+    measured = MetricsMiddleware(bare)
+    results = {}
+    for name, (method, path) in REQUESTS.items():
+        # Warm up both paths before timing them.
+        asyncio.run(drive(bare, method, path, 200))
+        asyncio.run(drive(measured, method, path, 200))
+        without = asyncio.run(drive(bare, method, path, args.requests))
+        with_metrics = asyncio.run(drive(measured, method, path, args.requests))
+        per_request = (with_metrics - without) / args.requests
+        results[name] = {
+            "bare_us": round(without / args.requests * 1e6, 1),
+            "metrics_us": round(with_metrics / args.requests * 1e6, 1),
+            "overhead_us": round(per_request * 1e6, 1),
+            "overhead_pct": round(per_request / (without / args.requests) * 100, 1),
+        }
+    started = time.perf_counter()
+    body = render()
+    results["render"] = {"ms": round((time.perf_counter() - started) * 1000, 2), "bytes": len(body)}
+    print_results(f"Metrics middleware overhead, {args.requests} requests per path", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Serialization microbenchmark per list response model.
+
+Compares FastAPI's default path (per-item validation, ``jsonable_encoder`` and
+``json.dumps``) with the cached ``TypeAdapter`` + orjson path in ``core.responses``.
+
+    python -m benchmarks.serialization --items 5000
+"""
+import argparse
+import timeit
+from datetime import datetime, timezone
+
+import benchmarks.common  # noqa: F401  (environment bootstrap)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.responses import FastJSONResponse, model_list_response
+from models.account import StudentAccount, SupervisorAccount
+from models.projects import Project
+from schemas.project import ProjectRead, StudentRead, SupervisorWithStudentsRead
+from services.enums import Role, Status, Tags
+from services.read_models import ProjectListingRow, ProjectRow, StudentSummaryRow, serialize_listing
+
+
+def make_fixtures(count: int) -> dict:
+    now = datetime.now(timezone.utc)
+    supervisor = SupervisorAccount(id=1, name="Dr. Bench", role=Role.SUPERVISOR, email="sup@bench.edu",
+                                   department="Computer Science", hashed_password="x", created_at=now)
+    students = [
+        StudentAccount(id=i, name=f"Student {i}", role=Role.STUDENT, email=f"stu{i}@bench.edu",
+                       department="Computer Science", hashed_password="x", created_at=now,
+                       matric_no=f"MAT{i:06d}", supervisor_id=1)
+        for i in range(count)
+    ]
+    projects = [
+        Project(id=i, title=f"Project {i}", year="2025", description="lorem ipsum " * 20,
+                status=Status.APPROVED, created_at=now, updated_at=now, student_id=i,
+                supervisor_id=1, tags=[Tags.AI.value, Tags.IOT.value])
+        for i in range(count)
+    ]
+    student_dicts = [
+        {"id": s.id, "name": s.name, "email": s.email, "matric_no": s.matric_no, "level": None,
+         "department": s.department, "role": s.role, "supervisor_id": 1, "supervisor": supervisor,
+         "created_at": s.created_at.isoformat(), "project_count": 1}
+        for s in students
+    ]
+    supervisor_dicts = [
+        {"id": i, "name": f"Supervisor {i}", "email": f"sup{i}@bench.edu", "department": "Computer Science",
+         "created_at": now.isoformat(), "students": students[:10]}
+        for i in range(max(count // 10, 1))
+    ]
+    listing = [
+        ProjectListingRow(
+            ProjectRow(p.id, p.title, p.year, p.description, None, None, p.status,
+                       p.created_at, p.updated_at, p.student_id, p.supervisor_id, p.tags),
+            StudentSummaryRow(p.student_id, f"Student {p.id}", f"stu{p.id}@bench.edu", f"MAT{p.id:06d}",
+                              "Computer Science", Role.STUDENT),
+        )
+        for p in projects
+    ]
+    return {
+        "ProjectRead": (ProjectRead, projects),
+        "StudentRead": (StudentRead, student_dicts),
+        "SupervisorWithStudentsRead": (SupervisorWithStudentsRead, supervisor_dicts),
+        "project listing dicts": (None, listing),
+    }
+
+
+def default_path(model, items):
+    if model is None:
+        return JSONResponse(jsonable_encoder(serialize_listing(items))).body
+    validated = [model.model_validate(item, from_attributes=True) for item in items]
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(model, items):
+    if model is None:
+        return FastJSONResponse(serialize_listing(items)).body
+    return model_list_response(model, items).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, (model, items) in make_fixtures(args.items).items():
+        default = min(timeit.repeat(lambda: default_path(model, items), number=1, repeat=args.number))
+        fast = min(timeit.repeat(lambda: fast_path(model, items), number=1, repeat=args.number))
+        print(f"{name:<28} items={len(items):<6} default={default * 1000:8.2f}ms  "
+              f"fast={fast * 1000:8.2f}ms  speedup={default / fast:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
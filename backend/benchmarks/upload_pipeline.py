@@ -0,0 +1,142 @@
+"""Concurrent document upload benchmark.
+
+Runs N concurrent uploads of SIZE MiB through the old path (whole file read
+into memory, blocking upload on the event loop) and the streaming path in
+``services.cloudinary``. The network is replaced by a fake transport that
+"sends" at a fixed bandwidth, so this measures the pipeline itself: total
+time, worst event-loop stall and peak traced memory. Uploads past
+``MAX_CONCURRENT_UPLOADS`` wait for a slot, so the peak is divided by the
+most uploads that actually held document data at once, not by N.
+
+    python -m benchmarks.upload_pipeline --uploads 50 --size 20
+"""
+import argparse
+import asyncio
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import benchmarks.common  # noqa: F401  (environment bootstrap)
+
+import cloudinary.uploader
+from starlette.datastructures import Headers, UploadFile
+
+from services import cloudinary as cloudinary_service
+
+MIB = 1024 * 1024
+
+
+def fake_send(nbytes: int, bandwidth: float):
+    time.sleep(nbytes / bandwidth)
+
+
+class InFlight:
+    """Counts uploads between their first read of the document and the end of the transfer."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.current = self.peak = 0
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.current -= 1
+
+
+in_flight = InFlight()
+
+
+def install_fake_transport(bandwidth: float):
+    def upload_large_part(file, http_headers=None, **options):
+        fake_send(len(file[1]), bandwidth)
+        return {"public_id": options.get("public_id"), "secure_url": "https://example.invalid/doc.pdf"}
+
+    cloudinary.uploader.upload_large_part = upload_large_part
+
+    upload_large = cloudinary_service.cloudinary_upload_large
+
+    def tracked_upload_large(*args, **options):
+        with in_flight.track():
+            return upload_large(*args, **options)
+
+    cloudinary_service.cloudinary_upload_large = tracked_upload_large
+
+
+def make_upload(size: int) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=1 * MIB)
+    block = b"x" * MIB
+    for _ in range(size // MIB):
+        spooled.write(block)
+    spooled.seek(0)
+    return UploadFile(spooled, size=size, filename="thesis.pdf",
+                      headers=Headers({"content-type": "application/pdf"}))
+
+
+async def old_path(file: UploadFile, bandwidth: float) -> str:
+    with in_flight.track():
+        content = await file.read()
+        fake_send(len(content), bandwidth)  # blocking, on the event loop
+    return "https://example.invalid/doc.pdf"
+
+
+async def new_path(file: UploadFile, bandwidth: float) -> str:
+    return await cloudinary_service.upload_file_to_cloudinary(file)
+
+
+async def monitor_loop(stop: asyncio.Event, interval: float = 0.01) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(path, uploads: int, size: int, bandwidth: float) -> dict:
+    files = [make_upload(size) for _ in range(uploads)]
+    in_flight.peak = 0
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_loop(stop))
+    tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(path(file, bandwidth) for file in files))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stop.set()
+    worst_stall = await monitor
+    for file in files:
+        file.file.close()
+    return {
+        "seconds": round(elapsed, 2),
+        "max_loop_stall_ms": round(worst_stall * 1000, 1),
+        "peak_mib": round(peak / MIB, 1),
+        "peak_concurrent_uploads": in_flight.peak,
+        "peak_mib_per_concurrent_upload": round(peak / MIB / max(in_flight.peak, 1), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--size", type=int, default=20, help="MiB per upload")
+    parser.add_argument("--bandwidth", type=float, default=200, help="fake MiB/s per upload")
+    args = parser.parse_args()
+
+    install_fake_transport(args.bandwidth * MIB)
+    size = args.size * MIB
+    for name, path in (("old (read + blocking upload)", old_path), ("streaming", new_path)):
+        result = asyncio.run(run(path, args.uploads, size, args.bandwidth * MIB))
+        print(f"{name:<30} " + "  ".join(f"{key}={value}" for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,7 @@ celery_app = Celery(
     "Scholar Base",
     broker=config.CELERY_BROKER_URL,
     backend=config.CELERY_RESULT_BACKEND,
-    include=["tasks.project_cleanup"]
+    include=["tasks.project_cleanup", "tasks.project_expiry", "tasks.document_upload", "tasks.document_release", "tasks.document_gc", "tasks.memory"]
 )
 
 # Configure Celery
@@ -27,14 +27,28 @@ celery_app.conf.update(
     beat_schedule={
         "cleanup-pending-projects": {
             "task": "tasks.project_cleanup.cleanup_pending_projects",
-            "schedule": crontab(hour=2, minute=0), 
+            # Reconciliation only: each project is normally expired by its own
+            # tasks.project_expiry ETA task.
+            "schedule": crontab(minute=15),
+        },
+        "collect-orphaned-documents": {
+            "task": "tasks.document_gc.collect_orphaned_documents",
+            "schedule": crontab(hour=3, minute=30, day_of_week="sun"),
         },
     },
 
     task_routes={
         "tasks.project_cleanup.*": {"queue": "cleanup"},
+        "tasks.project_expiry.*": {"queue": "cleanup"},
+        "tasks.document_upload.*": {"queue": "uploads"},
+        "tasks.document_release.*": {"queue": "cleanup"},
+        "tasks.document_gc.*": {"queue": "cleanup"},
     },
     
+    # ETA tasks stay reserved on a worker until they are due; with the Redis
+    # broker they would be redelivered once the visibility timeout passed.
+    broker_transport_options={"visibility_timeout": config.PENDING_DOCUMENT_TTL_SECONDS + 3600},
+
     worker_prefetch_multiplier=1,
     task_acks_late=True,
     worker_max_tasks_per_child=1000,
@@ -27,11 +27,82 @@ class GlobalConfig(BaselConfig):
         )
     DATABASE_URL : Optional[str] = "sqlite:///data.db"
     DB_ROLL_BACK: bool = False
+
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "30"))
+    CACHE_STALE_SECONDS: int = int(os.getenv("CACHE_STALE_SECONDS", "300"))
+    L1_CACHE_SIZE: int = int(os.getenv("L1_CACHE_SIZE", "4096"))
+    L1_CACHE_TTL_SECONDS: int = int(os.getenv("L1_CACHE_TTL_SECONDS", "60"))
+
+    MAX_CONCURRENT_UPLOADS: int = int(os.getenv("MAX_CONCURRENT_UPLOADS", "4"))
+    # Each upload in flight holds one chunk in memory. Cloudinary's chunked upload
+    # rejects chunks under 5 MiB (the last one excepted), so this is the smallest it takes.
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(5 * 1024 * 1024)))
+    # When enabled, documents are spooled locally and uploaded by a Celery worker.
+    # The spool directory must be shared between the API and the upload workers.
+    DEFERRED_UPLOADS: bool = os.getenv("DEFERRED_UPLOADS", "false").lower() == "true"
+    UPLOAD_SPOOL_DIR: str = os.getenv("UPLOAD_SPOOL_DIR", "spool/uploads")
+    # Unfinished resumable uploads are discarded after this long.
+    RESUMABLE_UPLOAD_TTL_SECONDS: int = int(os.getenv("RESUMABLE_UPLOAD_TTL_SECONDS", str(24 * 3600)))
+
+    # "cloudinary" or "local"; the local backend serves documents itself under LOCAL_STORAGE_BASE_URL.
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "cloudinary")
+    LOCAL_STORAGE_ROOT: str = os.getenv("LOCAL_STORAGE_ROOT", "storage/documents")
+    LOCAL_STORAGE_BASE_URL: str = os.getenv("LOCAL_STORAGE_BASE_URL", "/api/documents")
+    # Lifetime of signed direct-upload parameters; Cloudinary itself rejects signatures older than an hour.
+    DIRECT_UPLOAD_TTL_SECONDS: int = int(os.getenv("DIRECT_UPLOAD_TTL_SECONDS", "600"))
+
+    CHECKPOINT_DIR: str = os.getenv("CHECKPOINT_DIR", "spool/checkpoints")
+    # Orphaned-document GC; listing and bulk deletes share the call budget.
+    GC_CALLS_PER_MINUTE: float = float(os.getenv("GC_CALLS_PER_MINUTE", "30"))
+    GC_PAGE_SIZE: int = int(os.getenv("GC_PAGE_SIZE", "500"))
+    GC_MIN_AGE_HOURS: int = int(os.getenv("GC_MIN_AGE_HOURS", "24"))
+    # Delay before a released document is deleted from a backend without reference counts.
+    DOCUMENT_RELEASE_GRACE_SECONDS: int = int(os.getenv("DOCUMENT_RELEASE_GRACE_SECONDS", "300"))
+    # Documents on projects still pending this long after creation are released.
+    PENDING_DOCUMENT_TTL_SECONDS: int = int(os.getenv("PENDING_DOCUMENT_TTL_SECONDS", "3600"))
+    # Stale pending-project cleanup: projects per committed batch and parallel deletions.
+    CLEANUP_BATCH_SIZE: int = int(os.getenv("CLEANUP_BATCH_SIZE", "200"))
+    CLEANUP_WORKERS: int = int(os.getenv("CLEANUP_WORKERS", "8"))
+    # Connection pool of the per-process engine used by Celery tasks.
+    TASK_DB_POOL_SIZE: int = int(os.getenv("TASK_DB_POOL_SIZE", "5"))
+    TASK_DB_MAX_OVERFLOW: int = int(os.getenv("TASK_DB_MAX_OVERFLOW", "5"))
+    # Bulk student import: rows per uniqueness check/insert, and bcrypt processes (0 = one per CPU).
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+    IMPORT_HASH_WORKERS: int = int(os.getenv("IMPORT_HASH_WORKERS", "0"))
+    # Default number of students a supervisor can take in bulk auto-assignment.
+    SUPERVISOR_CAPACITY: int = int(os.getenv("SUPERVISOR_CAPACITY", "15"))
+    # Where Celery workers count task outcomes for /metrics: "memory" (in-process) or "redis".
+    METRICS_TASK_BACKEND: str = os.getenv("METRICS_TASK_BACKEND", "memory")
+    # Query budgets: a statement repeated this often in one request is logged as a likely N+1;
+    # strict mode fails requests that go over their route's budget (for tests).
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+    QUERY_BUDGET_STRICT: bool = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+    QUERY_COUNT_HEADERS: bool = False
+    # Tracing: "none", "console" (each trace logged as a span tree) or "file" (JSON lines in TRACE_FILE).
+    TRACE_EXPORTER: str = os.getenv("TRACE_EXPORTER", "none")
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACE_MAX_SPANS: int = int(os.getenv("TRACE_MAX_SPANS", "1000"))
+    # Admin request profiling (X-Profile: 1 or ?profile=1), off unless enabled; see core.profiling for the limits.
+    PROFILING_ENABLED: bool = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    PROFILE_MAX_SECONDS: float = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+    PROFILE_MAX_DEPTH: int = int(os.getenv("PROFILE_MAX_DEPTH", "128"))
+    PROFILE_MAX_STACKS: int = int(os.getenv("PROFILE_MAX_STACKS", "5000"))
+    PROFILE_KEEP: int = int(os.getenv("PROFILE_KEEP", "50"))
+    # Memory diagnostics: tracemalloc frames per allocation, shared snapshot directory and how many to keep,
+    # and how long /admin/memory/worker waits for a worker's answer.
+    MEMORY_TRACE_FRAMES: int = int(os.getenv("MEMORY_TRACE_FRAMES", "1"))
+    MEMORY_SNAPSHOT_DIR: str = os.getenv("MEMORY_SNAPSHOT_DIR", "memory_snapshots")
+    MEMORY_MAX_SNAPSHOTS: int = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "10"))
+    MEMORY_WORKER_TIMEOUT: int = int(os.getenv("MEMORY_WORKER_TIMEOUT", "30"))
     
 class DevConfig(GlobalConfig):
     DATABASE_URL : str  = os.getenv("DEV_DATABASE_URL", "sqlite:///data.db")
     # model_config= SettingsConfigDict(env_prefix="DEV_")
     REDIS_URL: str = os.getenv("DEV_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_BACKEND: str = os.getenv("DEV_CACHE_BACKEND", "memory")
+    QUERY_COUNT_HEADERS: bool = os.getenv("DEV_QUERY_COUNT_HEADERS", "true").lower() == "true"
     
 
     CELERY_BROKER_URL: str = os.getenv("DEV_CELERY_BROKER_URL", "redis://localhost:6379/0")
@@ -41,6 +112,7 @@ class ProdConfig(GlobalConfig):
     DATABASE_URL: str = os.getenv("DATABASE_URL") or os.getenv("PROD_DATABASE_URL", "postgresql://user:password@db:5432/scholarbase")
     model_config= SettingsConfigDict(env_prefix="PROD_")
     REDIS_URL: str = os.getenv("PROD_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_BACKEND: str = os.getenv("PROD_CACHE_BACKEND", "redis")
     
     CELERY_BROKER_URL: str = os.getenv("PROD_CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("PROD_CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
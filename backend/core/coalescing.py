@@ -0,0 +1,133 @@
+"""Single-flight coalescing for identical concurrent reads.
+
+A route decorated with ``single_flight`` shares one in-flight computation
+between all concurrent requests with the same key: the first request (the
+leader) runs the endpoint and every request that arrives while it is running
+(the followers) awaits the leader's result instead of hitting the database
+again. Dependencies, including authentication, still run for every request.
+If the leader is cancelled, e.g. because its client disconnected, the first
+follower still waiting takes over and runs the endpoint with its own
+dependencies, and the others follow it.
+
+Sync endpoints are run in the threadpool by the decorator, which is what lets
+identical requests actually overlap.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable
+
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0
+        self.followers = 0
+        self.errors = 0
+        self.takeovers = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        retried = False
+        while (future := self._inflight.get(key)) is not None:
+            self.followers += 1
+            try:
+                # Shielded so a follower disconnecting doesn't cancel the leader.
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            # The leader was cancelled, not this request: lead or follow the next attempt.
+            self.followers -= 1
+            retried = True
+
+        if retried:
+            self.takeovers += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            self.errors += 1
+            future.set_exception(e)
+            # Mark retrieved; the leader re-raises and followers get it from the future.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        total = self.leaders + self.followers
+        return {
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "errors": self.errors,
+            "takeovers": self.takeovers,
+            "in_flight": len(self._inflight),
+            "coalescing_ratio": round(self.followers / total, 4) if total else 0.0,
+        }
+
+
+_registry: Dict[str, SingleFlight] = {}
+_registry_lock = threading.Lock()
+
+
+def get_flight(name: str) -> SingleFlight:
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = SingleFlight(name)
+        return _registry[name]
+
+
+def coalescing_stats() -> Dict[str, dict]:
+    return {name: flight.stats() for name, flight in _registry.items()}
+
+
+def _normalize(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(str(getattr(item, "value", item)) for item in value))
+    return str(getattr(value, "value", value))
+
+
+def single_flight(name: str, params: Iterable[str] = (), scope: Callable[..., Hashable] = None):
+    """Coalesce concurrent calls of a route that agree on ``params``.
+
+    ``scope`` receives the endpoint kwargs and can add viewer-specific parts to
+    the key. Conditional request headers are always part of the key so a 304
+    is never handed to a request that didn't ask for one.
+    """
+    params = tuple(params)
+    flight = get_flight(name)
+
+    def decorator(endpoint):
+        is_async = inspect.iscoroutinefunction(endpoint)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            key = tuple((param, _normalize(kwargs.get(param))) for param in params)
+            request = next((value for value in kwargs.values() if isinstance(value, Request)), None)
+            if request is not None:
+                key += tuple(request.headers.get(header, "") for header in CONDITIONAL_HEADERS)
+            if scope is not None:
+                key += (scope(**kwargs),)
+
+            if is_async:
+                return await flight.do(key, lambda: endpoint(**kwargs))
+            return await flight.do(key, lambda: run_in_threadpool(endpoint, **kwargs))
+
+        return wrapper
+
+    return decorator
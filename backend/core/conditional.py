@@ -0,0 +1,97 @@
+"""Conditional GET support (ETag / Last-Modified) for project resources.
+
+Single projects get a strong ETag derived from their id and ``updated_at``.
+Listings get a weak ETag derived from the filter, the page, the viewer, and
+the newest ``updated_at`` and row count of the whole unpaged result. That is
+one cheap aggregate query instead of loading and serializing the page. Counting
+every matching row means a deletion anywhere in the result changes the ETag of
+every page, since the rows behind later pages shift. Listings send no
+Last-Modified: deleting a row never raises the newest ``updated_at``, so a
+date alone can't tell that a listing changed.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import NamedTuple, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+from sqlmodel import Session
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def project_validators(project) -> Validators:
+    updated_at = _as_utc(project.updated_at)
+    return Validators(f'"{_digest(project.id, updated_at.isoformat())}"', updated_at)
+
+
+def listing_validators(session: Session, request: Request, statement: Select, *scope) -> Validators:
+    """Weak ETag for ``statement``, which must select ``Project.updated_at``.
+
+    Paging and ordering are stripped for the aggregate; the page itself is part
+    of the digest through the query string.
+    """
+    matching = statement.limit(None).offset(None).order_by(None).subquery()
+    last_updated, count = session.execute(
+        select(func.max(matching.c.updated_at), func.count()).select_from(matching)
+    ).one()
+    last_updated = _as_utc(last_updated)
+    query = sorted(request.query_params.multi_items())
+    etag = _digest(request.url.path, query, scope, last_updated.isoformat() if last_updated else "", count)
+    return Validators(f'W/"{etag}"', None)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so the W/ prefix is ignored on both sides.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _unmodified_since(header: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(header))
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def apply_validators(response: Response, validators: Validators) -> Response:
+    response.headers["ETag"] = validators.etag
+    if validators.last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(validators.last_modified, usegmt=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(request: Request, validators: Validators) -> Optional[Response]:
+    """Return a 304 response if the client's cached copy is still current."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, validators.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = if_modified_since is not None and _unmodified_since(if_modified_since, validators.last_modified)
+    if not fresh:
+        return None
+    return apply_validators(Response(status_code=304), validators)
@@ -0,0 +1,255 @@
+"""Memory diagnostics for the API process and Celery workers.
+
+- ``start_tracing`` and ``stop_tracing`` switch tracemalloc on and off in
+  the current process. A process can also trace from startup with
+  ``PYTHONTRACEMALLOC=<frames>``.
+- ``take_snapshot`` saves a tracemalloc snapshot to ``MEMORY_SNAPSHOT_DIR``.
+  Only the newest ``MEMORY_MAX_SNAPSHOTS`` are kept, and each is a few MB.
+  Every process on the host shares the directory, so a snapshot taken in a
+  worker can be diffed from the API and the other way round.
+- ``diff_snapshots`` compares two snapshots grouped by ``lineno`` (file and
+  line), ``filename`` or ``traceback``, largest growth first.
+- ``memory_report`` gives the process RSS and the most common object types.
+  It also counts live SQLModel instances per class, and the size of every
+  live Session's identity map.
+
+The admin endpoints under ``/api/admin/memory`` run these in the API
+process that serves the request. The ``tasks.memory.memory_diagnostics``
+task runs them in whichever worker process picks it up. Every result names
+its ``pid``, so the process can be told apart. Tracing and snapshots apply
+to the process that ran them.
+"""
+import gc
+import json
+import os
+import re
+import resource
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from config import config
+from core.profiling import short_path
+
+TOP_TYPES = 25
+GROUPINGS = ("lineno", "filename", "traceback")
+_snapshot_id_pattern = re.compile(r"^[0-9]+-[0-9]{8}T[0-9]{6}-[0-9a-f]{6}$")
+_snapshot_filters = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def tracing_status() -> dict:
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "pid": os.getpid(),
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": current,
+        "traced_peak_bytes": peak,
+        "overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+    }
+
+
+def start_tracing(frames: Optional[int] = None) -> dict:
+    frames = frames or config.MEMORY_TRACE_FRAMES
+    if tracemalloc.is_tracing() and tracemalloc.get_traceback_limit() != frames:
+        tracemalloc.stop()  # the frame limit can only change on a restart
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracing_status()
+
+
+def stop_tracing() -> dict:
+    tracemalloc.stop()
+    return tracing_status()
+
+
+def _snapshot_path(snapshot_id: str, suffix: str) -> str:
+    if not _snapshot_id_pattern.match(snapshot_id):
+        raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+    return os.path.join(config.MEMORY_SNAPSHOT_DIR, f"{snapshot_id}{suffix}")
+
+
+def _stat_dict(stat, group_by: str) -> dict:
+    frame = stat.traceback[0]
+    entry = {"file": short_path(frame.filename), "line": frame.lineno if group_by != "filename" else None}
+    if group_by == "traceback":
+        entry["traceback"] = [f"{short_path(item.filename)}:{item.lineno}" for item in stat.traceback]
+    return entry
+
+
+def take_snapshot(label: str = "") -> dict:
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running in this process; start it first")
+    snapshot = tracemalloc.take_snapshot().filter_traces(_snapshot_filters)
+    snapshot_id = f"{os.getpid()}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+    stats = snapshot.statistics("lineno")
+    meta = {
+        "id": snapshot_id,
+        "label": label,
+        "pid": os.getpid(),
+        "taken_at": datetime.now(timezone.utc).isoformat(),
+        "frames": snapshot.traceback_limit,
+        "traced_bytes": sum(stat.size for stat in stats),
+        "blocks": sum(stat.count for stat in stats),
+        "rss_bytes": _rss_bytes(),
+        "top": [{**_stat_dict(stat, "lineno"), "size": stat.size, "count": stat.count} for stat in stats[:10]],
+    }
+
+    os.makedirs(config.MEMORY_SNAPSHOT_DIR, exist_ok=True)
+    snapshot.dump(_snapshot_path(snapshot_id, ".snapshot"))
+    with open(_snapshot_path(snapshot_id, ".json"), "w") as meta_file:
+        json.dump(meta, meta_file)
+    _prune_snapshots()
+    return meta
+
+
+def _prune_snapshots() -> None:
+    metas = list_snapshots()
+    for meta in metas[config.MEMORY_MAX_SNAPSHOTS:]:
+        for suffix in (".snapshot", ".json"):
+            try:
+                os.remove(_snapshot_path(meta["id"], suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_snapshots() -> List[dict]:
+    """Snapshot metadata from every process on this host, newest first."""
+    try:
+        names = [name for name in os.listdir(config.MEMORY_SNAPSHOT_DIR) if name.endswith(".json")]
+    except FileNotFoundError:
+        return []
+    metas = []
+    for name in names:
+        try:
+            with open(os.path.join(config.MEMORY_SNAPSHOT_DIR, name)) as meta_file:
+                metas.append(json.load(meta_file))
+        except (OSError, ValueError):
+            continue
+    return sorted(metas, key=lambda meta: meta["taken_at"], reverse=True)
+
+
+def _load_snapshot(snapshot_id: str) -> tracemalloc.Snapshot:
+    try:
+        return tracemalloc.Snapshot.load(_snapshot_path(snapshot_id, ".snapshot"))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Snapshot {snapshot_id} not found")
+
+
+def diff_snapshots(before: str, after: str, group_by: str = "lineno", limit: int = 25) -> dict:
+    if group_by not in GROUPINGS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUPINGS)}")
+    old, new = _load_snapshot(before), _load_snapshot(after)
+    stats = new.compare_to(old, group_by)
+    return {
+        "before": before,
+        "after": after,
+        "same_process": before.split("-", 1)[0] == after.split("-", 1)[0],
+        "group_by": group_by,
+        "size_diff": sum(stat.size_diff for stat in stats),
+        "count_diff": sum(stat.count_diff for stat in stats),
+        "stats": [
+            {
+                **_stat_dict(stat, group_by),
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ],
+    }
+
+
+def _subclasses(cls) -> set:
+    found = set()
+    pending = [cls]
+    while pending:
+        for subclass in pending.pop().__subclasses__():
+            if subclass not in found:
+                found.add(subclass)
+                pending.append(subclass)
+    return found
+
+
+def memory_report() -> dict:
+    """RSS, the most common object types, SQLModel instances and Session identity maps.
+
+    Walks every object the garbage collector tracks, so it takes a moment on a
+    large heap.
+    """
+    # Checks on type(obj) only: isinstance() can run __getattr__ hooks on arbitrary objects.
+    model_classes = _subclasses(SQLModel)
+    session_classes = _subclasses(Session) | {Session}
+    types: Counter = Counter()
+    models: Counter = Counter()
+    sessions = []
+    for obj in gc.get_objects():
+        cls = type(obj)
+        types[cls.__name__] += 1
+        if cls in model_classes:
+            models[cls.__name__] += 1
+        elif cls in session_classes:
+            sessions.append(obj)
+
+    identity_map: Counter = Counter()
+    session_sizes = []
+    for session in sessions:
+        size = len(session.identity_map)
+        session_sizes.append({"identity_map": size, "new": len(session.new), "dirty": len(session.dirty)})
+        for instance in session.identity_map.values():
+            identity_map[type(instance).__name__] += 1
+
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": _rss_bytes(),
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "gc_objects": sum(types.values()),
+        "gc_counts": gc.get_count(),
+        "top_types": dict(types.most_common(TOP_TYPES)),
+        "sqlmodel_instances": dict(models.most_common()),
+        "sessions": {
+            "count": len(sessions),
+            "identity_map_total": sum(identity_map.values()),
+            "identity_map_by_class": dict(identity_map.most_common()),
+            "largest": sorted(session_sizes, key=lambda item: item["identity_map"], reverse=True)[:5],
+        },
+        "tracemalloc": tracing_status(),
+    }
+
+
+ACTIONS = {
+    "report": memory_report,
+    "status": tracing_status,
+    "start": start_tracing,
+    "stop": stop_tracing,
+    "snapshot": take_snapshot,
+    "snapshots": list_snapshots,
+    "diff": diff_snapshots,
+}
+
+
+def run_action(action: str, **params) -> dict:
+    """Run one of ``ACTIONS`` by name, for callers outside the API such as the Celery task."""
+    if action not in ACTIONS:
+        raise HTTPException(status_code=400, detail=f"action must be one of {', '.join(ACTIONS)}")
+    return {"pid": os.getpid(), "action": action, "result": ACTIONS[action](**params)}
@@ -0,0 +1,354 @@
+"""Prometheus metrics in the text exposition format, served at ``/metrics``.
+
+``MetricsMiddleware`` records, per method and route template (``/api/projects/{project_id}``
+rather than the raw path, so ids don't explode the label set):
+
+- request latency histograms by status, and in-flight requests
+- SQL statements and SQL time per request, from engine events on the app
+  engine. Sync endpoints run in the threadpool with a copy of the request
+  context, so their queries are counted too.
+
+Password hashing, storage uploads and Celery tasks report through the
+helpers below. Values are kept per process, so scrape every API instance
+rather than the load balancer. Celery tasks run in the worker processes. With
+``METRICS_TASK_BACKEND=redis`` their outcomes are summed in Redis and show up
+on every API instance's ``/metrics``. With the default ``memory`` backend
+they are only visible when tasks run in-process, e.g. in eager mode.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import get_route_path
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TASK_KEY = "scholarbase:metrics:tasks"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child holding one label set's value."""
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every child, without the HELP and TYPE header."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, values, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route template and status.",
+    ("method", "route", "status"))
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests currently being served.", ("method", "route"))
+HTTP_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per request.", ("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250))
+HTTP_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request.", ("method", "route"))
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "Time spent hashing or verifying passwords with bcrypt.", ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0))
+STORAGE_UPLOAD_SECONDS = Histogram(
+    "storage_upload_seconds", "Time to store one document.", ("backend",))
+STORAGE_UPLOAD_BYTES = Counter(
+    "storage_upload_bytes_total", "Bytes of documents stored.", ("backend",))
+STORAGE_UPLOAD_FAILURES = Counter(
+    "storage_upload_failures_total", "Document uploads that raised.", ("backend",))
+CELERY_TASK_RUNS = Counter(
+    "celery_task_runs_total", "Celery task runs by outcome.", ("task", "outcome"))
+CELERY_TASK_SECONDS = Counter(
+    "celery_task_seconds_total", "Celery task run time by outcome.", ("task", "outcome"))
+
+# [statement count, seconds] for the request running in this context.
+_db_usage: ContextVar[Optional[list]] = ContextVar("request_db_usage", default=None)
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["metrics_query_start"].pop()
+        usage = _db_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += time.perf_counter() - started
+
+
+class _RouteIndex:
+    """Maps a request to its route template with one regex match.
+
+    Each method gets one alternation of the path regexes of its routes, in
+    route order, plus one over every route for paths that only match on
+    another method (405s). The routes' own named groups are made
+    non-capturing, so ``lastgroup`` names the route that matched. Starlette
+    picks routes the same way: the first full match, else the first path match.
+    """
+
+    _named_group = re.compile(r"\(\?P<\w+>")
+
+    def __init__(self, routes):
+        self.size = len(routes)
+        by_method, everything = {}, []
+        for route in routes:
+            regex = getattr(route, "path_regex", None)
+            if regex is None:
+                continue
+            entry = (self._named_group.sub("(?:", regex.pattern.lstrip("^").rstrip("$")), route.path)
+            everything.append(entry)
+            for method in getattr(route, "methods", None) or ():
+                by_method.setdefault(method, []).append(entry)
+        self.by_method = {method: self._compile(entries) for method, entries in by_method.items()}
+        self.any = self._compile(everything)
+
+    @staticmethod
+    def _compile(entries):
+        pattern = "|".join(f"(?P<r{index}>{regex})" for index, (regex, _) in enumerate(entries))
+        return re.compile(f"^(?:{pattern})$"), [template for _, template in entries]
+
+    def template(self, method: str, path: str) -> str:
+        for regex, templates in (self.by_method.get(method, (None, None)), self.any):
+            match = regex.match(path) if templates else None
+            if match:
+                return templates[int(match.lastgroup[1:])]
+        # Unmatched paths share one label so scanners can't grow the label set.
+        return "unmatched"
+
+
+_route_index: Optional[_RouteIndex] = None
+
+
+def route_template(scope) -> str:
+    global _route_index
+    routes = scope["app"].router.routes
+    if _route_index is None or _route_index.size != len(routes):
+        _route_index = _RouteIndex(routes)
+    return _route_index.template(scope["method"], get_route_path(scope))
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            _db_usage.reset(token)
+            HTTP_REQUEST_SECONDS.labels(method, route, str(status[0])).observe(elapsed)
+            HTTP_DB_STATEMENTS.labels(method, route).observe(usage[0])
+            HTTP_DB_SECONDS.labels(method, route).observe(usage[1])
+
+
+def record_storage_upload(backend: str, size: int, seconds: float) -> None:
+    STORAGE_UPLOAD_SECONDS.labels(backend).observe(seconds)
+    STORAGE_UPLOAD_BYTES.labels(backend).inc(size)
+
+
+@lru_cache
+def _redis():
+    import redis
+
+    return redis.Redis.from_url(config.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+
+def record_task(task: str, outcome: str, seconds: float) -> None:
+    if config.METRICS_TASK_BACKEND != "redis":
+        CELERY_TASK_RUNS.labels(task, outcome).inc()
+        CELERY_TASK_SECONDS.labels(task, outcome).inc(seconds)
+        return
+    field = f"{task}|{outcome}"
+    try:
+        pipeline = _redis().pipeline(transaction=False)
+        pipeline.hincrby(f"{TASK_KEY}:runs", field, 1)
+        pipeline.hincrbyfloat(f"{TASK_KEY}:seconds", field, seconds)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not record metrics for task {task}: {e}")
+
+
+def _load_task_totals() -> None:
+    try:
+        pipeline = _redis().pipeline(transaction=False)
+        pipeline.hgetall(f"{TASK_KEY}:runs")
+        pipeline.hgetall(f"{TASK_KEY}:seconds")
+        runs, seconds = pipeline.execute()
+    except Exception as e:
+        logger.warning(f"Could not read task metrics: {e}")
+        return
+    for counter, totals in ((CELERY_TASK_RUNS, runs), (CELERY_TASK_SECONDS, seconds)):
+        for field, value in totals.items():
+            task, _, outcome = field.decode().rpartition("|")
+            counter.labels(task, outcome).set(float(value))
+
+
+def render() -> str:
+    if config.METRICS_TASK_BACKEND == "redis":
+        _load_task_totals()
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,381 @@
+"""On-demand profiling of single requests, for admins.
+
+With ``PROFILING_ENABLED`` on, an admin can profile one request by sending
+``X-Profile: 1`` or adding ``?profile=1``. The admin check reads the role
+claim of the signed bearer token, so it adds no queries to the profile.
+Anyone else's flag is ignored. The response is the same as usual, with an
+``X-Profile-Id`` header. The profile is stored under ``PROFILE_DIR`` and
+served by the admin endpoints under ``/api/admin/profiles``.
+
+A sampler thread records the Python stack of the threads working for the
+request every ``PROFILE_SAMPLE_INTERVAL_MS``. The event loop thread is
+sampled only while it runs the request's task. Work the task hands to
+child tasks, such as a streaming response body, is not attributed.
+Threadpool threads are sampled only between entering and leaving a call
+made for the request: ``instrument_threadpool`` marks them when
+``run_in_threadpool`` is called from the request's context. Other users'
+requests served by the same threads meanwhile stay out of the profile.
+The stacks are stored in the collapsed format
+(``frame;frame;frame count``), which flamegraph.pl and speedscope read
+directly. Every SQL statement the request runs is timed too. The top
+statements by total time are attached, grouped by fingerprint.
+
+Limits that keep this safe on a live server:
+
+- one profile runs at a time, and other flagged requests run unprofiled
+  (``X-Profile: busy``)
+- sampling stops after ``PROFILE_MAX_SECONDS`` and the profile is marked
+  truncated
+- stacks are cut at ``PROFILE_MAX_DEPTH`` frames, and at most
+  ``PROFILE_MAX_STACKS`` distinct stacks are kept
+- only the latest ``PROFILE_KEEP`` profiles are kept on disk
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+import anyio.to_thread
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import config
+from core.metrics import route_template
+from core.query_budget import fingerprint
+from services.auth import verify_token
+from services.enums import Role
+
+logger = logging.getLogger(__name__)
+
+TOP_STATEMENTS = 10
+_profile_id_pattern = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+_backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+_truthy = {"1", "true", "yes", "on"}
+
+
+def short_path(path: str) -> str:
+    """``path`` relative to the backend, site-packages or the standard library."""
+    if path.startswith(_backend_root):
+        return path[len(_backend_root):]
+    for marker in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+        index = path.rfind(marker)
+        if index != -1:
+            return path[index + len(marker):]
+    return path
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_qualname} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _idle(frame) -> bool:
+    code = frame.f_code
+    if os.path.basename(code.co_filename) == "selectors.py" and code.co_name == "select":
+        return True  # event loop waiting for I/O
+    # Pool thread waiting for work: Condition.wait under Queue.get, called by anyio's worker loop.
+    for _ in range(3):
+        if frame is None:
+            return False
+        code = frame.f_code
+        if os.path.basename(code.co_filename) == "queue.py" and code.co_name == "get":
+            return frame.f_back is not None and "anyio" in frame.f_back.f_code.co_filename
+        frame = frame.f_back
+    return False
+
+
+class _Profile:
+    def __init__(self, profile_id: str, route: str, path: str):
+        self.id = profile_id
+        self.route = route
+        self.path = path
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        # Pool threads currently running a call for this request, with their nesting depth.
+        self.working: Counter = Counter()
+        self._working_lock = threading.Lock()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.dropped = 0
+        self.truncated = False
+        self.statements: Dict[str, list] = {}
+        self.status = 500
+        self.seconds = 0.0
+        self.started = time.perf_counter()
+        self.created_at = datetime.now(timezone.utc)
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def enter(self, ident: int) -> None:
+        with self._working_lock:
+            self.working[ident] += 1
+
+    def leave(self, ident: int) -> None:
+        with self._working_lock:
+            self.working[ident] -= 1
+            if self.working[ident] <= 0:
+                del self.working[ident]
+
+    def _threads(self) -> List[int]:
+        with self._working_lock:
+            threads = list(self.working)
+        if asyncio.current_task(self.loop) is self.task:
+            threads.append(self.loop_thread)
+        return threads
+
+    def stop(self) -> None:
+        self.seconds = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join()
+
+    def _sample(self) -> None:
+        interval = config.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        deadline = time.perf_counter() + config.PROFILE_MAX_SECONDS
+        while not self._stop.wait(interval):
+            if time.perf_counter() > deadline:
+                self.truncated = True
+                return
+            threads = self._threads()
+            frames = sys._current_frames()
+            for ident in threads:
+                frame = frames.get(ident)
+                if frame is None or _idle(frame):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < config.PROFILE_MAX_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                self.samples += 1
+                if key in self.stacks or len(self.stacks) < config.PROFILE_MAX_STACKS:
+                    self.stacks[key] += 1
+                else:
+                    self.dropped += 1
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        entry = self.statements.setdefault(fingerprint(statement), [0, 0.0, 0.0, statement])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_statements(self) -> List[dict]:
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {
+                "fingerprint": text,
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "max_ms": round(slowest * 1000, 3),
+                "example": example[:1000],
+            }
+            for text, (count, total, slowest, example) in ranked[:TOP_STATEMENTS]
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "seconds": round(self.seconds, 4),
+            "interval_ms": config.PROFILE_SAMPLE_INTERVAL_MS,
+            "samples": self.samples,
+            "dropped_samples": self.dropped,
+            "truncated": self.truncated,
+            "statement_count": sum(entry[0] for entry in self.statements.values()),
+            "db_ms": round(sum(entry[1] for entry in self.statements.values()) * 1000, 3),
+        }
+
+
+_active: ContextVar[Optional[_Profile]] = ContextVar("request_profile", default=None)
+_running = threading.Lock()
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _active.get()
+        if profile is not None:
+            conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = _active.get()
+        started = conn.info.get("profile_query_start")
+        if profile is not None and started:
+            profile.record_statement(statement, time.perf_counter() - started.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        started = conn.info.get("profile_query_start") if conn is not None else None
+        if _active.get() is not None and started:
+            started.pop()
+
+
+def instrument_threadpool() -> None:
+    """Mark threadpool threads as working for a profiled request while they run its calls.
+
+    Starlette's ``run_in_threadpool`` goes through ``anyio.to_thread.run_sync``.
+    Outside a profiled request the wrapper only reads one context variable.
+    """
+    run_sync = anyio.to_thread.run_sync
+    if getattr(run_sync, "profiled", False):
+        return
+
+    @functools.wraps(run_sync)
+    async def profiled_run_sync(func, *args, **kwargs):
+        profile = _active.get()
+        if profile is None:
+            return await run_sync(func, *args, **kwargs)
+
+        def marked(*call_args):
+            ident = threading.get_ident()
+            profile.enter(ident)
+            try:
+                return func(*call_args)
+            finally:
+                profile.leave(ident)
+
+        return await run_sync(marked, *args, **kwargs)
+
+    profiled_run_sync.profiled = True
+    anyio.to_thread.run_sync = profiled_run_sync
+
+
+# Storage
+
+def _profile_path(profile_id: str) -> str:
+    return os.path.join(config.PROFILE_DIR, f"{profile_id}.json")
+
+
+def _store(profile: _Profile) -> None:
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    document = {**profile.summary(), "top_statements": profile.top_statements(), "collapsed": profile.collapsed()}
+    path = _profile_path(profile.id)
+    with open(f"{path}.part", "w") as profile_file:
+        json.dump(document, profile_file)
+    os.replace(f"{path}.part", path)
+
+    stored = sorted(name for name in os.listdir(config.PROFILE_DIR) if name.endswith(".json"))
+    for name in stored[:-config.PROFILE_KEEP]:
+        try:
+            os.remove(os.path.join(config.PROFILE_DIR, name))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles() -> List[dict]:
+    try:
+        names = sorted((name for name in os.listdir(config.PROFILE_DIR) if name.endswith(".json")), reverse=True)
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for name in names:
+        profile = load_profile(name[:-len(".json")])
+        profile.pop("collapsed")
+        profile.pop("top_statements")
+        profiles.append(profile)
+    return profiles
+
+
+def load_profile(profile_id: str) -> dict:
+    if not _profile_id_pattern.match(profile_id):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    try:
+        with open(_profile_path(profile_id)) as profile_file:
+            return json.load(profile_file)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+# Middleware
+
+def _requested(scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == b"x-profile":
+            return value.decode("latin-1").strip().lower() in _truthy
+    flags = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+    return bool(flags) and flags[-1].strip().lower() in _truthy
+
+
+def _is_admin(scope) -> bool:
+    for key, value in scope["headers"]:
+        if key == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return False
+            try:
+                payload = verify_token(token.strip())
+            except HTTPException:
+                return False
+            return payload.get("role") == Role.ADMIN.value
+    return False
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.PROFILING_ENABLED or not _requested(scope) or not _is_admin(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not _running.acquire(blocking=False):
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)["X-Profile"] = "busy"
+                await send(message)
+
+            await self.app(scope, receive, send_busy)
+            return
+
+        try:
+            profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+            profile = _Profile(profile_id, f"{scope['method']} {route_template(scope)}", scope["path"])
+
+            async def send_with_profile(message):
+                if message["type"] == "http.response.start":
+                    profile.status = message["status"]
+                    MutableHeaders(scope=message)["X-Profile-Id"] = profile.id
+                await send(message)
+
+            token = _active.set(profile)
+            profile.start()
+            try:
+                await self.app(scope, receive, send_with_profile)
+            finally:
+                profile.stop()
+                _active.reset(token)
+                try:
+                    _store(profile)
+                except OSError as e:
+                    logger.warning(f"Could not store profile {profile.id}: {e}")
+                else:
+                    logger.info(
+                        f"Profiled {profile.route} as {profile.id}: {profile.samples} samples, "
+                        f"{profile.seconds:.3f}s"
+                    )
+        finally:
+            _running.release()
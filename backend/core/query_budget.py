@@ -0,0 +1,225 @@
+"""Per-request SQL statement budgets and N+1 detection.
+
+``QueryBudgetMiddleware`` counts the statements each request runs on the
+app engine. It compares the count with the route's entry in
+``ROUTE_QUERY_BUDGETS``, keyed by ``"METHOD /route/template"``.
+
+- A statement whose fingerprint repeats ``N_PLUS_ONE_THRESHOLD`` times in
+  one request is logged as a likely N+1. The fingerprint is the SQL with
+  literals and IN lists collapsed.
+- A request over budget is logged. With ``QUERY_BUDGET_STRICT`` the
+  statement that crosses the budget raises ``QueryBudgetExceeded`` instead,
+  so the request fails.
+- ``QUERY_COUNT_HEADERS`` (on in dev) adds ``X-Query-Count``,
+  ``X-Query-Budget`` and ``X-Query-Repeats`` to every response.
+
+Tests can declare budgets of their own. ``route_budget`` tightens or
+loosens one route and is always strict. ``query_budget`` guards a block of
+code run in the caller's context, such as a service call::
+
+    with route_budget("GET /api/admin/students", 2):
+        client.get("/api/admin/students", headers=admin)
+
+    with query_budget(3):
+        review_projects(session, reviews, supervisor)
+
+Budgets are the statement count of each route's heaviest path with cold
+caches, for the role whose account lookup costs the most. An admin's lookup
+tries the student and supervisor tables first. None of them grows with the
+data. Routes served from the result cache run fewer statements.
+"""
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import config
+from core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+ROUTE_QUERY_BUDGETS: Dict[str, Optional[int]] = {
+    "GET /": 0,
+    "GET /health": 0,
+    "GET /metrics": 0,
+    "POST /api/auth/register/Student": 6,
+    "POST /api/auth/register/Supervisor": 5,
+    "POST /api/auth/register/Admin": 5,
+    "POST /api/auth/login/": 3,
+    "GET /api/auth/me": 3,
+    "GET /api/tags/": 0,
+    "GET /api/tags/{project_id}/tags": 1,
+    "DELETE /api/tags/{project_id}/tags": 6,
+    "POST /api/tags/search": 4,
+    "GET /api/projects/": 5,
+    "POST /api/projects/": 5,
+    "GET /api/projects/all": 5,
+    "GET /api/projects/supervised-projects": 5,
+    "GET /api/projects/{project_id}": 4,
+    "GET /api/projects/{project_id}/upload-status": 4,
+    "PATCH /api/projects/{student_id}/assign-supervisor": 6,
+    "PATCH /api/projects/{project_id}": 6,
+    "DELETE /api/projects/{project_id}": 5,
+    "POST /api/projects/review": 5,
+    "PUT /api/projects/{project_id}/review": 6,
+    "GET /api/admin/dashboard/stats": 9,
+    "GET /api/admin/students": 7,
+    "GET /api/admin/projects": 5,
+    "GET /api/admin/supervisors": 6,
+    "GET /api/admin/metrics/coalescing": 3,
+    "GET /api/admin/profiles": 3,
+    "GET /api/admin/profiles/{profile_id}": 3,
+    "GET /api/admin/memory": 3,
+    "POST /api/admin/memory/tracing/start": 3,
+    "POST /api/admin/memory/tracing/stop": 3,
+    "POST /api/admin/memory/snapshots": 3,
+    "GET /api/admin/memory/snapshots": 3,
+    "GET /api/admin/memory/snapshots/diff": 3,
+    "POST /api/admin/memory/worker": 3,
+    "DELETE /api/admin/students/{student_id}": 8,
+    # Three statements per IMPORT_CHUNK_SIZE rows, by design.
+    "POST /api/admin/students/import": None,
+    "POST /api/admin/assignments/preview": 6,
+    "POST /api/admin/assignments/apply": 4,
+    "GET /api/supervisor/projects": 5,
+    "GET /api/supervisor/students": 6,
+    "PATCH /api/supervisor/projects/{project_id}/status": 6,
+    "GET /api/supervisor/dashboard/stats": 9,
+    "GET /api/documents/{key}": 0,
+    "POST /api/uploads/direct": 4,
+    "POST /api/uploads/direct/confirm": 6,
+    "POST /api/uploads/resumable": 4,
+    "HEAD /api/uploads/resumable/{upload_id}": 3,
+    "PATCH /api/uploads/resumable/{upload_id}": 3,
+    "POST /api/uploads/resumable/{upload_id}/finalize": 6,
+    "DELETE /api/uploads/resumable/{upload_id}": 3,
+}
+
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_number_literal = re.compile(r"\b\d+(?:\.\d+)?\b")
+_in_list = re.compile(r"\bIN\s*\((?:\s*(?:\?|%s|:\w+|\$\d+|\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_whitespace = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with literals and IN lists collapsed, so repeats of one query compare equal."""
+    statement = _string_literal.sub("?", statement)
+    statement = _number_literal.sub("?", statement)
+    statement = _in_list.sub("IN (?)", statement)
+    return _whitespace.sub(" ", statement).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    def __init__(self, label: str, budget: Optional[int] = None, strict: bool = False,
+                 parent: Optional["QueryLog"] = None):
+        self.label = label
+        self.budget = budget
+        self.strict = strict
+        self.parent = parent
+        self.count = 0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str) -> None:
+        log = self
+        while log is not None:
+            log.count += 1
+            log.statements[statement] += 1
+            if log.strict and log.budget is not None and log.count > log.budget:
+                raise QueryBudgetExceeded(
+                    f"{log.label} ran {log.count} SQL statements, over its budget of {log.budget}:\n"
+                    + "\n".join(f"  {count}x {text}" for text, count in log.repeated(threshold=1)[:10])
+                )
+            log = log.parent
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Fingerprints run at least ``threshold`` times, most frequent first."""
+        threshold = config.N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        fingerprints: Counter = Counter()
+        for statement, count in self.statements.items():
+            fingerprints[fingerprint(statement)] += count
+        return [(text, count) for text, count in fingerprints.most_common() if count >= threshold]
+
+
+_current: ContextVar[Optional[QueryLog]] = ContextVar("query_log", default=None)
+_overrides: Dict[str, int] = {}
+_overrides_lock = threading.Lock()
+
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        log = _current.get()
+        if log is not None:
+            log.record(statement)
+
+
+@contextmanager
+def query_budget(max_statements: int, label: str = "Block") -> Iterator[QueryLog]:
+    log = QueryLog(label, max_statements, strict=True, parent=_current.get())
+    token = _current.set(log)
+    try:
+        yield log
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def route_budget(route: str, max_statements: int) -> Iterator[None]:
+    with _overrides_lock:
+        previous = _overrides.get(route)
+        _overrides[route] = max_statements
+    try:
+        yield
+    finally:
+        with _overrides_lock:
+            if previous is None:
+                _overrides.pop(route, None)
+            else:
+                _overrides[route] = previous
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {route_template(scope)}"
+        override = _overrides.get(route)
+        budget = override if override is not None else ROUTE_QUERY_BUDGETS.get(route)
+        log = QueryLog(route, budget, strict=config.QUERY_BUDGET_STRICT or override is not None)
+
+        async def send_with_counts(message):
+            if message["type"] == "http.response.start" and config.QUERY_COUNT_HEADERS:
+                headers = MutableHeaders(scope=message)
+                headers["X-Query-Count"] = str(log.count)
+                if budget is not None:
+                    headers["X-Query-Budget"] = str(budget)
+                repeated = log.repeated(threshold=2)
+                headers["X-Query-Repeats"] = str(repeated[0][1] if repeated else 0)
+            await send(message)
+
+        token = _current.set(log)
+        try:
+            await self.app(scope, receive, send_with_counts)
+        finally:
+            _current.reset(token)
+
+        if budget is not None and log.count > budget:
+            logger.warning(f"{route} ran {log.count} SQL statements, over its budget of {budget}")
+        for text, count in log.repeated():
+            logger.warning(f"Possible N+1 on {route}: {count}x {text[:300]}")
@@ -0,0 +1,43 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Datetimes and (str) enums are handled natively by orjson. Content that is
+    already ``bytes`` (e.g. from a ``TypeAdapter.dump_json``) is sent as-is.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+def dump_model_list(model: Type[BaseModel], items: Iterable[Any]) -> bytes:
+    adapter = list_adapter(model)
+    return adapter.dump_json(adapter.validate_python(list(items), from_attributes=True))
+
+
+def model_list_response(model: Type[BaseModel], items: Iterable[Any], **kwargs) -> FastJSONResponse:
+    """Validate ``items`` against ``List[model]`` and serialize them in one pass,
+    skipping FastAPI's ``jsonable_encoder`` walk over the response."""
+    return FastJSONResponse(dump_model_list(model, items), **kwargs)
@@ -0,0 +1,281 @@
+"""Request and task tracing with a local exporter.
+
+A trace is a tree of spans. Each span is one timed operation with a name and
+attributes. Spans are recorded for:
+
+- every request, named ``METHOD /route/template``
+- every SQL statement on an instrumented engine
+- Cloudinary uploads and deletes, and ``storage.put`` / ``storage.release``
+- password hashing and verification
+- Celery tasks declared with ``base=DatabaseTask``
+
+The current span lives in a context variable, so a span opened inside
+another one becomes its child. This works across ``await`` and
+``run_in_threadpool`` too. Trace context reaches other processes as a W3C
+``traceparent`` header. Requests that carry one continue the caller's trace.
+Tasks published during a span get one in their message headers, so a
+worker's task span joins the trace of the request that queued it.
+
+Spans are buffered per trace and exported together when the trace's first
+span in this process ends. ``TRACE_EXPORTER`` picks the exporter:
+
+- ``none`` (default): tracing is off and ``span()`` costs one config lookup.
+- ``console``: logs each trace as an indented tree with offsets and durations.
+- ``file``: appends one JSON object per span to ``TRACE_FILE``.
+
+Neither needs a collector. Responses carry ``X-Trace-Id``, so a slow
+request can be found in the log or the file.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from celery.signals import before_task_publish
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import config
+from core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_LIMIT = 500
+_traceparent_pattern = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+
+
+class _Trace:
+    """The spans of one trace recorded in this process, exported together."""
+
+    __slots__ = ("spans", "dropped")
+
+    def __init__(self):
+        self.spans: List["Span"] = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start", "end", "error", "_trace", "_root")
+
+    def __init__(self, name: str, parent: Optional[Any] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.attributes = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.end: Optional[float] = None
+        if isinstance(parent, Span):
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self._trace = parent._trace
+            self._root = False
+        else:
+            # A new trace, or a remote parent's trace continued in this process.
+            self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+            self.parent_id = parent.span_id if parent else None
+            self._trace = _Trace()
+            self._root = True
+        self.start = time.time()
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self) -> None:
+        self.end = time.time()
+        trace = self._trace
+        if self._root or len(trace.spans) < config.TRACE_MAX_SPANS:
+            trace.spans.append(self)
+        else:
+            trace.dropped += 1
+        if self._root:
+            _export(trace)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def enabled() -> bool:
+    return config.TRACE_EXPORTER != "none"
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    match = _traceparent_pattern.match(value.strip().lower()) if value else None
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return SpanContext(match.group(1), match.group(2))
+
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Time the block as a child of the current span, or of a remote ``parent``.
+
+    Yields None when tracing is off.
+    """
+    if not enabled():
+        yield None
+        return
+    current = Span(name, parent or _current.get(), attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        current.finish()
+
+
+# Exporters
+
+_file_lock = threading.Lock()
+
+
+def _console_export(trace: _Trace) -> None:
+    spans = sorted(trace.spans, key=lambda item: item.start)
+    root = next((item for item in spans if item._root), spans[0])
+    children: Dict[Optional[str], List[Span]] = {}
+    for item in spans:
+        children.setdefault(item.parent_id, []).append(item)
+
+    lines = [f"Trace {root.trace_id} {root.name} {root.duration * 1000:.1f}ms"]
+
+    def walk(parent: Span, depth: int) -> None:
+        for child in children.get(parent.span_id, []):
+            detail = child.attributes.get("db.statement") or child.attributes.get("filename") or ""
+            detail = " ".join(str(detail).split())[:120]
+            status = f" ERROR {child.error}" if child.error else ""
+            lines.append(
+                f"{'  ' * depth}{(child.start - root.start) * 1000:8.1f}ms {child.duration * 1000:8.1f}ms "
+                f"{child.name} {detail}{status}".rstrip()
+            )
+            walk(child, depth + 1)
+
+    walk(root, 1)
+    if trace.dropped:
+        lines.append(f"  ... {trace.dropped} more spans dropped (TRACE_MAX_SPANS={config.TRACE_MAX_SPANS})")
+    logger.info("\n".join(lines))
+
+
+def _file_export(trace: _Trace) -> None:
+    lines = "".join(json.dumps(item.to_dict(), default=str) + "\n" for item in trace.spans)
+    with _file_lock, open(config.TRACE_FILE, "a") as trace_file:
+        trace_file.write(lines)
+
+
+EXPORTERS = {"console": _console_export, "file": _file_export}
+
+
+def _export(trace: _Trace) -> None:
+    exporter = EXPORTERS.get(config.TRACE_EXPORTER)
+    if exporter is None or not trace.spans:
+        return
+    try:
+        exporter(trace)
+    except Exception as e:
+        logger.warning(f"Could not export trace: {e}")
+
+
+# Instrumentation
+
+def instrument_engine(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current.get()
+        if parent is None:
+            return
+        conn.info.setdefault("trace_spans", []).append(Span("db.query", parent, {
+            "db.system": conn.dialect.name,
+            "db.statement": statement[:STATEMENT_LIMIT],
+            "db.executemany": executemany,
+        }))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().finish()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            failed = spans.pop()
+            failed.record_error(exception_context.original_exception)
+            failed.finish()
+
+
+@before_task_publish.connect
+def _inject_traceparent(headers=None, **kwargs):
+    current = _current.get()
+    if current is not None and headers is not None:
+        headers["traceparent"] = current.traceparent()
+
+
+def task_parent(request) -> Optional[SpanContext]:
+    """The trace context a Celery task message was published with."""
+    value = request.get("traceparent") or (getattr(request, "headers", None) or {}).get("traceparent")
+    return parse_traceparent(value)
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not enabled():
+            await self.app(scope, receive, send)
+            return
+
+        remote = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                remote = parse_traceparent(value.decode("latin-1"))
+                break
+
+        name = f"{scope['method']} {route_template(scope)}"
+        with span(name, remote, **{"http.method": scope["method"], "http.target": scope["path"]}) as request_span:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    MutableHeaders(scope=message)["X-Trace-Id"] = request_span.trace_id
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -1,5 +1,5 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from contextlib import asynccontextmanager
 from services.openai import custom_openapi
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,6 +12,12 @@ from routers.project import routers as project_router
 from routers.auth import auth_router
 from routers.admin import admin
 from routers.supervisor import supervisor_router
+from routers.documents import documents_router
+from routers.uploads import uploads_router
+from core.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engine as instrument_metrics, render as render_metrics
+from core.query_budget import QueryBudgetMiddleware, instrument_engine as instrument_query_budget
+from core.tracing import TracingMiddleware, instrument_engine as instrument_tracing
+from core.profiling import ProfilingMiddleware, instrument_engine as instrument_profiling, instrument_threadpool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -38,6 +44,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+instrument_metrics(engine)
+instrument_query_budget(engine)
+instrument_tracing(engine)
+instrument_profiling(engine)
+instrument_threadpool()
 
 
 
@@ -49,10 +64,16 @@ def root():
 def health_check():
     return {"status": "healthy", "message": "ScholarBase API is running"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 
 app.include_router(auth_router, prefix="/api", tags=["Authentication"])
 app.include_router(router=tag_router, prefix="/api/tags", tags=["Tags"])
 app.include_router(project_router, prefix="/api", tags=["Projects"])
 app.include_router(admin, prefix="/api", tags=["Admin"])
 app.include_router(supervisor_router, prefix="/api", tags=["Supervisor"])
+app.include_router(documents_router, prefix="/api", tags=["Documents"])
+app.include_router(uploads_router, prefix="/api", tags=["Uploads"])
 
@@ -1,6 +1,6 @@
 from sqlmodel import Field, Relationship, SQLModel
-from sqlalchemy import JSON
-from services.enums import Status
+from sqlalchemy import JSON, Index
+from services.enums import Status, UploadState
 from services.enums import Tags
 from sqlmodel import Field, SQLModel, Relationship, Column
 from typing import Optional, List, TYPE_CHECKING
@@ -13,12 +13,16 @@ if TYPE_CHECKING:
 
 
 class Project(SQLModel, table=True):
+    # Serves the stale pending-project sweep (status = PENDING AND created_at <= cutoff).
+    __table_args__ = (Index("ix_project_status_created_at", "status", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(index=True, max_length=200)
     year: str = Field(index=True,nullable=False)
     description: str = Field(nullable=False)
     file_url: Optional[str] = Field(default=None)
     document_url: Optional[str] = Field(default=None)
+    upload_state: Optional[UploadState] = Field(default=None, nullable=True)
     status: Status = Field(default=Status.PENDING)
     review_comment: Optional[str] = Field(default=None,nullable=True)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
@@ -1,10 +1,15 @@
 from fastapi import APIRouter, Depends
 from sqlmodel import Session, select
 from typing import Annotated
+from datetime import datetime, timezone
 from fastapi import HTTPException
 from models.projects import *
 from schemas.project import ProjectRead
 from models.account import *
+from core.coalescing import single_flight
+from core.responses import FastJSONResponse, dump_model_list
+from services.cache import cache_key, cached_response, invalidate, project_tags
+from services.tiered_cache import get_tiered_cache
 from core.dependencies import AccountType, get_current_user
 from models.database import get_session
 from services.enums import Status, Tags
@@ -12,9 +17,9 @@ from services.enums import Status, Tags
 routers = APIRouter()
 
 
-@routers.get("/", response_model=list[Tags])
+@routers.get("/", response_model=list[Tags], response_class=FastJSONResponse)
 def list_tags(session: Session = Depends(get_session)):
-    return [t.value for t in Tags]
+    return FastJSONResponse(get_tiered_cache("catalogs").get_or_set("tags", lambda: [t.value for t in Tags]))
 
 
 
@@ -37,14 +42,17 @@ def remove_tags_from_project(project_id: int, tags: list[Tags], session: Session
         raise HTTPException(status_code=404, detail="Project not found")
 
     project.tags = [t for t in project.tags if t not in tags]
+    project.updated_at = datetime.now(timezone.utc)
     session.add(project)
     session.commit()
     session.refresh(project)
+    invalidate(*project_tags(project))
     return project
 
 
 
-@routers.post("/search", response_model=List[ProjectRead])
+@routers.post("/search", response_model=List[ProjectRead], response_class=FastJSONResponse)
+@single_flight("tags.search", params=("tags", "name", "title", "matric_no", "student_name"))
 def search_projects_by_tags(
     tags: List[str] = [],
     name: str = "",
@@ -71,5 +79,9 @@ def search_projects_by_tags(
     if student_name:
         statement = statement.join(StudentAccount).where(StudentAccount.name.contains(student_name))
 
-    projects = session.exec(statement).all()
-    return projects
+    def build(session: Session) -> bytes:
+        return dump_model_list(ProjectRead, session.exec(statement).all())
+
+    key = cache_key("tags.search", "all", tags=tags, name=name, title=title, matric_no=matric_no,
+                    student_name=student_name)
+    return cached_response(session, key, ["projects", "students"], build)
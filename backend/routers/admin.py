@@ -1,62 +1,84 @@
-
-from fastapi import APIRouter,Depends, HTTPException, Security, Query,Response
+import io
+from fastapi import APIRouter,Depends, HTTPException, Security, Query,Response,Request, UploadFile, File
 from fastapi.security import HTTPBearer
 from sqlmodel import Session, select, func
 from typing import Optional, List
 from cloudinary.uploader import upload as cloudinary_upload
 from models.projects import Project
-from services.cloudinary import upload_file_to_cloudinary
 from models.account import StudentAccount, SupervisorAccount
 from schemas.project import StudentRead,SupervisorWithStudentsRead
 from models.database import get_session
+from services.read_models import (
+    project_listing_statement, fetch_project_listing, serialize_listing, project_counts, latest_projects
+)
 from services.enums import Status, Tags
+from core.responses import FastJSONResponse, dump_model_list
+from services.cache import cache_key, cached_response, invalidate
+from services.auth import invalidate_account
+from services.storage import release_document
+from services.student_import import import_students
+from services.assignment import apply_plan, plan_assignments, plan_from_preview
+from schemas.assignment import AssignmentApplyRequest, AssignmentPlanRead, AssignmentRequest
+from core.coalescing import coalescing_stats
+from core.profiling import list_profiles, load_profile
+from core import memory
+from schemas.memory import WorkerMemoryCommand
+from tasks.memory import memory_diagnostics
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+from config import config
+from core.conditional import apply_validators, listing_validators, not_modified
 from core.dependencies import (
-    get_current_user, get_current_student, get_current_supervisor,
+    get_current_user, get_current_student, get_current_supervisor, get_current_admin,
     require_supervisor_or_admin, require_student_or_supervisor, AccountType
 )
 from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
 
 
 admin=APIRouter(prefix="/admin", tags=["Admin"])
 
-@admin.get("/dashboard/stats")
+@admin.get("/dashboard/stats", response_class=FastJSONResponse)
 async def get_dashboard_stats(
-    current_user: AccountType = Depends(require_supervisor_or_admin),
+    current_user: AccountType = Depends(require_supervisor_or_admin()),
     session: Session = Depends(get_session)
 ):
    
     
-    # Count total projects
-    total_projects = session.exec(select(func.count(Project.id))).first()
+    def build(session: Session) -> bytes:
+        # Count total projects
+        total_projects = session.exec(select(func.count(Project.id))).first()
     
-    # Count projects by status
-    pending_projects = session.exec(
-        select(func.count(Project.id)).where(Project.status == Status.PENDING)
-    ).first()
+        # Count projects by status
+        pending_projects = session.exec(
+            select(func.count(Project.id)).where(Project.status == Status.PENDING)
+        ).first()
     
-    approved_projects = session.exec(
-        select(func.count(Project.id)).where(Project.status == Status.APPROVED)
-    ).first()
+        approved_projects = session.exec(
+            select(func.count(Project.id)).where(Project.status == Status.APPROVED)
+        ).first()
     
-    rejected_projects = session.exec(
-        select(func.count(Project.id)).where(Project.status == Status.REJECTED)
-    ).first()
+        rejected_projects = session.exec(
+            select(func.count(Project.id)).where(Project.status == Status.REJECTED)
+        ).first()
 
-    total_students = session.exec(select(func.count(StudentAccount.id))).first()
-    total_supervisors = session.exec(select(func.count(SupervisorAccount.id))).first()
-    
-    return {
-        "total_projects": total_projects or 0,
-        "pending_projects": pending_projects or 0,
-        "approved_projects": approved_projects or 0,
-        "rejected_projects": rejected_projects or 0,
-        "total_students": total_students or 0,
-        "total_supervisors": total_supervisors or 0
-    }
-
-@admin.get("/students",response_model=List[StudentRead])
+        total_students = session.exec(select(func.count(StudentAccount.id))).first()
+        total_supervisors = session.exec(select(func.count(SupervisorAccount.id))).first()
+    
+        return FastJSONResponse({
+            "total_projects": total_projects or 0,
+            "pending_projects": pending_projects or 0,
+            "approved_projects": approved_projects or 0,
+            "rejected_projects": rejected_projects or 0,
+            "total_students": total_students or 0,
+            "total_supervisors": total_supervisors or 0
+        }).body
+
+    key = cache_key("admin.dashboard", "staff")
+    return cached_response(session, key, ["projects", "students", "supervisors"], build)
+
+@admin.get("/students",response_model=List[StudentRead], response_class=FastJSONResponse)
 async def get_all_students(
-    current_user: AccountType = Depends(require_supervisor_or_admin),
+    current_user: AccountType = Depends(require_supervisor_or_admin()),
     session: Session = Depends(get_session),
     department: Optional[str] = Query(None, description="Filter by department"),
     year: Optional[str] = Query(None, description="Filter by year"),
@@ -68,7 +90,7 @@ async def get_all_students(
     
     
 
-    statement = select(StudentAccount)
+    statement = select(StudentAccount).options(selectinload(StudentAccount.supervisor))
     
 
     if department:
@@ -89,52 +111,45 @@ async def get_all_students(
     offset = (page - 1) * per_page
     statement = statement.offset(offset).limit(per_page)
     
-    students = session.exec(statement).all()
+    def build(session: Session) -> bytes:
+        students = session.exec(statement).all()
+        student_ids = [student.id for student in students]
+        counts = project_counts(session, Project.student_id, student_ids)
+        latest = latest_projects(session, student_ids)
 
-    result = []
-    for student in students:
-        project_count = session.exec(
-            select(func.count(Project.id)).where(Project.student_id == student.id)
-        ).first()
-  
-        latest_project = session.exec(
-            select(Project)
-            .where(Project.student_id == student.id)
-            .order_by(Project.created_at.desc())
-            .limit(1)
-        ).first()
-        supervis= session.get(SupervisorAccount,student.supervisor_id)
-        
-        student_data = {
-            "id": student.id,
-            "name": student.name,
-            "email": student.email,
-            "matric_no": student.matric_no,
-            "level": getattr(student, 'level', ''),  
-            "department": student.department,
-            "role": student.role,
-            "supervisor_id": student.supervisor_id,
-            "supervisor":supervis,
-            "created_at": student.created_at.isoformat(),
-            "updated_at": getattr(student, 'updated_at', student.created_at).isoformat(),
-            "project_count": project_count or 0
-        }
-        
-        if latest_project:
-            student_data["latest_project"] = {
-                "id": latest_project.id,
-                "title": latest_project.title,
-                "status": latest_project.status.value,
-                "created_at": latest_project.created_at.isoformat()
+        result = []
+        for student in students:
+            student_data = {
+                "id": student.id,
+                "name": student.name,
+                "email": student.email,
+                "matric_no": student.matric_no,
+                "level": getattr(student, 'level', ''),  
+                "department": student.department,
+                "role": student.role,
+                "supervisor_id": student.supervisor_id,
+                "supervisor": student.supervisor,
+                "created_at": student.created_at.isoformat(),
+                "updated_at": getattr(student, 'updated_at', student.created_at).isoformat(),
+                "project_count": counts.get(student.id, 0)
             }
         
-        result.append(student_data)
+            if student.id in latest:
+                student_data["latest_project"] = latest[student.id].to_dict()
+        
+            result.append(student_data)
     
-    return result
+        return dump_model_list(StudentRead, result)
+
+    key = cache_key("admin.students", "staff", department=department, year=year, supervisor_id=supervisor_id,
+                    search=search, page=page, per_page=per_page)
+    tags = [f"supervisor:{supervisor_id}"] if supervisor_id else ["students"]
+    return cached_response(session, key, tags + ["projects"], build)
 
-@admin.get("/projects")
+@admin.get("/projects", response_class=FastJSONResponse)
 async def get_all_projects(
-    current_user: AccountType = Depends(require_supervisor_or_admin),
+    request: Request,
+    current_user: AccountType = Depends(require_supervisor_or_admin()),
     session: Session = Depends(get_session),
     status: Optional[Status] = Query(None, description="Filter by project status"),
     year: Optional[str] = Query(None, description="Filter by year"),
@@ -148,7 +163,7 @@ async def get_all_projects(
     
     
     # Build base query
-    statement = select(Project)
+    statement = project_listing_statement(include_supervisor=True)
    
     if status:
         statement = statement.where(Project.status == status)
@@ -181,66 +196,28 @@ async def get_all_projects(
 
     statement = statement.order_by(Project.created_at.desc())
     
-    projects = session.exec(statement).all()
-    
-   
-    result = []
-    for project in projects:
+    validators = listing_validators(session, request, statement, current_user.role.value, current_user.id)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
 
-        student = await session.exec(
-            select(StudentAccount).where(StudentAccount.id == project.student_id)
-        ).first()
-        
-        
-        supervisor = None
-        if project.supervisor_id:
-            supervisor = await session.exec(
-                select(SupervisorAccount).where(SupervisorAccount.id == project.supervisor_id)
-            ).first()
-        
-        project_data = {
-            "id": project.id,
-            "title": project.title,
-            "year": project.year,
-            "description": project.description,
-            "file_url": project.file_url,
-            "document_url": project.document_url,
-            "status": project.status,
-            "created_at": project.created_at,
-            "updated_at": project.updated_at,
-            "student_id": project.student_id,
-            "supervisor_id": project.supervisor_id,
-            "tags": project.tags,
-        }
-        
-        if student:
-            project_data["student"] = {
-                "id": student.id,
-                "name": student.name,
-                "email": student.email,
-                "matric_no": student.matric_no,
-                "department": student.department,
-                "role": student.role
-            }
-        
-        if supervisor:
-            project_data["supervisor"] = {
-                "id": supervisor.id,
-                "name": supervisor.name,
-                "email": supervisor.email,
-                "department": supervisor.department,
-                "role": supervisor.role,
-                "faculty": supervisor.faculty,
-                "title": supervisor.title
-            }
-        
-        result.append(project_data)
-    
-    return result
+    def build(session: Session) -> bytes:
+        return FastJSONResponse(serialize_listing(fetch_project_listing(session, statement))).body
+
+    key = cache_key("admin.projects", "staff", status=status, year=year, supervisor_id=supervisor_id,
+                    student_id=student_id, search=search, tags=tags, page=page, per_page=per_page)
+    if student_id:
+        cache_tags = [f"student:{student_id}"]
+    elif supervisor_id:
+        cache_tags = [f"supervisor:{supervisor_id}"]
+    else:
+        cache_tags = ["projects"]
+    response = cached_response(session, key, cache_tags, build)
+    return apply_validators(response, validators)
 
-@admin.get("/supervisors",response_model=List[SupervisorWithStudentsRead])
+@admin.get("/supervisors",response_model=List[SupervisorWithStudentsRead], response_class=FastJSONResponse)
 async def get_all_supervisors(
-    current_user: AccountType = Depends(require_supervisor_or_admin),
+    current_user: AccountType = Depends(require_supervisor_or_admin()),
     session: Session = Depends(get_session),
     department: Optional[str] = Query(None, description="Filter by department"),
     faculty: Optional[str] = Query(None, description="Filter by faculty"),
@@ -251,7 +228,7 @@ async def get_all_supervisors(
 
     
 
-    statement = select(SupervisorAccount)
+    statement = select(SupervisorAccount).options(selectinload(SupervisorAccount.students))
     
 
     if department:
@@ -271,42 +248,154 @@ async def get_all_supervisors(
     offset = (page - 1) * per_page
     statement = statement.offset(offset).limit(per_page)
     
-    supervisors = session.exec(statement).all()
-    result = []
-    for supervisor in supervisors:  
-        project_count = session.exec(
-            select(func.count(Project.id)).where(Project.supervisor_id == supervisor.id)
-        ).first()
-          
-       
-        stat = select(StudentAccount).where(StudentAccount.supervisor_id == supervisor.id)
-        students = session.exec(stat).all()
-        supervisor_data = {
-            "id": supervisor.id,
-            "name": supervisor.name,
-            "email": supervisor.email,
-            "department": supervisor.department,
-            "role": supervisor.role,
-            "faculty": supervisor.faculty,
-            "office_address": supervisor.office_address,
-            "phone_number": supervisor.phone_number,
-            "title": supervisor.title,
-            "office_hours": supervisor.office_hours,
-            "bio": supervisor.bio,
-            "created_at": supervisor.created_at.isoformat(),
-            "students": students, 
-            "student_count": len(students),  
-            "project_count": project_count or 0
-        }
+    def build(session: Session) -> bytes:
+        supervisors = session.exec(statement).all()
+        counts = project_counts(session, Project.supervisor_id, [supervisor.id for supervisor in supervisors])
+        result = []
+        for supervisor in supervisors:  
+            students = supervisor.students
+            supervisor_data = {
+                "id": supervisor.id,
+                "name": supervisor.name,
+                "email": supervisor.email,
+                "department": supervisor.department,
+                "role": supervisor.role,
+                "faculty": supervisor.faculty,
+                "office_address": supervisor.office_address,
+                "phone_number": supervisor.phone_number,
+                "title": supervisor.title,
+                "office_hours": supervisor.office_hours,
+                "bio": supervisor.bio,
+                "created_at": supervisor.created_at.isoformat(),
+                "students": students, 
+                "student_count": len(students),  
+                "project_count": counts.get(supervisor.id, 0)
+            }
         
-        result.append(supervisor_data)
+            result.append(supervisor_data)
     
-    return result
+        return dump_model_list(SupervisorWithStudentsRead, result)
+
+    key = cache_key("admin.supervisors", "staff", department=department, faculty=faculty, search=search,
+                    page=page, per_page=per_page)
+    return cached_response(session, key, ["supervisors", "students", "projects"], build)
+
+@admin.get("/metrics/coalescing")
+def get_coalescing_stats(current_user: AccountType = Depends(require_supervisor_or_admin())):
+    return coalescing_stats()
+
+@admin.get("/profiles")
+def get_profiles(current_user: AccountType = Depends(get_current_admin)):
+    return list_profiles()
+
+@admin.get("/profiles/{profile_id}")
+def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$", description="json, or collapsed stacks for flame graph tools"),
+    current_user: AccountType = Depends(get_current_admin)
+):
+    profile = load_profile(profile_id)
+    if format == "collapsed":
+        return Response(profile["collapsed"], media_type="text/plain; charset=utf-8")
+    return profile
+
+@admin.get("/memory")
+def get_memory_report(current_user: AccountType = Depends(get_current_admin)):
+    return memory.memory_report()
+
+@admin.post("/memory/tracing/start")
+def start_memory_tracing(
+    frames: Optional[int] = Query(None, ge=1, le=100, description="Frames kept per allocation"),
+    current_user: AccountType = Depends(get_current_admin)
+):
+    return memory.start_tracing(frames)
+
+@admin.post("/memory/tracing/stop")
+def stop_memory_tracing(current_user: AccountType = Depends(get_current_admin)):
+    return memory.stop_tracing()
+
+@admin.post("/memory/snapshots")
+def take_memory_snapshot(
+    label: str = Query("", max_length=100),
+    current_user: AccountType = Depends(get_current_admin)
+):
+    return memory.take_snapshot(label)
+
+@admin.get("/memory/snapshots")
+def get_memory_snapshots(current_user: AccountType = Depends(get_current_admin)):
+    return memory.list_snapshots()
+
+@admin.get("/memory/snapshots/diff")
+def diff_memory_snapshots(
+    before: str = Query(..., description="Id of the earlier snapshot"),
+    after: str = Query(..., description="Id of the later snapshot"),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(25, ge=1, le=500),
+    current_user: AccountType = Depends(get_current_admin)
+):
+    return memory.diff_snapshots(before, after, group_by, limit)
+
+@admin.post("/memory/worker")
+def run_worker_memory_command(command: WorkerMemoryCommand, current_user: AccountType = Depends(get_current_admin)):
+    result = memory_diagnostics.apply_async(args=[command.action, command.params()], queue=command.queue)
+    try:
+        return result.get(timeout=config.MEMORY_WORKER_TIMEOUT)
+    except CeleryTimeoutError:
+        raise HTTPException(status_code=504, detail=f"No worker on {command.queue} answered; task {result.id}")
+
 @admin.delete("/students/{student_id}")
-def deleteStudent(student_id:int,current_user: AccountType = Depends(require_supervisor_or_admin),session: Session = Depends(get_session)):
+def deleteStudent(student_id:int,current_user: AccountType = Depends(require_supervisor_or_admin()),session: Session = Depends(get_session)):
     student= session.get(StudentAccount,student_id)
     if not student:
         raise HTTPException(status_code=404,detail="Student Not Found")
+    supervisor_id = student.supervisor_id
+    email = student.email
+    projects = session.exec(select(Project).where(Project.student_id == student_id)).all()
+    document_urls = [project.document_url for project in projects]
+    for project in projects:
+        session.delete(project)
     session.delete(student)
     session.commit()
-    return Response(status_code=204,content="Student Deleted Succcesfully")
\ No newline at end of file
+    for document_url in document_urls:
+        release_document(session, document_url)
+    invalidate_account(email)
+    invalidate("students", f"student:{student_id}", f"supervisor:{supervisor_id}", "projects")
+    return Response(status_code=204,content="Student Deleted Succcesfully")
+
+
+@admin.post("/students/import")
+def import_students_csv(
+    file: UploadFile = File(...),
+    dry_run: bool = Query(False, description="Validate and check uniqueness without creating accounts"),
+    current_user: AccountType = Depends(get_current_admin),
+    session: Session = Depends(get_session)
+):
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = import_students(session, stream, dry_run=dry_run)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    finally:
+        stream.detach()
+    if report["created"] and not dry_run:
+        invalidate("students")
+    return report
+
+
+@admin.post("/assignments/preview", response_model=AssignmentPlanRead)
+def preview_supervisor_assignments(
+    request: AssignmentRequest,
+    current_user: AccountType = Depends(get_current_admin),
+    session: Session = Depends(get_session)
+):
+    return plan_assignments(session, request.department, request.supervisor_ids, request.capacity)
+
+
+@admin.post("/assignments/apply", response_model=AssignmentPlanRead)
+def apply_supervisor_assignments(
+    request: AssignmentApplyRequest,
+    current_user: AccountType = Depends(get_current_admin),
+    session: Session = Depends(get_session)
+):
+    plan = plan_from_preview(session, request.assignments, request.capacity)
+    return apply_plan(session, plan)
@@ -21,6 +21,7 @@ from services.auth import (
 )
 from services.enums import Role
 from core.dependencies import get_current_user, AccountType
+from services.cache import invalidate
 
 auth_router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -56,6 +57,7 @@ def register_student(
     session.add(new_student)
     session.commit()
     session.refresh(new_student)
+    invalidate("students")
 
     return new_student
 
@@ -87,6 +89,7 @@ def register_supervisor(
     session.add(new_supervisor)
     session.commit()
     session.refresh(new_supervisor)
+    invalidate("supervisors")
 
     return new_supervisor
 
@@ -0,0 +1,63 @@
+import mimetypes
+import os
+import re
+import unicodedata
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from core.conditional import Validators, apply_validators, not_modified
+from services.storage import LocalStorage, get_storage
+
+documents_router = APIRouter(prefix="/documents", tags=["Documents"])
+
+_unsafe_ascii = re.compile(r"[^A-Za-z0-9._ -]+")
+_control = re.compile(r"[\x00-\x1f\x7f\"\\/]+")
+
+
+def content_disposition(filename: str) -> str:
+    """``inline`` with an ASCII ``filename`` fallback and the full name as RFC 5987 ``filename*``."""
+    filename = _control.sub("_", filename).strip() or "document"
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode()
+    fallback = _unsafe_ascii.sub("_", fallback).strip() or "document"
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+@documents_router.get("/{key}")
+def get_document(
+    key: str,
+    request: Request,
+    filename: Optional[str] = Query(None, description="Name to save the document under, e.g. the project title"),
+):
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    url = storage.url_for_key(key)
+    meta = storage.metadata(key) if storage.key_for_url(url) else None
+    if meta is None or not storage.exists(url):
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # Keys are content hashes, so a stored document never changes.
+    validators = Validators(f'"{key}"', None)
+    cached = not_modified(request, validators)
+    if cached:
+        cached.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return cached
+
+    # Objects are shared by everyone who uploaded the same bytes, so the stored
+    # filename is only the first uploader's. The caller names the document.
+    extension = os.path.splitext(meta["filename"])[1] or mimetypes.guess_extension(meta["content_type"]) or ""
+    name = os.path.splitext(filename)[0] if filename else "document"
+    response = StreamingResponse(
+        storage.stream(url),
+        media_type=meta["content_type"],
+        headers={
+            "Content-Length": str(meta["size"]),
+            "Content-Disposition": content_disposition(f"{name}{extension}"),
+        },
+    )
+    apply_validators(response, validators)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
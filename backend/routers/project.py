@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Security, Query
+from fastapi import APIRouter, Depends, HTTPException, Security, Query, Request, Response
 from fastapi.security import HTTPBearer
 from sqlmodel import Session, select
+from datetime import datetime, timezone
 from typing import Optional, List
 from cloudinary.uploader import upload as cloudinary_upload
 from models.projects import Project
-from services.cloudinary import upload_file_to_cloudinary
+from services.storage import release_document, store_upload
+from services.review import review_projects
+from services.deferred_upload import spool_upload, schedule_document_upload
+from tasks.project_expiry import schedule_project_expiry
+from config import config
 from models.account import StudentAccount
-from schemas.project import ProjectCreate, ProjectRead, ProjectUpdate, ProjectCreateForm, ProjectUpdateForm, ProjectReviewRequest
+from schemas.project import ProjectCreate, ProjectRead, ProjectUpdate, ProjectCreateForm, ProjectUpdateForm, ProjectReviewRequest, UploadStatusRead, BatchReviewRequest, ProjectReviewResult
 from models.database import get_session
-from services.enums import Status, Tags
+from services.enums import Status, Tags, UploadState
+from core.responses import FastJSONResponse, dump_model_list, model_list_response
+from services.cache import cache_key, cached_response, invalidate, project_tags
+from core.coalescing import single_flight
+from core.conditional import apply_validators, listing_validators, not_modified, project_validators
 from core.dependencies import (
     get_current_user, get_current_student, get_current_supervisor,
     require_supervisor_or_admin, require_student_or_supervisor, AccountType
@@ -19,8 +28,9 @@ routers = APIRouter(prefix="/projects", tags=["Projects"])
 security = HTTPBearer()
 
 
-@routers.get("/", response_model=List[ProjectRead])
+@routers.get("/", response_model=List[ProjectRead], response_class=FastJSONResponse)
 async def list_my_projects(
+    request: Request,
     session: Session = Depends(get_session),
     current_user: AccountType = Depends(get_current_user),
     year: Optional[str] = None,
@@ -50,8 +60,13 @@ async def list_my_projects(
             if ors:
                 statement = statement.where(or_(*ors))
 
+    validators = listing_validators(session, request, statement, current_user.role.value, current_user.id)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+
     projects = session.exec(statement).all()
-    return projects
+    return apply_validators(model_list_response(ProjectRead, projects), validators)
 
 
 @routers.post("/", response_model=ProjectRead)
@@ -70,8 +85,12 @@ async def create_project(
     if not project_form.supervisor_id:
         raise HTTPException(status_code=400, detail="You must be assigned a supervisor before creating a project.")
     document_url = None
+    spool_path = None
     if project_form.document and project_form.document is not None:
-        document_url = await upload_file_to_cloudinary(project_form.document)
+        if config.DEFERRED_UPLOADS:
+            spool_path = await spool_upload(project_form.document)
+        else:
+            document_url = await store_upload(project_form.document)
     
     new_project = Project(
         title=project_form.title,
@@ -82,7 +101,8 @@ async def create_project(
         student_id=current_user.id,
         tags=project_form.tags,
         supervisor_id=project_form.supervisor_id,
-        document_url=document_url
+        document_url=document_url,
+        upload_state=UploadState.PENDING if spool_path else None
     )
 
     student = session.get(StudentAccount, new_project.student_id)
@@ -92,11 +112,18 @@ async def create_project(
     session.add(new_project)
     session.commit()
     session.refresh(new_project)
+    if spool_path:
+        schedule_document_upload(session, new_project, spool_path, project_form.document.filename)
+    elif document_url:
+        schedule_project_expiry(new_project)
+    invalidate(*project_tags(new_project))
     return new_project
 
 
-@routers.get("/all", response_model=List[ProjectRead])
-async def get_all_project(
+@routers.get("/all", response_model=List[ProjectRead], response_class=FastJSONResponse)
+@single_flight("projects.all", params=("year", "tags", "match_all", "status"))
+def get_all_project(
+    request: Request,
     session: Session = Depends(get_session),
     current_user: AccountType = Depends(get_current_user),
     year: Optional[str] = None,
@@ -123,27 +150,42 @@ async def get_all_project(
             if ors:
                 statement = statement.where(or_(*ors))
 
-    projects = session.exec(statement).all()
-    return projects
+    validators = listing_validators(session, request, statement)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+
+    def build(session: Session) -> bytes:
+        return dump_model_list(ProjectRead, session.exec(statement).all())
 
+    key = cache_key("projects.all", "all", year=year, tags=tags, match_all=match_all, status=status)
+    return apply_validators(cached_response(session, key, ["projects"], build), validators)
 
-@routers.get("/supervised-projects", response_model=List[ProjectRead])
+
+@routers.get("/supervised-projects", response_model=List[ProjectRead], response_class=FastJSONResponse)
 async def get_supervised_projects(
+    request: Request,
     session: Session = Depends(get_session),
     current_user: AccountType = Depends(get_current_supervisor)
 ):
     if current_user.role.value != "Supervisor":
         raise HTTPException(status_code=403, detail="Access denied")
 
-    projects = await session.exec(
-        select(Project).where(Project.supervisor_id == current_user.id)
-    ).all()
-    return projects
+    statement = select(Project).where(Project.supervisor_id == current_user.id)
+    validators = listing_validators(session, request, statement, current_user.role.value, current_user.id)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+
+    projects = session.exec(statement).all()
+    return apply_validators(model_list_response(ProjectRead, projects), validators)
 
 
 @routers.get("/{project_id}", response_model=ProjectRead)
 def get_project(
     project_id: int,
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     current_user: AccountType = Depends(get_current_user)
 ):
@@ -151,9 +193,32 @@ def get_project(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    validators = project_validators(project)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
+
+    apply_validators(response, validators)
     return project
 
 
+@routers.get("/{project_id}/upload-status", response_model=UploadStatusRead)
+def get_upload_status(
+    project_id: int,
+    session: Session = Depends(get_session),
+    current_user: AccountType = Depends(get_current_user)
+):
+    project = session.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return UploadStatusRead(
+        project_id=project.id,
+        upload_state=project.upload_state,
+        document_url=project.document_url
+    )
+
+
 @routers.patch("/{student_id}/assign-supervisor")
 def assign_supervisor_to_project(
     student_id: int,
@@ -175,10 +240,13 @@ def assign_supervisor_to_project(
         raise HTTPException(
             status_code=403, detail="Supervisors can only assign themselves to students")
 
+    previous_supervisor_id = student.supervisor_id
     student.supervisor_id = supervisor_id
     session.add(student)
     session.commit()
     session.refresh(student)
+    invalidate("students", f"student:{student_id}", f"supervisor:{supervisor_id}",
+               f"supervisor:{previous_supervisor_id}")
     return student
 
 
@@ -200,9 +268,18 @@ async def update_project(
         raise HTTPException(
             status_code=403, detail="Supervisors can only update projects they supervise")
 
+    spool_path = None
+    replaced_document_url = None
     if project_form.document:
-        document_url = await upload_file_to_cloudinary(project_form.document)
-        project.document_url = document_url
+        if config.DEFERRED_UPLOADS:
+            spool_path = await spool_upload(project_form.document)
+            project.upload_state = UploadState.PENDING
+        else:
+            document_url = await store_upload(project_form.document)
+            # Resubmitting identical content still took a new reference, so
+            # the old one is released either way.
+            replaced_document_url = project.document_url
+            project.document_url = document_url
 
     if project_form.tags is not None:
         project.tags = project_form.tags
@@ -216,9 +293,16 @@ async def update_project(
     if project_form.file_url is not None:
         project.file_url = project_form.file_url
 
+    project.updated_at = datetime.now(timezone.utc)
     session.add(project)
     session.commit()
     session.refresh(project)
+    if spool_path:
+        schedule_document_upload(session, project, spool_path, project_form.document.filename)
+    elif project_form.document:
+        schedule_project_expiry(project)
+    release_document(session, replaced_document_url)
+    invalidate(*project_tags(project))
     return project
 
 
@@ -236,11 +320,24 @@ def delete_project(
         raise HTTPException(
             status_code=403, detail="Supervisors can only delete projects they supervise")
 
+    tags = project_tags(project)
+    document_url = project.document_url
     session.delete(project)
     session.commit()
+    release_document(session, document_url)
+    invalidate(*tags)
     return {"message": "Project deleted successfully"}
 
 
+@routers.post("/review", response_model=List[ProjectReviewResult])
+def review_projects_batch(
+    batch: BatchReviewRequest,
+    session: Session = Depends(get_session),
+    current_user: AccountType = Depends(require_supervisor_or_admin())
+):
+    return review_projects(session, batch.reviews, current_user)
+
+
 @routers.put("/{project_id}/review", response_model=ProjectRead)
 def review_project(
     project_id: int,
@@ -261,7 +358,9 @@ def review_project(
 
     project.status = review_data.status
     project.review_comment = review_data.review_comment
+    project.updated_at = datetime.now(timezone.utc)
     session.add(project)
     session.commit()
     session.refresh(project)
+    invalidate(*project_tags(project))
     return project
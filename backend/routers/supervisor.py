@@ -1,11 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request
 from sqlmodel import Session, select, func
 from typing import Optional, List
+from datetime import datetime, timezone
 from pydantic import BaseModel
 from models.projects import Project
 from models.account import StudentAccount, SupervisorAccount
 from models.database import get_session
+from services.read_models import (
+    project_listing_statement, fetch_project_listing, serialize_listing, project_counts, latest_projects
+)
 from services.enums import Status, Tags
+from core.responses import FastJSONResponse
+from services.cache import cache_key, cached_response, invalidate, project_tags
+from core.conditional import apply_validators, listing_validators, not_modified
 from core.dependencies import (
     get_current_user, get_current_supervisor,
     require_supervisor_or_admin, AccountType
@@ -18,8 +25,9 @@ class UpdateProjectStatusRequest(BaseModel):
 
 supervisor_router = APIRouter(prefix="/supervisor", tags=["Supervisor"])
 
-@supervisor_router.get("/projects")
+@supervisor_router.get("/projects", response_class=FastJSONResponse)
 async def get_supervised_projects(
+    request: Request,
     current_user: AccountType = Depends(get_current_supervisor),
     session: Session = Depends(get_session),
     status: Optional[Status] = Query(None, description="Filter by project status"),
@@ -29,7 +37,7 @@ async def get_supervised_projects(
     per_page: Optional[int] = Query(50, description="Items per page")
 ):
    
-    statement = select(Project).where(Project.supervisor_id == current_user.id)
+    statement = project_listing_statement().where(Project.supervisor_id == current_user.id)
     
     if status:
         statement = statement.where(Project.status == status)
@@ -48,46 +56,15 @@ async def get_supervised_projects(
     # Order by creation date (newest first)
     statement = statement.order_by(Project.created_at.desc())
     
-    projects = session.exec(statement).all()
-    
-    # Convert to response format
-    result = []
-    for project in projects:
-        # Get student info
-        student = session.exec(
-            select(StudentAccount).where(StudentAccount.id == project.student_id)
-        ).first()
-        
-        project_data = {
-            "id": project.id,
-            "title": project.title,
-            "year": project.year,
-            "description": project.description,
-            "file_url": project.file_url,
-            "document_url": project.document_url,
-            "status": project.status,
-            "created_at": project.created_at,
-            "updated_at": project.updated_at,
-            "student_id": project.student_id,
-            "supervisor_id": project.supervisor_id,
-            "tags": project.tags,
-        }
-        
-        if student:
-            project_data["student"] = {
-                "id": student.id,
-                "name": student.name,
-                "email": student.email,
-                "matric_no": student.matric_no,
-                "department": student.department,
-                "role": student.role
-            }
-        
-        result.append(project_data)
-    
-    return result
+    validators = listing_validators(session, request, statement, current_user.role.value, current_user.id)
+    cached = not_modified(request, validators)
+    if cached:
+        return cached
 
-@supervisor_router.get("/students")
+    response = FastJSONResponse(serialize_listing(fetch_project_listing(session, statement)))
+    return apply_validators(response, validators)
+
+@supervisor_router.get("/students", response_class=FastJSONResponse)
 async def get_supervised_students(
     current_user: AccountType = Depends(get_current_supervisor),
     session: Session = Depends(get_session),
@@ -116,22 +93,12 @@ async def get_supervised_students(
     statement = statement.offset(offset).limit(per_page)
     
     students = session.exec(statement).all()
-    
+    student_ids = [student.id for student in students]
+    counts = project_counts(session, Project.student_id, student_ids)
+    latest = latest_projects(session, student_ids)
 
     result = []
     for student in students:
-        project_count = session.exec(
-            select(func.count(Project.id)).where(Project.student_id == student.id)
-        ).first()
-        
-        # Get latest project
-        latest_project = session.exec(
-            select(Project)
-            .where(Project.student_id == student.id)
-            .order_by(Project.created_at.desc())
-            .limit(1)
-        ).first()
-        
         student_data = {
             "id": student.id,
             "name": student.name,
@@ -143,20 +110,15 @@ async def get_supervised_students(
             "supervisor_id": student.supervisor_id,
             "created_at": student.created_at.isoformat(),
             "updated_at": getattr(student, 'updated_at', student.created_at).isoformat(),
-            "project_count": project_count or 0
+            "project_count": counts.get(student.id, 0)
         }
         
-        if latest_project:
-            student_data["latest_project"] = {
-                "id": latest_project.id,
-                "title": latest_project.title,
-                "status": latest_project.status.value,
-                "created_at": latest_project.created_at.isoformat()
-            }
+        if student.id in latest:
+            student_data["latest_project"] = latest[student.id].to_dict()
         
         result.append(student_data)
     
-    return result
+    return FastJSONResponse(result)
 
 @supervisor_router.patch("/projects/{project_id}/status")
 async def update_project_status(
@@ -180,65 +142,71 @@ async def update_project_status(
     
     
     project.status = request.status
+    project.updated_at = datetime.now(timezone.utc)
   
     session.add(project)
     session.commit()
     session.refresh(project)
+    invalidate(*project_tags(project))
     
     return project
 
-@supervisor_router.get("/dashboard/stats")
+@supervisor_router.get("/dashboard/stats", response_class=FastJSONResponse)
 async def get_supervisor_dashboard_stats(
     current_user: AccountType = Depends(get_current_supervisor),
     session: Session = Depends(get_session)
 ):
     
     
-    total_students = session.exec(
-        select(func.count(StudentAccount.id)).where(StudentAccount.supervisor_id == current_user.id)
-    ).first()
+    def build(session: Session) -> bytes:
+        total_students = session.exec(
+            select(func.count(StudentAccount.id)).where(StudentAccount.supervisor_id == current_user.id)
+        ).first()
 
-    total_projects = session.exec(
-        select(func.count(Project.id)).where(Project.supervisor_id == current_user.id)
-    ).first()
+        total_projects = session.exec(
+            select(func.count(Project.id)).where(Project.supervisor_id == current_user.id)
+        ).first()
     
 
-    pending_projects = session.exec(
-        select(func.count(Project.id)).where(
-            Project.supervisor_id == current_user.id,
-            Project.status == Status.PENDING
-        )
-    ).first()
+        pending_projects = session.exec(
+            select(func.count(Project.id)).where(
+                Project.supervisor_id == current_user.id,
+                Project.status == Status.PENDING
+            )
+        ).first()
     
-    approved_projects = session.exec(
-        select(func.count(Project.id)).where(
-            Project.supervisor_id == current_user.id,
-            Project.status == Status.APPROVED
-        )
-    ).first()
+        approved_projects = session.exec(
+            select(func.count(Project.id)).where(
+                Project.supervisor_id == current_user.id,
+                Project.status == Status.APPROVED
+            )
+        ).first()
     
-    rejected_projects = session.exec(
-        select(func.count(Project.id)).where(
-            Project.supervisor_id == current_user.id,
-            Project.status == Status.REJECTED
-        )
-    ).first()
+        rejected_projects = session.exec(
+            select(func.count(Project.id)).where(
+                Project.supervisor_id == current_user.id,
+                Project.status == Status.REJECTED
+            )
+        ).first()
     
    
-    from datetime import datetime, timedelta
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_submissions = session.exec(
-        select(func.count(Project.id)).where(
-            Project.supervisor_id == current_user.id,
-            Project.created_at >= thirty_days_ago
-        )
-    ).first()
-    
-    return {
-        "total_students": total_students or 0,
-        "total_projects": total_projects or 0,
-        "pending_projects": pending_projects or 0,
-        "approved_projects": approved_projects or 0,
-        "rejected_projects": rejected_projects or 0,
-        "recent_submissions": recent_submissions or 0
-    }
\ No newline at end of file
+        from datetime import datetime, timedelta
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+        recent_submissions = session.exec(
+            select(func.count(Project.id)).where(
+                Project.supervisor_id == current_user.id,
+                Project.created_at >= thirty_days_ago
+            )
+        ).first()
+    
+        return FastJSONResponse({
+            "total_students": total_students or 0,
+            "total_projects": total_projects or 0,
+            "pending_projects": pending_projects or 0,
+            "approved_projects": approved_projects or 0,
+            "rejected_projects": rejected_projects or 0,
+            "recent_submissions": recent_submissions or 0
+        }).body
+
+    key = cache_key("supervisor.dashboard", f"supervisor:{current_user.id}")
+    return cached_response(session, key, [f"supervisor:{current_user.id}"], build)
\ No newline at end of file
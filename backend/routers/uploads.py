@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlmodel import Session
+from models.projects import Project
+from models.database import get_session
+from schemas.project import ProjectRead
+from schemas.upload import DirectUploadConfirm, DirectUploadTicket, ResumableUploadRead, UploadRequest
+from services.direct_upload import confirm_upload, read_upload_token, sign_upload
+from services.resumable_upload import (
+    append_chunks, create_session, current_offset, discard_session, finalize_session, load_session
+)
+from services.storage import CloudinaryStorage, attach_document, get_storage
+from core.dependencies import require_student_or_supervisor, AccountType
+
+uploads_router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+
+def _editable_project(session: Session, project_id: int, current_user: AccountType) -> Project:
+    project = session.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if current_user.role.value == "Student" and project.student_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Students can only update their own projects")
+    elif current_user.role.value == "Supervisor" and project.supervisor_id != current_user.id:
+        raise HTTPException(
+            status_code=403, detail="Supervisors can only update projects they supervise")
+    return project
+
+
+@uploads_router.post("/direct", response_model=DirectUploadTicket)
+def create_direct_upload(
+    upload: UploadRequest,
+    session: Session = Depends(get_session),
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    if not isinstance(get_storage(), CloudinaryStorage):
+        raise HTTPException(status_code=501, detail="Direct uploads need the Cloudinary storage backend")
+
+    project = _editable_project(session, upload.project_id, current_user)
+    return sign_upload(project.id, current_user, upload.filename, upload.content_type, upload.size)
+
+
+@uploads_router.post("/direct/confirm", response_model=ProjectRead)
+def confirm_direct_upload(
+    confirmation: DirectUploadConfirm,
+    session: Session = Depends(get_session),
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    if not isinstance(get_storage(), CloudinaryStorage):
+        raise HTTPException(status_code=501, detail="Direct uploads need the Cloudinary storage backend")
+
+    claims = read_upload_token(confirmation.upload_token)
+    project = _editable_project(session, claims["project_id"], current_user)
+    document_url = confirm_upload(
+        claims, current_user, confirmation.public_id, confirmation.version, confirmation.signature
+    )
+    return attach_document(session, project, document_url)
+
+
+@uploads_router.post("/resumable", response_model=ResumableUploadRead, status_code=201)
+def create_resumable_upload(
+    upload: UploadRequest,
+    response: Response,
+    session: Session = Depends(get_session),
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    project = _editable_project(session, upload.project_id, current_user)
+    meta = create_session(project.id, current_user, upload.filename, upload.content_type, upload.size)
+    response.headers["Location"] = f"/api/uploads/resumable/{meta['upload_id']}"
+    return ResumableUploadRead(offset=0, **meta)
+
+
+@uploads_router.head("/resumable/{upload_id}")
+def get_resumable_upload_offset(
+    upload_id: str,
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    meta = load_session(upload_id, current_user)
+    return Response(headers={
+        "Upload-Offset": str(current_offset(upload_id)),
+        "Upload-Length": str(meta["length"]),
+        "Cache-Control": "no-store",
+    })
+
+
+@uploads_router.patch("/resumable/{upload_id}", status_code=204)
+async def upload_resumable_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    meta = load_session(upload_id, current_user)
+    offset = await append_chunks(upload_id, meta, upload_offset, request.stream())
+    return Response(status_code=204, headers={
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(meta["length"]),
+    })
+
+
+@uploads_router.post("/resumable/{upload_id}/finalize", response_model=ProjectRead)
+async def finalize_resumable_upload(
+    upload_id: str,
+    session: Session = Depends(get_session),
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    meta = load_session(upload_id, current_user)
+    project = _editable_project(session, meta["project_id"], current_user)
+    document_url = await finalize_session(upload_id, meta)
+    return attach_document(session, project, document_url)
+
+
+@uploads_router.delete("/resumable/{upload_id}", status_code=204)
+def cancel_resumable_upload(
+    upload_id: str,
+    current_user: AccountType = Depends(require_student_or_supervisor())
+):
+    load_session(upload_id, current_user)
+    discard_session(upload_id)
+    return Response(status_code=204)
@@ -0,0 +1,34 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class AssignmentRequest(BaseModel):
+    department: Optional[str] = None
+    supervisor_ids: Optional[List[int]] = None
+    capacity: Optional[int] = Field(default=None, ge=1)
+
+
+class StudentAssignment(BaseModel):
+    student_id: int
+    supervisor_id: int
+    same_department: bool
+
+
+class SupervisorLoad(BaseModel):
+    supervisor_id: int
+    department: Optional[str] = None
+    before: int
+    after: int
+
+
+class AssignmentApplyRequest(BaseModel):
+    capacity: Optional[int] = Field(default=None, ge=1)
+    assignments: List[StudentAssignment]
+
+
+class AssignmentPlanRead(BaseModel):
+    applied: bool
+    capacity: int
+    assignments: List[StudentAssignment]
+    unassigned: List[int]
+    loads: List[SupervisorLoad]
@@ -0,0 +1,23 @@
+from typing import Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class WorkerMemoryCommand(BaseModel):
+    action: Literal["report", "status", "start", "stop", "snapshot", "snapshots", "diff"]
+    queue: Literal["uploads", "cleanup"] = "uploads"
+    frames: Optional[int] = Field(default=None, ge=1, le=100)
+    label: str = ""
+    before: Optional[str] = None
+    after: Optional[str] = None
+    group_by: Literal["lineno", "filename", "traceback"] = "lineno"
+    limit: int = Field(default=25, ge=1, le=500)
+
+    def params(self) -> dict:
+        """The keyword arguments ``action`` takes."""
+        if self.action == "start":
+            return {"frames": self.frames}
+        if self.action == "snapshot":
+            return {"label": self.label}
+        if self.action == "diff":
+            return {"before": self.before, "after": self.after, "group_by": self.group_by, "limit": self.limit}
+        return {}
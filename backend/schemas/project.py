@@ -1,7 +1,7 @@
 from typing import List, Optional
 from fastapi import Form, File, UploadFile
-from sqlmodel import SQLModel
-from services.enums import Status, Tags
+from sqlmodel import Field, SQLModel
+from services.enums import Status, Tags, UploadState
 import json
 from pydantic import EmailStr
 from datetime import datetime
@@ -63,6 +63,27 @@ class ProjectReviewRequest(SQLModel):
     review_comment: Optional[str] = None
 
 
+class ProjectReviewItem(ProjectReviewRequest):
+    project_id: int
+
+
+class BatchReviewRequest(SQLModel):
+    reviews: List[ProjectReviewItem] = Field(min_length=1, max_length=500)
+
+
+class ProjectReviewResult(SQLModel):
+    project_id: int
+    outcome: str
+    status: Optional[Status] = None
+    detail: Optional[str] = None
+
+
+class UploadStatusRead(SQLModel):
+    project_id: int
+    upload_state: Optional[UploadState] = None
+    document_url: Optional[str] = None
+
+
 
 
 class ProjectCreateForm:
@@ -138,6 +159,7 @@ class ProjectRead(SQLModel):
     year: str
     file_url: Optional[str] = None
     document_url: Optional[str] = None
+    upload_state: Optional[UploadState] = None
     status: Status
     review_comment: Optional[str] = None
     student_id: int
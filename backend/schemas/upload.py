@@ -0,0 +1,32 @@
+from typing import Dict, Union
+from pydantic import BaseModel
+
+
+class UploadRequest(BaseModel):
+    project_id: int
+    filename: str
+    content_type: str
+    size: int
+
+
+class DirectUploadTicket(BaseModel):
+    upload_url: str
+    fields: Dict[str, str]
+    upload_token: str
+    expires_at: int
+
+
+class DirectUploadConfirm(BaseModel):
+    upload_token: str
+    public_id: str
+    version: Union[int, str]
+    signature: str
+
+
+class ResumableUploadRead(BaseModel):
+    upload_id: str
+    project_id: int
+    filename: str
+    length: int
+    offset: int
+    expires_at: int
@@ -1,59 +1,393 @@
-from sqlmodel import Session
-
-from services.enums import Role
-from models.account import  StudentAccount, SupervisorAccount
-from models.database import engine
-
-def seed_sample_data():
-    with Session(engine) as session:
-        print("Seeding sample data...")
-      
-        student1 = StudentAccount(
-            name="Soliu Kabiru",
-            role=Role.STUDENT,
-            email="kabiru@school.edu",
-            hashed_password="hashedpassword1",
-            matric_no="STU001",
-            department="Computer Science"
+"""Seed the configured database with synthetic supervisors, students and projects.
+
+    python seed_data.py --supervisors 2000 --students 200000 --projects 1000000
+
+The same ``--seed`` and counts always produce the same rows, apart from
+the password hash's salt. Supervisors and students are spread over
+departments by weight, and most students from 300 level up are supervised
+within their own department. Projects belong to supervised students and
+fall in the years since the student reached 300 level, favouring recent
+ones; older projects are mostly reviewed while current-year ones are mostly
+pending. Tags follow the department's interests. Description lengths are
+log-normal, around 150 words.
+
+Every account, including one ``admin@seed.edu``, gets the password
+``--password``. It is hashed once for all of them. Rows go in with explicit
+ids after the current maximum, so seeding into a database that already has
+data only adds to it. SQLite is loaded with ``executemany`` and PostgreSQL
+with ``COPY``, ``--batch-size`` rows at a time. No documents are uploaded,
+so seeded projects have no ``document_url``.
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from models.account import AdminAccount, StudentAccount, SupervisorAccount
+from models.database import create_db_and_tables, engine
+from models.projects import Project
+from services.auth import get_password_hash
+from services.enums import Role, Status, Tags
+
+CURRENT_YEAR = 2025
+LEVELS = {"100": 22, "200": 21, "300": 20, "400": 24, "500": 13}
+# Students are supervised, and write projects, from this level on.
+SUPERVISED_LEVEL = 300
+# Only years some current student has spent at SUPERVISED_LEVEL or above.
+FIRST_PROJECT_YEAR = CURRENT_YEAR - (int(max(LEVELS, key=int)) - SUPERVISED_LEVEL) // 100
+YEARS = {str(year): weight for year, weight in zip(range(FIRST_PROJECT_YEAR, CURRENT_YEAR + 1), (10, 13, 16))}
+
+# Department: (faculty, code, weight, tags the department's projects lean towards)
+DEPARTMENTS = {
+    "Computer Science": ("Science", "CSC", 24, (Tags.AI, Tags.WEB_DEV, Tags.MACHINE_LEARNING, Tags.DATABASES,
+                                                 Tags.CYBER_SECURITY, Tags.MOBILE_DEV, Tags.CLOUD_COMPUTING)),
+    "Information Technology": ("Science", "IFT", 10, (Tags.WEB_DEV, Tags.NETWORKING, Tags.CLOUD_COMPUTING,
+                                                       Tags.DEVOPS, Tags.UI_UX, Tags.SOFTWARE_TESTING)),
+    "Software Engineering": ("Science", "SEN", 9, (Tags.SOFTWARE_TESTING, Tags.DEVOPS, Tags.WEB_DEV,
+                                                   Tags.MOBILE_DEV, Tags.UI_UX)),
+    "Mathematics": ("Science", "MTH", 6, (Tags.DATA_SCIENCE, Tags.MACHINE_LEARNING, Tags.BIG_DATA, Tags.AI)),
+    "Statistics": ("Science", "STA", 5, (Tags.DATA_SCIENCE, Tags.BIG_DATA, Tags.MACHINE_LEARNING)),
+    "Physics": ("Science", "PHY", 4, (Tags.EMBEDDED_SYSTEMS, Tags.IOT, Tags.ROBOTICS, Tags.DATA_SCIENCE)),
+    "Computer Engineering": ("Engineering", "CPE", 14, (Tags.EMBEDDED_SYSTEMS, Tags.IOT, Tags.ROBOTICS,
+                                                        Tags.NETWORKING, Tags.AI)),
+    "Electrical Engineering": ("Engineering", "EEE", 12, (Tags.EMBEDDED_SYSTEMS, Tags.IOT, Tags.ROBOTICS,
+                                                          Tags.NETWORKING)),
+    "Mechanical Engineering": ("Engineering", "MEE", 7, (Tags.ROBOTICS, Tags.EMBEDDED_SYSTEMS, Tags.AR_VR,
+                                                         Tags.ANIMATION)),
+    "Mass Communication": ("Arts", "MAC", 5, (Tags.ANIMATION, Tags.UI_UX, Tags.WEB_DEV, Tags.GAME_DEV)),
+    "Accounting": ("Management Sciences", "ACC", 4, (Tags.DATABASES, Tags.BLOCKCHAIN, Tags.DATA_SCIENCE,
+                                                     Tags.OTHERS)),
+}
+# Project statuses by weight, for past years and for the current one.
+PAST_STATUSES = {Status.APPROVED: 78, Status.REJECTED: 15, Status.UNDER_REVIEW: 3, Status.PENDING: 4}
+CURRENT_STATUSES = {Status.PENDING: 45, Status.UNDER_REVIEW: 20, Status.APPROVED: 25, Status.REJECTED: 10}
+TAG_COUNTS = {1: 30, 2: 40, 3: 20, 4: 10}
+UNSUPERVISED_SHARE = 0.08
+OUT_OF_DEPARTMENT_TAG_SHARE = 0.15
+DESCRIPTION_MEDIAN_WORDS = 150
+DESCRIPTION_SIGMA = 0.6
+
+FIRST_NAMES = (
+    "Abdullahi", "Adaeze", "Adebayo", "Aisha", "Amina", "Babatunde", "Bolanle", "Chidi", "Chinonso", "Damilola",
+    "Emeka", "Fatima", "Funmilayo", "Ibrahim", "Ifeoma", "Kabiru", "Kehinde", "Musa", "Ngozi", "Nnamdi",
+    "Oluwaseun", "Segun", "Soliu", "Temitope", "Tunde", "Uche", "Yakubu", "Yetunde", "Zainab", "Zubairu",
+)
+LAST_NAMES = (
+    "Abubakar", "Adeyemi", "Afolabi", "Bello", "Chukwu", "Danjuma", "Eze", "Gambo", "Ibrahim", "Igwe",
+    "Lawal", "Mohammed", "Nwankwo", "Obi", "Odukoya", "Ogunleye", "Okafor", "Okonkwo", "Oyelaran", "Salami",
+    "Suleiman", "Usman", "Yusuf",
+)
+STAFF_TITLES = {"Dr.": 55, "Prof.": 15, "Mr.": 18, "Mrs.": 12}
+TITLE_PREFIXES = (
+    "Design and Implementation of", "Development of", "An Evaluation of", "A Framework for", "Towards",
+    "Improving", "A Comparative Study of", "Automated",
+)
+TITLE_SUBJECTS = {
+    Tags.AI: ("an Intelligent Tutoring System", "Conversational Agents", "Expert Systems"),
+    Tags.WEB_DEV: ("a Student Portal", "Progressive Web Applications", "an E-commerce Platform"),
+    Tags.DATA_SCIENCE: ("Student Performance Prediction", "Exploratory Analysis of Census Data"),
+    Tags.MOBILE_DEV: ("a Mobile Health Application", "Offline-first Mobile Banking"),
+    Tags.CYBER_SECURITY: ("Intrusion Detection", "Phishing Detection", "Secure Authentication"),
+    Tags.CLOUD_COMPUTING: ("Serverless Workloads", "Multi-tenant Cloud Storage"),
+    Tags.GAME_DEV: ("an Educational Game", "Procedural Level Generation"),
+    Tags.DEVOPS: ("Continuous Delivery Pipelines", "Infrastructure as Code"),
+    Tags.IOT: ("Smart Irrigation", "Campus Energy Monitoring", "Smart Home Automation"),
+    Tags.BLOCKCHAIN: ("Blockchain-based Certificate Verification", "Decentralised Voting"),
+    Tags.SOFTWARE_TESTING: ("Mutation Testing", "Regression Test Selection"),
+    Tags.UI_UX: ("Accessible Interfaces", "Usability of Government Websites"),
+    Tags.NETWORKING: ("Campus Network Load Balancing", "Software-defined Networking"),
+    Tags.DATABASES: ("a Hospital Records System", "Query Optimisation", "an Inventory Management System"),
+    Tags.EMBEDDED_SYSTEMS: ("a Microcontroller-based Alarm", "Low-power Sensor Nodes"),
+    Tags.ANIMATION: ("2D Character Animation", "Motion Capture on a Budget"),
+    Tags.MACHINE_LEARNING: ("Crop Disease Detection", "Credit Risk Scoring", "Handwriting Recognition"),
+    Tags.AR_VR: ("Virtual Laboratories", "Augmented Reality Campus Tours"),
+    Tags.BIG_DATA: ("Large-scale Log Analysis", "Traffic Data Processing"),
+    Tags.ROBOTICS: ("an Autonomous Line-following Robot", "Robotic Arm Control"),
+    Tags.OTHERS: ("Record Keeping in Small Businesses", "Digital Library Services"),
+}
+TITLE_CONTEXTS = (
+    "", "", "", " for Nigerian Universities", " for Small Businesses", " in Healthcare", " using Open Data",
+    " for Rural Communities", " on Low-cost Hardware",
+)
+WORDS = (
+    "system", "data", "model", "users", "students", "design", "network", "application", "performance", "security",
+    "analysis", "results", "approach", "framework", "implementation", "evaluation", "accuracy", "platform",
+    "process", "information", "management", "service", "method", "study", "using", "based", "proposed",
+    "existing", "improves", "reduces", "provides", "supports", "measures", "compares", "collects", "stores",
+    "secure", "efficient", "scalable", "reliable", "mobile", "web", "cloud", "local", "real-time", "automated",
+    "the", "the", "the", "a", "a", "of", "of", "and", "and", "to", "in", "for", "with", "on", "by", "which",
+)
+REVIEW_COMMENTS = (
+    "Good work.", "Approved with minor corrections.", "Please expand the literature review.",
+    "The methodology needs more detail.", "Scope is too broad; narrow it down.", "Well structured report.",
+)
+SENTENCE_POOL_SIZE = 4096
+
+# Column order of the rows each generator yields.
+SUPERVISOR_COLUMNS = ("id", "name", "role", "email", "email_verified", "department", "hashed_password", "created_at",
+                      "faculty", "office_address", "phone_number", "title")
+STUDENT_COLUMNS = ("id", "name", "role", "email", "email_verified", "department", "hashed_password", "created_at",
+                   "matric_no", "level", "supervisor_id")
+ADMIN_COLUMNS = ("id", "name", "role", "email", "email_verified", "hashed_password", "created_at")
+PROJECT_COLUMNS = ("id", "title", "year", "description", "status", "review_comment", "created_at", "updated_at",
+                   "student_id", "supervisor_id", "tags")
+
+
+def _timestamp(moment: datetime) -> str:
+    # The format SQLAlchemy writes DATETIME columns in on SQLite; PostgreSQL parses it as well.
+    return moment.isoformat(" ", "microseconds")
+
+
+def _weighted(options: dict):
+    keys = list(options)
+    total, cumulative = 0, []
+    for key in keys:
+        total += options[key]
+        cumulative.append(total)
+    return keys, cumulative
+
+
+def _name(rng: random.Random) -> tuple:
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def build_supervisors(rng: random.Random, count: int, first_id: int, password_hash: str, epoch: datetime):
+    """Supervisor rows, and per department the supervisors' ids with cumulative weights for picking one."""
+    names, cumulative = _weighted({name: spec[2] for name, spec in DEPARTMENTS.items()})
+    titles, title_weights = _weighted(STAFF_TITLES)
+    by_department = {name: ([], []) for name in DEPARTMENTS}
+    rows = []
+    for supervisor_id in range(first_id, first_id + count):
+        # Every department gets a supervisor before the weights take over.
+        index = supervisor_id - first_id
+        department = names[index] if index < len(names) else rng.choices(names, cum_weights=cumulative)[0]
+        faculty = DEPARTMENTS[department][0]
+        first, last = _name(rng)
+        title = rng.choices(titles, cum_weights=title_weights)[0]
+        # A few supervisors attract most of their department's students.
+        ids, popularity = by_department[department]
+        ids.append(supervisor_id)
+        popularity.append((popularity[-1] if popularity else 0.0) + rng.paretovariate(2.5))
+        rows.append((
+            supervisor_id, f"{title} {first} {last}", Role.SUPERVISOR.name,
+            f"{first}.{last}.{supervisor_id}@staff.seed.edu".lower(), True, department, password_hash,
+            _timestamp(epoch - timedelta(days=rng.randrange(365, 20 * 365))), faculty,
+            f"Room {rng.randint(1, 40)}, {faculty} Building", f"+23480{supervisor_id:08d}", title,
+        ))
+    return rows, by_department
+
+
+def generate_students(rng: random.Random, count: int, first_id: int, password_hash: str, epoch: datetime,
+                      by_department: dict, students: list):
+    """Student rows. Each supervised student's id, department, supervisor and entry year is appended to
+    ``students`` for the projects."""
+    names, cumulative = _weighted({name: spec[2] for name, spec in DEPARTMENTS.items() if by_department[name][0]})
+    levels, level_weights = _weighted(LEVELS)
+    for student_id in range(first_id, first_id + count):
+        department = rng.choices(names, cum_weights=cumulative)[0]
+        level = rng.choices(levels, cum_weights=level_weights)[0]
+        entry_year = CURRENT_YEAR - int(level) // 100 + 1
+        supervisor_id = None
+        if int(level) >= SUPERVISED_LEVEL and rng.random() >= UNSUPERVISED_SHARE:
+            ids, popularity = by_department[department]
+            supervisor_id = rng.choices(ids, cum_weights=popularity)[0]
+            students.append((student_id, department, supervisor_id, entry_year))
+        first, last = _name(rng)
+        yield (
+            student_id, f"{first} {last}", Role.STUDENT.name, f"{first}.{last}.{student_id}@students.seed.edu".lower(),
+            rng.random() < 0.7, department, password_hash,
+            _timestamp(datetime(entry_year, 9, 1) + timedelta(seconds=rng.randrange(60 * 86400))),
+            f"{DEPARTMENTS[department][1]}/{entry_year}/{student_id:07d}", level, supervisor_id,
+        )
+
+
+def _sentence_pool(rng: random.Random) -> list:
+    pool = []
+    for _ in range(SENTENCE_POOL_SIZE):
+        words = rng.choices(WORDS, k=rng.randint(8, 22))
+        pool.append((" ".join(words).capitalize() + ".", len(words)))
+    return pool
+
+
+def generate_projects(rng: random.Random, count: int, first_id: int, students: list):
+    # A student's projects fall in the years since they reached SUPERVISED_LEVEL.
+    years_by_entry = {}
+    for _, _, _, entry_year in students:
+        if entry_year not in years_by_entry:
+            first_year = entry_year + (SUPERVISED_LEVEL - 100) // 100
+            years_by_entry[entry_year] = _weighted({year: weight for year, weight in YEARS.items()
+                                                    if int(year) >= first_year})
+    past_statuses, past_weights = _weighted(PAST_STATUSES)
+    current_statuses, current_weights = _weighted(CURRENT_STATUSES)
+    tag_counts, tag_count_weights = _weighted(TAG_COUNTS)
+    all_tags = list(Tags)
+    sentences = _sentence_pool(rng)
+    log_median = math.log(DESCRIPTION_MEDIAN_WORDS)
+    year_starts = {year: datetime(int(year), 1, 1) for year in YEARS}
+    current_year_seconds = int((datetime(CURRENT_YEAR, 9, 1) - year_starts[str(CURRENT_YEAR)]).total_seconds())
+
+    for project_id in range(first_id, first_id + count):
+        student_id, department, supervisor_id, entry_year = rng.choice(students)
+        years, year_weights = years_by_entry[entry_year]
+        year = rng.choices(years, cum_weights=year_weights)[0]
+        if year == str(CURRENT_YEAR):
+            status = rng.choices(current_statuses, cum_weights=current_weights)[0]
+            created_at = year_starts[year] + timedelta(seconds=rng.randrange(current_year_seconds))
+        else:
+            status = rng.choices(past_statuses, cum_weights=past_weights)[0]
+            created_at = year_starts[year] + timedelta(seconds=rng.randrange(365 * 86400))
+        reviewed = status in (Status.APPROVED, Status.REJECTED)
+        updated_at = created_at + timedelta(seconds=rng.randrange(90 * 86400)) if reviewed else created_at
+
+        department_tags = DEPARTMENTS[department][3]
+        tags = []
+        for _ in range(rng.choices(tag_counts, cum_weights=tag_count_weights)[0]):
+            pool = all_tags if rng.random() < OUT_OF_DEPARTMENT_TAG_SHARE else department_tags
+            tag = rng.choice(pool)
+            if tag not in tags:
+                tags.append(tag)
+
+        target = max(25, min(1500, int(rng.lognormvariate(log_median, DESCRIPTION_SIGMA))))
+        description, words = [], 0
+        while words < target:
+            sentence, length = rng.choice(sentences)
+            description.append(sentence)
+            words += length
+
+        title = f"{rng.choice(TITLE_PREFIXES)} {rng.choice(TITLE_SUBJECTS[tags[0]])}{rng.choice(TITLE_CONTEXTS)}"
+        yield (
+            project_id, title, year, " ".join(description), status.name,
+            rng.choice(REVIEW_COMMENTS) if reviewed and rng.random() < 0.6 else None,
+            _timestamp(created_at), _timestamp(updated_at), student_id, supervisor_id,
+            json.dumps([tag.value for tag in tags]),
         )
 
-        supervisor1 = SupervisorAccount(
-            name="Dr. Gambo",
-            role=Role.SUPERVISOR,
-            email="gambo@school.edu",
-            hashed_password="hashedpassword2",
-            faculty="Science",
-            office_address="Room 101"
+
+# Loading
+
+def _batches(rows, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load(connection, dialect: str, model, columns: tuple, rows, batch_size: int) -> int:
+    table = model.__table__
+    column_list = ", ".join(columns)
+    cursor = connection.cursor()
+    loaded = 0
+    for batch in _batches(rows, batch_size):
+        if dialect == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(batch)
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+        elif dialect == "sqlite":
+            placeholders = ", ".join("?" for _ in columns)
+            cursor.executemany(f"INSERT INTO {table.name} ({column_list}) VALUES ({placeholders})", batch)
+        else:
+            # Other drivers take their own paramstyle; let SQLAlchemy compile the statement.
+            compiled = insert(table).compile(dialect=engine.dialect, column_keys=list(columns))
+            cursor.executemany(str(compiled), [dict(zip(columns, row)) for row in batch])
+        loaded += len(batch)
+    cursor.close()
+    connection.commit()
+    return loaded
+
+
+def _next_id(connection, model) -> int:
+    cursor = connection.cursor()
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {model.__table__.name}")
+    value = cursor.fetchone()[0]
+    cursor.close()
+    return value + 1
+
+
+def _reset_sequences(connection, models) -> None:
+    """Move PostgreSQL id sequences past the ids inserted explicitly."""
+    cursor = connection.cursor()
+    for model in models:
+        name = model.__table__.name
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {name})) "
+            f"WHERE pg_get_serial_sequence('{name}', 'id') IS NOT NULL"
         )
-        session.add_all([student1, supervisor1])
-        session.commit()
-        session.refresh(student1)
-        
-        # # Create projects
-        # project1 = Project(
-        #     title="AI-Powered Learning System",
-        #     description="An intelligent system that adapts to student learning patterns",
-        #     year=2025,
-        #     student_id=student1.id,
-        #     supervisor_id=supervisor1.id,
-        #     status=ProjectStatus.APPROVED
-        # )
-        # project1.tags = [, tag_web]
-        
-        # project2 = Project(
-        #     title="Smart Campus IoT Network",
-        #     description="Implementing IoT devices across campus for energy efficiency",
-        #     year=2023,
-        #     student_id=student2.id,
-        #     supervisor_id=supervisor2.id,
-        #     status=ProjectStatus.PENDING
-        # )
-        # project2.tags = [tag_iot, tag_db]
-        
-        # session.add_all([project1, project2])
-        # session.commit()
-        
-        print("Done, Sample data created successfully!")
+    cursor.close()
+    connection.commit()
+
+
+def seed(supervisors: int, students: int, projects: int, seed_value: int, password: str, batch_size: int) -> None:
+    engine.echo = False
+    create_db_and_tables()
+    dialect = engine.dialect.name
+    rng = random.Random(seed_value)
+    password_hash = get_password_hash(password)
+    epoch = datetime(CURRENT_YEAR, 9, 1)
+
+    connection = engine.raw_connection()
+    try:
+        if dialect == "sqlite":
+            # Each batch is committed anyway; skipping the fsyncs makes the load several times faster.
+            connection.execute("PRAGMA synchronous = OFF")
+
+        def timed(label: str, model, columns: tuple, rows) -> None:
+            started = time.perf_counter()
+            loaded = _load(connection, dialect, model, columns, rows, batch_size)
+            seconds = time.perf_counter() - started
+            print(f"  {label}: {loaded} rows in {seconds:.1f}s ({loaded / seconds if seconds else 0:,.0f} rows/s)")
+
+        print(f"Seeding {dialect} with {supervisors} supervisors, {students} students, {projects} projects "
+              f"(seed {seed_value})...")
+        admin_id = _next_id(connection, AdminAccount)
+        timed("admins", AdminAccount, ADMIN_COLUMNS, [
+            (admin_id, "Seed Admin", Role.ADMIN.name, f"admin{'' if admin_id == 1 else admin_id}@seed.edu",
+             True, password_hash, _timestamp(epoch))
+        ])
+
+        supervisor_rows, by_department = build_supervisors(
+            rng, supervisors, _next_id(connection, SupervisorAccount), password_hash, epoch)
+        timed("supervisors", SupervisorAccount, SUPERVISOR_COLUMNS, supervisor_rows)
+
+        first_student_id = _next_id(connection, StudentAccount)
+        supervised = []
+        timed("students", StudentAccount, STUDENT_COLUMNS, generate_students(
+            rng, students, first_student_id, password_hash, epoch, by_department, supervised))
+
+        if projects and supervised:
+            timed("projects", Project, PROJECT_COLUMNS, generate_projects(
+                rng, projects, _next_id(connection, Project), supervised))
+
+        if dialect == "postgresql":
+            _reset_sequences(connection, (AdminAccount, SupervisorAccount, StudentAccount, Project))
+    finally:
+        connection.close()
+    print(f"Done. Every seeded account signs in with the password {password!r}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--supervisors", type=int, default=50)
+    parser.add_argument("--students", type=int, default=1_000)
+    parser.add_argument("--projects", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    if args.supervisors < 1:
+        parser.error("--supervisors must be at least 1")
+    seed(args.supervisors, args.students, args.projects, args.seed, args.password, args.batch_size)
+
 
 if __name__ == "__main__":
-    seed_sample_data()
\ No newline at end of file
+    main()
@@ -0,0 +1,218 @@
+"""Bulk auto-assignment of unassigned students to supervisors.
+
+Supervisors sit in min-heaps keyed by their current number of students, so
+each student goes to the least-loaded supervisor that still has room below
+the capacity. There is one heap per department and one across all
+departments.
+
+Assignment happens in two passes. First, every student whose department has
+supervisors takes the least-loaded one from that department. Only the
+students left over are then spread across the remaining capacity of every
+department. Running same-department matches first keeps the fallback
+students from using up seats a same-department student needed.
+
+Heap entries that are out of date are skipped when they reach the top,
+rather than being removed when a load changes. Planning is
+O(students * log supervisors) and reads the database with three queries. It
+never writes. Applying takes the assignments the admin previewed rather than
+planning again: ``plan_from_preview`` checks they still fit the current
+loads and ``apply_plan`` writes them with one executemany UPDATE in one
+transaction, so what is applied is exactly what was shown.
+"""
+import heapq
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, func, select, update
+from sqlmodel import Session
+
+from config import config
+from models.account import StudentAccount, SupervisorAccount
+from schemas.assignment import AssignmentPlanRead, StudentAssignment, SupervisorLoad
+from services.cache import invalidate
+
+
+def _department_key(department: Optional[str]) -> Optional[str]:
+    return department.strip().casefold() if department and department.strip() else None
+
+
+def balance(
+    students: Iterable[Tuple[int, Optional[str]]],
+    supervisors: Iterable[Tuple[int, Optional[str]]],
+    loads: Dict[int, int],
+    capacity: int,
+) -> Tuple[List[Tuple[int, int, bool]], List[int], Dict[int, int]]:
+    """Assign ``(id, department)`` students to ``(id, department)`` supervisors.
+
+    ``loads`` holds each supervisor's current number of students. Returns
+    the ``(student_id, supervisor_id, same_department)`` assignments, the
+    ids of the students no supervisor had room for, and the new loads.
+    """
+    loads = {supervisor_id: loads.get(supervisor_id, 0) for supervisor_id, _ in supervisors}
+    supervisor_departments = {supervisor_id: _department_key(department) for supervisor_id, department in supervisors}
+
+    anywhere: List[Tuple[int, int]] = []
+    by_department: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+    for supervisor_id, department in supervisor_departments.items():
+        if loads[supervisor_id] < capacity:
+            anywhere.append((loads[supervisor_id], supervisor_id))
+            if department:
+                by_department[department].append((loads[supervisor_id], supervisor_id))
+    heapq.heapify(anywhere)
+    for heap in by_department.values():
+        heapq.heapify(heap)
+
+    def take(heap: List[Tuple[int, int]]) -> Optional[int]:
+        while heap:
+            load, supervisor_id = heapq.heappop(heap)
+            if load != loads[supervisor_id]:
+                continue  # superseded by a newer entry
+            loads[supervisor_id] = load + 1
+            if load + 1 < capacity:
+                heapq.heappush(anywhere, (load + 1, supervisor_id))
+                department = supervisor_departments[supervisor_id]
+                if department:
+                    heapq.heappush(by_department[department], (load + 1, supervisor_id))
+            return supervisor_id
+        return None
+
+    assignments, leftovers = [], []
+    for student_id, department in students:
+        heap = by_department.get(_department_key(department))
+        supervisor_id = take(heap) if heap else None
+        if supervisor_id is None:
+            leftovers.append(student_id)
+        else:
+            assignments.append((student_id, supervisor_id, True))
+
+    unassigned = []
+    for student_id in leftovers:
+        supervisor_id = take(anywhere)
+        if supervisor_id is None:
+            unassigned.append(student_id)
+        else:
+            assignments.append((student_id, supervisor_id, False))
+    return assignments, unassigned, loads
+
+
+def plan_assignments(
+    session: Session,
+    department: Optional[str] = None,
+    supervisor_ids: Optional[List[int]] = None,
+    capacity: Optional[int] = None,
+) -> AssignmentPlanRead:
+    capacity = capacity or config.SUPERVISOR_CAPACITY
+
+    student_statement = (
+        select(StudentAccount.id, StudentAccount.department)
+        .where(StudentAccount.supervisor_id.is_(None))
+        .order_by(StudentAccount.id)
+    )
+    if department:
+        student_statement = student_statement.where(
+            func.lower(StudentAccount.department) == department.strip().lower())
+    students = session.execute(student_statement).all()
+
+    supervisor_statement = select(SupervisorAccount.id, SupervisorAccount.department).order_by(SupervisorAccount.id)
+    if supervisor_ids:
+        supervisor_statement = supervisor_statement.where(SupervisorAccount.id.in_(supervisor_ids))
+    supervisors = session.execute(supervisor_statement).all()
+    if supervisor_ids:
+        missing = set(supervisor_ids) - {supervisor_id for supervisor_id, _ in supervisors}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Supervisors not found: {sorted(missing)}")
+
+    load_statement = (
+        select(StudentAccount.supervisor_id, func.count())
+        .where(StudentAccount.supervisor_id.isnot(None))
+        .group_by(StudentAccount.supervisor_id)
+    )
+    before = dict(session.execute(load_statement).all())
+
+    assignments, unassigned, after = balance(students, supervisors, before, capacity)
+    return AssignmentPlanRead(
+        applied=False,
+        capacity=capacity,
+        assignments=[
+            StudentAssignment(student_id=student_id, supervisor_id=supervisor_id, same_department=same_department)
+            for student_id, supervisor_id, same_department in assignments
+        ],
+        unassigned=unassigned,
+        loads=[
+            SupervisorLoad(supervisor_id=supervisor_id, department=supervisor_department,
+                           before=before.get(supervisor_id, 0), after=after[supervisor_id])
+            for supervisor_id, supervisor_department in supervisors
+        ],
+    )
+
+
+def plan_from_preview(
+    session: Session,
+    assignments: List[StudentAssignment],
+    capacity: Optional[int] = None,
+) -> AssignmentPlanRead:
+    """Rebuild a previewed plan for ``apply_plan`` against the current loads.
+
+    Raises 409 if a supervisor is gone or would go over ``capacity``. A
+    student assigned since the preview is caught by ``apply_plan``.
+    """
+    capacity = capacity or config.SUPERVISOR_CAPACITY
+    supervisor_ids = sorted({assignment.supervisor_id for assignment in assignments})
+    supervisors = session.execute(
+        select(SupervisorAccount.id, SupervisorAccount.department)
+        .where(SupervisorAccount.id.in_(supervisor_ids))
+        .order_by(SupervisorAccount.id)
+    ).all()
+    if len(supervisors) != len(supervisor_ids):
+        raise HTTPException(status_code=409, detail="Supervisors changed since the preview, preview again")
+
+    before = dict(session.execute(
+        select(StudentAccount.supervisor_id, func.count())
+        .where(StudentAccount.supervisor_id.in_(supervisor_ids))
+        .group_by(StudentAccount.supervisor_id)
+    ).all())
+    after = dict(before)
+    for assignment in assignments:
+        after[assignment.supervisor_id] = after.get(assignment.supervisor_id, 0) + 1
+    if any(after[supervisor_id] > capacity for supervisor_id in supervisor_ids):
+        raise HTTPException(status_code=409, detail="Supervisor loads changed since the preview, preview again")
+
+    return AssignmentPlanRead(
+        applied=False,
+        capacity=capacity,
+        assignments=assignments,
+        unassigned=[],
+        loads=[
+            SupervisorLoad(supervisor_id=supervisor_id, department=supervisor_department,
+                           before=before.get(supervisor_id, 0), after=after[supervisor_id])
+            for supervisor_id, supervisor_department in supervisors
+        ],
+    )
+
+
+def apply_plan(session: Session, plan: AssignmentPlanRead) -> AssignmentPlanRead:
+    if plan.assignments:
+        students = StudentAccount.__table__
+        statement = (
+            update(students)
+            .where(students.c.id == bindparam("b_student_id"), students.c.supervisor_id.is_(None))
+            .values(supervisor_id=bindparam("b_supervisor_id"))
+        )
+        result = session.execute(statement, [
+            {"b_student_id": assignment.student_id, "b_supervisor_id": assignment.supervisor_id}
+            for assignment in plan.assignments
+        ])
+        if result.rowcount != len(plan.assignments):
+            # Someone assigned a student since the plan was made; the loads are stale too.
+            session.rollback()
+            raise HTTPException(status_code=409, detail="Students were assigned while planning, try again")
+        session.commit()
+
+        invalidate(
+            "students",
+            *{f"supervisor:{assignment.supervisor_id}" for assignment in plan.assignments},
+            *(f"student:{assignment.student_id}" for assignment in plan.assignments),
+        )
+    plan.applied = True
+    return plan
@@ -7,8 +7,11 @@ from sqlmodel import Session, select
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
 
+from core.metrics import PASSWORD_HASH_SECONDS
+from core.tracing import span
 from models.account import StudentAccount, SupervisorAccount, AdminAccount
 from services.enums import Role
+from services.tiered_cache import get_tiered_cache
 
 SECRET_KEY = os.getenv("SECRET_KEY", "dj=k3n903*99*%$)4qu$ohdexpvh!rq*6iu7y5uiwtp_=zb&3)")
 ALGORITHM = "HS256"
@@ -20,14 +23,23 @@ AccountType = Union[StudentAccount, SupervisorAccount, AdminAccount]
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_SECONDS.labels("verify").time(), span("password.verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_SECONDS.labels("hash").time(), span("password.hash"):
+        return pwd_context.hash(password)
 
 
-def get_account_by_email(session: Session, email: str) -> Optional[AccountType]:
+ACCOUNT_MODELS = {
+    Role.STUDENT: StudentAccount,
+    Role.SUPERVISOR: SupervisorAccount,
+    Role.ADMIN: AdminAccount,
+}
+
+
+def _find_account_by_email(session: Session, email: str) -> Optional[AccountType]:
     student = session.exec(
         select(StudentAccount)
         .options(selectinload(StudentAccount.supervisor))
@@ -47,6 +59,33 @@ def get_account_by_email(session: Session, email: str) -> Optional[AccountType]:
     return None
 
 
+def _load_account(session: Session, role: Role, account_id: int) -> Optional[AccountType]:
+    if role == Role.STUDENT:
+        return session.get(StudentAccount, account_id, options=[selectinload(StudentAccount.supervisor)])
+    return session.get(ACCOUNT_MODELS[role], account_id)
+
+
+def get_account_by_email(session: Session, email: str) -> Optional[AccountType]:
+    # The cache only maps an email to (role, id), so a hit costs one primary-key
+    # lookup instead of probing all three account tables.
+    accounts = get_tiered_cache("accounts")
+    ref = accounts.get(email)
+    if ref is not None:
+        account = _load_account(session, Role(ref["role"]), ref["id"])
+        if account is not None and account.email == email:
+            return account
+        accounts.invalidate(email)
+
+    account = _find_account_by_email(session, email)
+    if account is not None:
+        accounts.set(email, {"role": account.role.value, "id": account.id})
+    return account
+
+
+def invalidate_account(email: str) -> None:
+    get_tiered_cache("accounts").invalidate(email)
+
+
 def authenticate_user(session: Session, email: str, password: str) -> Optional[AccountType]:
     user = get_account_by_email(session, email)
     if not user:
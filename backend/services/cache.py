@@ -0,0 +1,362 @@
+"""Read-through result cache for expensive read endpoints.
+
+Entries hold already-serialized JSON bodies keyed by endpoint, viewer scope
+and normalized query parameters. Every entry is tagged with the entities it
+was built from (``projects``, ``project:12``, ``supervisor:3`` ...) and the
+routers invalidate those tags after each write.
+
+Entries are fresh for ``CACHE_TTL_SECONDS`` and may then be served stale for
+``CACHE_STALE_SECONDS`` while a background thread rebuilds them.
+
+A body computed while one of its tags was invalidated may predate the write
+behind that invalidation, so it is not stored. Each tag has a generation
+that changes on every invalidation. The generations are read before the
+body is computed, and the store is skipped if any of them changed.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from config import config
+from core.responses import FastJSONResponse
+from models.database import engine
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[float, bytes]
+Generations = Tuple[Optional[str], ...]
+
+# Invalidations are remembered for this long. A body that took longer to
+# compute is never stored, since an invalidation it raced with may be forgotten.
+GENERATION_SECONDS = 300
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[Entry]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, entry: Entry, ttl: int, tags: Iterable[str],
+            generations: Optional[Generations] = None) -> None:
+        """Store ``entry``. With ``generations``, only if none of ``tags`` was invalidated since they were read."""
+
+    @abstractmethod
+    def generations(self, tags: Iterable[str]) -> Generations:
+        """Tokens that change whenever one of ``tags`` is invalidated."""
+
+    @abstractmethod
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        ...
+
+    @abstractmethod
+    def delete(self, keys: Iterable[str]) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local backend, used in development and tests."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Entry]]" = OrderedDict()
+        self._tags: dict = {}
+        self._key_tags: dict = {}
+        # tag -> (invalidated at, token), oldest first
+        self._generations: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, entry = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _remove(self, key: str) -> bool:
+        """Drop ``key`` and its tag memberships, so the tag index never outgrows the entries."""
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return self._entries.pop(key, None) is not None
+
+    def _current(self, tags: Iterable[str]) -> Generations:
+        return tuple(self._generations[tag][1] if tag in self._generations else None for tag in tags)
+
+    def generations(self, tags: Iterable[str]) -> Generations:
+        with self._lock:
+            return self._current(tags)
+
+    def set(self, key: str, entry: Entry, ttl: int, tags: Iterable[str],
+            generations: Optional[Generations] = None) -> None:
+        tags = list(tags)
+        with self._lock:
+            if generations is not None and self._current(tags) != generations:
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, entry)
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            now = time.monotonic()
+            while self._generations and next(iter(self._generations.values()))[0] < now - GENERATION_SECONDS:
+                self._generations.popitem(last=False)
+            for tag in tags:
+                self._generations[tag] = (now, uuid.uuid4().hex)
+                self._generations.move_to_end(tag)
+                for key in list(self._tags.get(tag, ())):
+                    removed += self._remove(key)
+        return removed
+
+    def delete(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+            self._generations.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared backend; tag membership is kept in Redis sets next to the entries."""
+
+    def __init__(self, url: str, prefix: str = "scholarbase:cache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}entry:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.prefix}tag:{tag}"
+
+    def _generation(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+    def generations(self, tags: Iterable[str]) -> Generations:
+        keys = [self._generation(tag) for tag in tags]
+        return self._decode(self.client.mget(keys)) if keys else ()
+
+    @staticmethod
+    def _decode(values) -> Generations:
+        return tuple(value.decode() if value is not None else None for value in values)
+
+    def get(self, key: str) -> Optional[Entry]:
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            return None
+        header, _, body = raw.partition(b"\n")
+        return float(header), body
+
+    def set(self, key: str, entry: Entry, ttl: int, tags: Iterable[str],
+            generations: Optional[Generations] = None) -> None:
+        import redis
+
+        fresh_until, body = entry
+        tags = list(tags)
+        generation_keys = [self._generation(tag) for tag in tags]
+        with self.client.pipeline(transaction=generations is not None) as pipe:
+            if generations is not None and generation_keys:
+                # WATCH makes the write fail if an invalidation lands between the check and EXEC.
+                pipe.watch(*generation_keys)
+                if self._decode(pipe.mget(generation_keys)) != tuple(generations):
+                    return
+                pipe.multi()
+            pipe.set(self._key(key), f"{fresh_until}\n".encode() + body, ex=ttl)
+            for tag in tags:
+                pipe.sadd(self._tag(tag), key)
+                pipe.expire(self._tag(tag), ttl)
+            try:
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        tag_keys = [self._tag(tag) for tag in tags]
+        if not tag_keys:
+            return 0
+        keys = self.client.sunion(tag_keys)
+        pipe = self.client.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*(self._key(key.decode()) for key in keys))
+        pipe.delete(*tag_keys)
+        for tag in tags:
+            pipe.set(self._generation(tag), uuid.uuid4().hex, ex=GENERATION_SECONDS)
+        return pipe.execute()[0] if keys else 0
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = [self._key(key) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class ResultCache:
+    def __init__(self, backend: CacheBackend, ttl: int, stale_ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-refresh")
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], bytes],
+        tags: Iterable[str],
+        refresh: Optional[Callable[[], bytes]] = None,
+    ) -> Tuple[bytes, str]:
+        """Return ``(body, state)`` where state is ``hit``, ``stale`` or ``miss``.
+
+        ``refresh`` rebuilds a stale entry off the request path; it must not
+        depend on request-scoped resources such as the request's DB session.
+        """
+        tags = list(tags)
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return compute(), "miss"
+
+        if entry is not None:
+            fresh_until, body = entry
+            if time.time() < fresh_until:
+                return body, "hit"
+            if refresh is not None:
+                self._schedule_refresh(key, refresh, tags)
+                return body, "stale"
+
+        started, generations = self._generations(tags)
+        body = compute()
+        self._store(key, body, tags, started, generations)
+        return body, "miss"
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        try:
+            self.backend.invalidate_tags(list(tags))
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {tags}: {e}")
+
+    def _generations(self, tags: List[str]) -> Tuple[float, Optional[Generations]]:
+        try:
+            return time.monotonic(), self.backend.generations(tags)
+        except Exception as e:
+            logger.warning(f"Cache generation read failed for {tags}: {e}")
+            return time.monotonic(), None
+
+    def _store(self, key: str, body: bytes, tags: List[str], started: float,
+               generations: Optional[Generations]) -> None:
+        if generations is None or time.monotonic() - started > GENERATION_SECONDS:
+            return
+        try:
+            self.backend.set(key, (time.time() + self.ttl, body), self.ttl + self.stale_ttl, tags, generations)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    def _schedule_refresh(self, key: str, refresh: Callable[[], bytes], tags: List[str]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                started, generations = self._generations(tags)
+                self._store(key, refresh(), tags, started, generations)
+            except Exception as e:
+                logger.warning(f"Background cache refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+
+@lru_cache()
+def get_result_cache() -> ResultCache:
+    if config.CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(config.REDIS_URL)
+    else:
+        backend = InMemoryCacheBackend()
+    return ResultCache(backend, config.CACHE_TTL_SECONDS, config.CACHE_STALE_SECONDS)
+
+
+def cache_key(namespace: str, scope: str, **params) -> str:
+    """Build a key that is stable under parameter order and list ordering."""
+    normalized = {}
+    for name, value in params.items():
+        if value is None or value == [] or value == "":
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(getattr(item, "value", item) for item in value)
+        normalized[name] = getattr(value, "value", value)
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{namespace}:{scope}:{digest}"
+
+
+def project_tags(project) -> List[str]:
+    tags = ["projects", f"project:{project.id}", f"student:{project.student_id}"]
+    if project.supervisor_id:
+        tags.append(f"supervisor:{project.supervisor_id}")
+    return tags
+
+
+def cached_response(
+    session: Session,
+    key: str,
+    tags: Iterable[str],
+    build: Callable[[Session], bytes],
+) -> FastJSONResponse:
+    """Serve ``build(session)`` through the result cache.
+
+    Stale entries are rebuilt in the background with a fresh session.
+    """
+    def refresh() -> bytes:
+        with Session(engine) as refresh_session:
+            return build(refresh_session)
+
+    body, state = get_result_cache().get_or_compute(key, lambda: build(session), tags, refresh)
+    return FastJSONResponse(body, headers={"X-Cache": state.upper()})
+
+
+def invalidate(*tags: str) -> None:
+    get_result_cache().invalidate(tags)
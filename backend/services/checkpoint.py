@@ -0,0 +1,38 @@
+"""Persisted progress for long-running maintenance jobs.
+
+A checkpoint is a small JSON file under ``CHECKPOINT_DIR``, which should sit
+on storage shared by the workers, like the upload spool. It is written
+atomically after each unit of work. A job that dies partway through resumes
+from the last saved state instead of starting over.
+"""
+import json
+import os
+from typing import Optional
+
+from config import config
+
+
+class Checkpoint:
+    def __init__(self, name: str, directory: Optional[str] = None):
+        self.name = name
+        directory = os.path.abspath(directory or config.CHECKPOINT_DIR)
+        self.path = os.path.join(directory, f"{name}.json")
+
+    def load(self) -> dict:
+        try:
+            with open(self.path) as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, state: dict) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.part", "w") as checkpoint_file:
+            json.dump(state, checkpoint_file, default=str)
+        os.replace(f"{self.path}.part", self.path)
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
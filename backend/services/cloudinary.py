@@ -1,9 +1,14 @@
 from fastapi import HTTPException, UploadFile
-from cloudinary.uploader import upload as cloudinary_upload, destroy as cloudinary_destroy
+from cloudinary.uploader import upload_large as cloudinary_upload_large, destroy as cloudinary_destroy
 from cloudinary.exceptions import Error as CloudinaryError
+from starlette.concurrency import run_in_threadpool
+import asyncio
 import os
-from typing import Optional
+import weakref
+from typing import BinaryIO, Optional
 import re
+from config import config
+from core.tracing import span
 
 MAX_FILE_SIZE = 20 * 1024 * 1024
 
@@ -18,43 +23,111 @@ ALLOWED_FILE_TYPES = {
 
 ALLOWED_EXTENSIONS = {".pdf", ".doc", ".docx", ".txt", ".ppt", ".pptx"}
 
+# Leading bytes of each document type. Office files are OLE (.doc, .ppt) or ZIP (.docx, .pptx) containers.
+SIGNATURE_BYTES = 8
+FILE_SIGNATURES = {
+    ".pdf": b"%PDF-",
+    ".doc": b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",
+    ".ppt": b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",
+    ".docx": b"PK\x03\x04",
+    ".pptx": b"PK\x03\x04",
+}
+
+# Uploads beyond MAX_CONCURRENT_UPLOADS wait for a slot instead of each holding
+# a worker thread and a chunk buffer. One semaphore per event loop.
+_upload_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _upload_slot() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    if loop not in _upload_slots:
+        _upload_slots[loop] = asyncio.Semaphore(config.MAX_CONCURRENT_UPLOADS)
+    return _upload_slots[loop]
+
 def validate_file(file: UploadFile) -> None:
-    if file.size and file.size > MAX_FILE_SIZE:
+    validate_document(file.filename, file.content_type, file.size)
+
+
+def validate_document(filename: Optional[str], content_type: Optional[str], size: Optional[int]) -> None:
+    if size and size > MAX_FILE_SIZE:
         raise HTTPException(
             status_code=413,
             detail=f"File size too large. Maximum allowed size is {MAX_FILE_SIZE // (1024*1024)}MB"
         )
     
-    if file.content_type not in ALLOWED_FILE_TYPES:
+    if content_type not in ALLOWED_FILE_TYPES:
         raise HTTPException(
             status_code=400,
             detail="Invalid file type. Allowed types: PDF, DOC, DOCX, TXT, PPT, PPTX"
         )
     
-    if file.filename:
-        file_ext = os.path.splitext(file.filename)[1].lower()
+    if filename:
+        file_ext = os.path.splitext(filename)[1].lower()
         if file_ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
                 detail="Invalid file extension. Allowed extensions: .pdf, .doc, .docx, .txt, .ppt, .pptx"
             )
 
+def matches_signature(extension: str, head: bytes) -> bool:
+    """Whether ``head``, the first SIGNATURE_BYTES of a file, fits its extension."""
+    if extension == ".txt":
+        return b"\x00" not in head
+    signature = FILE_SIGNATURES.get(extension)
+    return signature is not None and head.startswith(signature)
+
+class _NonClosingReader:
+    """Lets ``upload_large`` read the spooled upload without closing it."""
+
+    def __init__(self, fileobj: BinaryIO, name: str):
+        self._fileobj = fileobj
+        self.name = name
+
+    def read(self, size: int = -1) -> bytes:
+        return self._fileobj.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._fileobj.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._fileobj.tell()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def _upload_stream(fileobj: BinaryIO, filename: str, folder: str, public_id: str, overwrite: bool = True) -> dict:
+    # Runs in a worker thread: reads the spooled file one chunk at a time, so
+    # memory per upload stays at UPLOAD_CHUNK_SIZE whatever the file size.
+    fileobj.seek(0)
+    with span("cloudinary.upload", filename=filename, folder=folder):
+        return cloudinary_upload_large(
+            _NonClosingReader(fileobj, filename),
+            folder=folder,
+            resource_type="raw",  # Use 'raw' for non-image files like PDFs
+            public_id=public_id,  # Don't include folder in public_id
+            overwrite=overwrite,
+            chunk_size=config.UPLOAD_CHUNK_SIZE,
+            filename=filename,
+        )
+
+
 async def upload_file_to_cloudinary(file: UploadFile, folder: str = "scholar_base/documents") -> str:
     validate_file(file)
     
     try:
-        file_content = await file.read()
-        
         # Remove extension from filename to avoid duplication
         filename_without_ext = os.path.splitext(file.filename)[0] if file.filename else "document"
         
-        result = cloudinary_upload(
-            file_content,
-            folder=folder,
-            resource_type="raw",  # Use 'raw' for non-image files like PDFs
-            public_id=filename_without_ext,  # Don't include folder in public_id
-            overwrite=True
-        )
+        # The span includes the wait for an upload slot; the nested cloudinary.upload span is the transfer.
+        with span("upload_file_to_cloudinary", filename=file.filename, size=file.size):
+            async with _upload_slot():
+                result = await run_in_threadpool(
+                    _upload_stream, file.file, file.filename or "document", folder, filename_without_ext
+                )
         
         return result["secure_url"]
     
@@ -95,7 +168,8 @@ def delete_file_from_cloudinary(cloudinary_url: str) -> bool:
         
         print(f"Attempting to delete: public_id='{public_id}', resource_type='{resource_type}'")
         
-        result = cloudinary_destroy(public_id, resource_type=resource_type)
+        with span("cloudinary.delete", public_id=public_id, resource_type=resource_type):
+            result = cloudinary_destroy(public_id, resource_type=resource_type)
         success = result.get("result") == "ok"
         
         if success:
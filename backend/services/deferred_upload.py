@@ -0,0 +1,64 @@
+"""Deferred document uploads.
+
+With ``DEFERRED_UPLOADS`` enabled the API only copies the document to the
+local spool directory and commits the project with ``upload_state=pending``;
+``tasks.document_upload`` then puts the file in document storage, fills in
+``document_url`` and removes the spool file.
+"""
+import logging
+import os
+import shutil
+import uuid
+from typing import BinaryIO
+
+from fastapi import UploadFile
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from config import config
+from models.projects import Project
+from services.cloudinary import validate_file
+from services.enums import UploadState
+
+logger = logging.getLogger(__name__)
+
+SPOOL_COPY_BUFFER = 1024 * 1024
+
+
+def _copy_to_spool(fileobj: BinaryIO, suffix: str) -> str:
+    spool_dir = os.path.abspath(config.UPLOAD_SPOOL_DIR)
+    os.makedirs(spool_dir, exist_ok=True)
+    path = os.path.join(spool_dir, f"{uuid.uuid4().hex}{suffix}")
+    fileobj.seek(0)
+    # Written under a temporary name so a worker never sees a partial file.
+    with open(f"{path}.part", "wb") as spooled:
+        shutil.copyfileobj(fileobj, spooled, SPOOL_COPY_BUFFER)
+    os.replace(f"{path}.part", path)
+    return path
+
+
+async def spool_upload(file: UploadFile) -> str:
+    validate_file(file)
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    return await run_in_threadpool(_copy_to_spool, file.file, suffix)
+
+
+def discard_spool_file(spool_path: str) -> None:
+    try:
+        os.remove(spool_path)
+    except FileNotFoundError:
+        pass
+
+
+def schedule_document_upload(session: Session, project: Project, spool_path: str, filename: str) -> None:
+    from tasks.document_upload import upload_project_document
+
+    try:
+        upload_project_document.delay(project.id, spool_path, filename)
+    except Exception as e:
+        logger.error(f"Could not queue document upload for project {project.id}: {e}")
+        project.upload_state = UploadState.FAILED
+        session.add(project)
+        session.commit()
+        session.refresh(project)
+        discard_spool_file(spool_path)
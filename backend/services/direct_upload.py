@@ -0,0 +1,120 @@
+"""Signed direct uploads to Cloudinary.
+
+The API never sees the document bytes. ``sign_upload`` returns upload
+parameters signed with the Cloudinary API secret. It also returns an
+``upload_token``, a short-lived JWT binding the upload to one project and
+account. The client posts the file straight to Cloudinary and then hands the
+upload response to ``confirm_upload``. That step checks the response
+signature, then the stored object's size and type against the ones declared
+at signing, before the document is attached. The type check compares the
+Content-Type Cloudinary serves, and the file's leading bytes against the
+signature its extension calls for.
+
+Signing and signature checks are local HMACs. The only network calls are a
+HEAD and a small ranged GET on the uploaded object during confirmation.
+
+Direct uploads get a random public id, because the content hash isn't known
+before the bytes arrive. They are not deduplicated.
+"""
+import os
+import time
+import uuid
+from typing import Optional
+
+import cloudinary
+import requests
+from cloudinary.uploader import destroy as cloudinary_destroy
+from cloudinary.utils import api_sign_request, cloudinary_api_url, cloudinary_url, verify_api_response_signature
+from fastapi import HTTPException
+from jose import JWTError, jwt
+
+from config import config
+from services.auth import ALGORITHM, SECRET_KEY
+from services.cloudinary import MAX_FILE_SIZE, SIGNATURE_BYTES, matches_signature, validate_document
+from services.storage import get_storage
+
+DIRECT_UPLOAD_FOLDER = "scholar_base/documents/direct"
+TOKEN_SUBJECT = "direct-upload"
+TOKEN_CLAIMS = ("project_id", "account", "public_id", "size", "content_type")
+# Served for raw files Cloudinary has no type for; the leading bytes still get checked.
+UNTYPED_CONTENT = {None, "application/octet-stream"}
+
+
+def _account_ref(account) -> str:
+    return f"{account.role.value}:{account.id}"
+
+
+def sign_upload(project_id: int, account, filename: str, content_type: str, size: int,
+                now: Optional[float] = None) -> dict:
+    validate_document(filename, content_type, size)
+    cfg = cloudinary.config()
+    if not (cfg.cloud_name and cfg.api_key and cfg.api_secret):
+        raise HTTPException(status_code=503, detail="Direct uploads are not configured")
+
+    timestamp = int(now if now is not None else time.time())
+    public_id = f"{uuid.uuid4().hex}{os.path.splitext(filename)[1].lower()}"
+    params = {"folder": DIRECT_UPLOAD_FOLDER, "public_id": public_id, "timestamp": timestamp}
+    signature = api_sign_request(params, cfg.api_secret, cfg.signature_algorithm or "sha1")
+
+    expires_at = timestamp + config.DIRECT_UPLOAD_TTL_SECONDS
+    upload_token = jwt.encode({
+        "sub": TOKEN_SUBJECT,
+        "project_id": project_id,
+        "account": _account_ref(account),
+        "public_id": f"{DIRECT_UPLOAD_FOLDER}/{public_id}",
+        "size": size,
+        "content_type": content_type,
+        "exp": expires_at,
+    }, SECRET_KEY, algorithm=ALGORITHM)
+
+    return {
+        "upload_url": cloudinary_api_url("upload", resource_type="raw"),
+        "fields": {**{key: str(value) for key, value in params.items()},
+                   "api_key": cfg.api_key, "signature": signature},
+        "upload_token": upload_token,
+        "expires_at": expires_at,
+    }
+
+
+def read_upload_token(upload_token: str) -> dict:
+    try:
+        claims = jwt.decode(upload_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Invalid or expired upload token")
+    if claims.get("sub") != TOKEN_SUBJECT or any(claim not in claims for claim in TOKEN_CLAIMS):
+        raise HTTPException(status_code=400, detail="Invalid or expired upload token")
+    return claims
+
+
+def confirm_upload(claims: dict, account, public_id: str, version, signature: str) -> str:
+    """Check a finished direct upload and return the URL to store on the project."""
+    if claims["account"] != _account_ref(account):
+        raise HTTPException(status_code=403, detail="Upload token was issued to another account")
+    if public_id != claims["public_id"]:
+        raise HTTPException(status_code=400, detail="Uploaded object does not match the upload token")
+    if not verify_api_response_signature(public_id, version, signature):
+        raise HTTPException(status_code=400, detail="Invalid upload signature")
+
+    storage = get_storage()
+    document_url = cloudinary_url(public_id, resource_type="raw", secure=True)[0]
+    stat = storage.stat(document_url)
+    if stat is None:
+        raise HTTPException(status_code=404, detail="Uploaded document not found")
+    size, stored_type = stat
+    if size != claims["size"] or size > MAX_FILE_SIZE:
+        cloudinary_destroy(public_id, resource_type="raw", invalidate=True)
+        raise HTTPException(
+            status_code=413 if size > MAX_FILE_SIZE else 400,
+            detail="Uploaded document does not match the declared size"
+        )
+
+    try:
+        head = storage.read_prefix(document_url, SIGNATURE_BYTES)
+    except requests.RequestException:
+        raise HTTPException(status_code=502, detail="Could not read the uploaded document")
+    # The public id keeps the extension of the filename declared at signing.
+    extension = os.path.splitext(public_id)[1].lower()
+    if (stored_type not in UNTYPED_CONTENT and stored_type != claims["content_type"]) or not matches_signature(extension, head):
+        cloudinary_destroy(public_id, resource_type="raw", invalidate=True)
+        raise HTTPException(status_code=400, detail="Uploaded document does not match the declared type")
+    return document_url
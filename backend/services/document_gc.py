@@ -0,0 +1,176 @@
+"""Garbage collection of documents that no project references.
+
+The collector loads the set of storage keys referenced by
+``Project.document_url``. It then pages through the storage backend and
+deletes every object outside that set in batches through the provider's
+bulk-delete API. Listing and deleting both count against
+``GC_CALLS_PER_MINUTE``; the Cloudinary Admin API is rate limited per hour.
+
+Objects younger than ``GC_MIN_AGE_HOURS`` are left alone, because they may
+belong to an upload that hasn't been attached yet. Each batch is checked
+against the database once more right before it is deleted.
+
+After every page the listing cursor and the running report are saved to a
+checkpoint, so an interrupted run picks up where it stopped. Dry runs
+report what would be deleted and never touch the checkpoint.
+
+    python -m services.document_gc --dry-run
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set
+
+from sqlalchemy import select
+from sqlmodel import Session
+
+from config import config
+from models.projects import Project
+from services.checkpoint import Checkpoint
+from services.storage import StorageBackend, StoredEntry, get_storage
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "document_gc"
+REPORT_SAMPLE_SIZE = 100
+
+
+class RateLimiter:
+    def __init__(self, calls_per_minute: float):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self._next_call = 0.0
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if now < self._next_call:
+            time.sleep(self._next_call - now)
+            now = self._next_call
+        self._next_call = now + self.interval
+
+
+def referenced_keys(session: Session, storage: StorageBackend) -> Set[str]:
+    statement = select(Project.document_url).where(Project.document_url.isnot(None))
+    keys = set()
+    for document_url in session.execute(statement.execution_options(yield_per=1000)).scalars():
+        key = storage.key_for_url(document_url)
+        if key:
+            keys.add(key)
+    return keys
+
+
+def _still_referenced(session: Session, entries: List[StoredEntry]) -> Set[str]:
+    urls = {entry.url: entry.key for entry in entries}
+    statement = select(Project.document_url).where(Project.document_url.in_(list(urls)))
+    return {urls[url] for url in session.execute(statement).scalars()}
+
+
+def _new_report(dry_run: bool) -> dict:
+    return {
+        "dry_run": dry_run,
+        "pages": 0,
+        "scanned": 0,
+        "skipped_recent": 0,
+        "orphans": 0,
+        "deleted": 0,
+        "failed": 0,
+        "orphan_sample": [],
+        "failed_sample": [],
+        "completed": False,
+    }
+
+
+def collect_orphans(
+    session: Session,
+    storage: Optional[StorageBackend] = None,
+    dry_run: bool = False,
+    max_pages: Optional[int] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    limiter: Optional[RateLimiter] = None,
+    now: Optional[datetime] = None,
+) -> dict:
+    storage = storage or get_storage()
+    limiter = limiter or RateLimiter(config.GC_CALLS_PER_MINUTE)
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(hours=config.GC_MIN_AGE_HOURS)
+    started = time.perf_counter()
+
+    state = checkpoint.load() if checkpoint and not dry_run else {}
+    cursor = state.get("cursor")
+    report = state.get("report") or _new_report(dry_run)
+    if cursor:
+        logger.info(f"Resuming document GC from checkpoint after {report['pages']} pages")
+
+    referenced = referenced_keys(session, storage)
+    pages_this_run = 0
+    while True:
+        limiter.wait()
+        entries, cursor = storage.list_objects(cursor, config.GC_PAGE_SIZE)
+        report["pages"] += 1
+        report["scanned"] += len(entries)
+        pages_this_run += 1
+
+        orphans = [entry for entry in entries if entry.key not in referenced]
+        recent = [entry for entry in orphans if entry.created_at > cutoff]
+        orphans = [entry for entry in orphans if entry.created_at <= cutoff]
+        report["skipped_recent"] += len(recent)
+        if orphans:
+            # A project may have picked up one of these since the reference scan.
+            in_use = _still_referenced(session, orphans)
+            orphans = [entry for entry in orphans if entry.key not in in_use]
+
+        report["orphans"] += len(orphans)
+        room = REPORT_SAMPLE_SIZE - len(report["orphan_sample"])
+        report["orphan_sample"].extend(entry.key for entry in orphans[:max(room, 0)])
+
+        if not dry_run:
+            for start in range(0, len(orphans), storage.max_delete_batch):
+                batch = [entry.key for entry in orphans[start:start + storage.max_delete_batch]]
+                limiter.wait()
+                try:
+                    deleted, failed = storage.delete_many(batch)
+                except Exception as e:
+                    logger.error(f"Bulk delete of {len(batch)} documents failed: {e}")
+                    deleted, failed = [], batch
+                report["deleted"] += len(deleted)
+                report["failed"] += len(failed)
+                room = REPORT_SAMPLE_SIZE - len(report["failed_sample"])
+                report["failed_sample"].extend(failed[:max(room, 0)])
+
+        if cursor is None:
+            report["completed"] = True
+            if checkpoint and not dry_run:
+                checkpoint.clear()
+            break
+        if checkpoint and not dry_run:
+            checkpoint.save({"cursor": cursor, "report": report})
+        if max_pages and pages_this_run >= max_pages:
+            break
+
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        f"Document GC {'dry run ' if dry_run else ''}finished: scanned {report['scanned']}, "
+        f"orphans {report['orphans']}, deleted {report['deleted']}, failed {report['failed']}"
+    )
+    return report
+
+
+def main():
+    from models.database import engine
+
+    parser = argparse.ArgumentParser(description="Delete stored documents that no project references.")
+    parser.add_argument("--dry-run", action="store_true", help="report orphans without deleting them")
+    parser.add_argument("--max-pages", type=int, default=None, help="stop after this many listing pages")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and start from the beginning")
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint(CHECKPOINT_NAME)
+    if args.reset:
+        checkpoint.clear()
+    with Session(engine) as session:
+        report = collect_orphans(session, dry_run=args.dry_run, max_pages=args.max_pages, checkpoint=checkpoint)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
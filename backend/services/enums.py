@@ -35,4 +35,10 @@ class Status(str,enum.Enum):
     UNDER_REVIEW = "Under Review"
     APPROVED = "Approved"
     REJECTED = "Rejected"
+
+
+class UploadState(str,enum.Enum):
+    PENDING = "pending"
+    UPLOADED = "uploaded"
+    FAILED = "failed"
     
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""Column-projection read path for high-volume listings.
+
+Listing endpoints only copy a handful of columns into response dicts, so instead
+of materializing identity-mapped ORM instances (plus one lookup per row for the
+related accounts) they run a single Core ``select()`` over the needed columns and
+wrap each result row in a slotted tuple that serializes straight to a dict.
+
+Account listings get their per-account aggregates (project counts, latest
+project) from one grouped query each rather than one query per account.
+"""
+from datetime import datetime
+from typing import Collection, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.sql import Select
+from sqlmodel import Session
+
+from models.account import StudentAccount, SupervisorAccount
+from models.projects import Project
+from services.enums import Role, Status
+
+
+class ProjectRow(NamedTuple):
+    id: int
+    title: str
+    year: str
+    description: str
+    file_url: Optional[str]
+    document_url: Optional[str]
+    status: Status
+    created_at: datetime
+    updated_at: datetime
+    student_id: int
+    supervisor_id: Optional[int]
+    tags: list
+
+
+class StudentSummaryRow(NamedTuple):
+    id: int
+    name: str
+    email: str
+    matric_no: str
+    department: Optional[str]
+    role: Role
+
+
+class SupervisorSummaryRow(NamedTuple):
+    id: int
+    name: str
+    email: str
+    department: Optional[str]
+    role: Role
+    faculty: Optional[str]
+    title: Optional[str]
+
+
+PROJECT_COLUMNS = tuple(getattr(Project, field) for field in ProjectRow._fields)
+STUDENT_SUMMARY_COLUMNS = tuple(getattr(StudentAccount, field) for field in StudentSummaryRow._fields)
+SUPERVISOR_SUMMARY_COLUMNS = tuple(getattr(SupervisorAccount, field) for field in SupervisorSummaryRow._fields)
+
+_PROJECT_END = len(PROJECT_COLUMNS)
+_STUDENT_END = _PROJECT_END + len(STUDENT_SUMMARY_COLUMNS)
+_SUPERVISOR_END = _STUDENT_END + len(SUPERVISOR_SUMMARY_COLUMNS)
+
+
+class ProjectListingRow:
+    __slots__ = ("project", "student", "supervisor")
+
+    def __init__(
+        self,
+        project: ProjectRow,
+        student: Optional[StudentSummaryRow] = None,
+        supervisor: Optional[SupervisorSummaryRow] = None,
+    ):
+        self.project = project
+        self.student = student
+        self.supervisor = supervisor
+
+    def to_dict(self) -> dict:
+        data = self.project._asdict()
+        if self.student is not None:
+            data["student"] = self.student._asdict()
+        if self.supervisor is not None:
+            data["supervisor"] = self.supervisor._asdict()
+        return data
+
+
+def project_listing_statement(include_supervisor: bool = False) -> Select:
+    """Base listing query; callers add their own ``where``/paging clauses."""
+    statement = (
+        select(*PROJECT_COLUMNS, *STUDENT_SUMMARY_COLUMNS)
+        .outerjoin(StudentAccount, StudentAccount.id == Project.student_id)
+    )
+    if include_supervisor:
+        statement = statement.add_columns(*SUPERVISOR_SUMMARY_COLUMNS).outerjoin(
+            SupervisorAccount, SupervisorAccount.id == Project.supervisor_id
+        )
+    return statement
+
+
+def fetch_project_listing(session: Session, statement: Select) -> List[ProjectListingRow]:
+    rows = []
+    for row in session.execute(statement):
+        student = None
+        supervisor = None
+        if row[_PROJECT_END] is not None:
+            student = StudentSummaryRow._make(row[_PROJECT_END:_STUDENT_END])
+        if len(row) > _STUDENT_END and row[_STUDENT_END] is not None:
+            supervisor = SupervisorSummaryRow._make(row[_STUDENT_END:_SUPERVISOR_END])
+        rows.append(ProjectListingRow(ProjectRow._make(row[:_PROJECT_END]), student, supervisor))
+    return rows
+
+
+def serialize_listing(rows: Iterable[ProjectListingRow]) -> List[dict]:
+    return [row.to_dict() for row in rows]
+
+
+class LatestProjectRow(NamedTuple):
+    id: int
+    title: str
+    status: Status
+    created_at: datetime
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "title": self.title,
+            "status": self.status.value,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+def project_counts(session: Session, column, ids: Collection[int]) -> Dict[int, int]:
+    """Projects per ``column`` value (``Project.student_id`` or ``Project.supervisor_id``) for ``ids``."""
+    if not ids:
+        return {}
+    statement = select(column, func.count(Project.id)).where(column.in_(ids)).group_by(column)
+    return dict(session.execute(statement).all())
+
+
+def latest_projects(session: Session, student_ids: Collection[int]) -> Dict[int, LatestProjectRow]:
+    """Each student's most recent project, in one query."""
+    if not student_ids:
+        return {}
+    rank = func.row_number().over(
+        partition_by=Project.student_id,
+        order_by=(Project.created_at.desc(), Project.id.desc()),
+    ).label("rank")
+    ranked = (
+        select(Project.student_id, Project.id, Project.title, Project.status, Project.created_at, rank)
+        .where(Project.student_id.in_(student_ids))
+        .subquery()
+    )
+    statement = select(
+        ranked.c.student_id, ranked.c.id, ranked.c.title, ranked.c.status, ranked.c.created_at
+    ).where(ranked.c.rank == 1)
+    return {row[0]: LatestProjectRow._make(row[1:]) for row in session.execute(statement)}
@@ -0,0 +1,200 @@
+"""Resumable chunked document uploads.
+
+An upload session is a pair of files in ``UPLOAD_SPOOL_DIR/resumable``: the
+bytes received so far (``<id>.part``) and a small JSON record of who is
+uploading what (``<id>.json``). The size of the ``.part`` file is the upload
+offset. A client that loses its connection asks for the offset and resumes
+from there. Chunks go from the request stream to disk through a buffer of
+at most ``WRITE_BUFFER`` bytes, so memory use doesn't depend on file size.
+On finalize the leading bytes must fit the declared extension, as for
+direct uploads.
+"""
+import fcntl
+import json
+import os
+import re
+import time
+import uuid
+from typing import AsyncIterator, BinaryIO, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, UploadFile
+
+from config import config
+from services.cloudinary import SIGNATURE_BYTES, matches_signature, validate_document
+from services.storage import store_upload
+
+WRITE_BUFFER = 1024 * 1024
+
+_upload_id_pattern = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _session_dir() -> str:
+    return os.path.abspath(os.path.join(config.UPLOAD_SPOOL_DIR, "resumable"))
+
+
+def _paths(upload_id: str):
+    base = os.path.join(_session_dir(), upload_id)
+    return f"{base}.part", f"{base}.json"
+
+
+def _account_ref(account) -> str:
+    return f"{account.role.value}:{account.id}"
+
+
+def create_session(project_id: int, account, filename: str, content_type: str, length: int) -> dict:
+    validate_document(filename, content_type, length)
+    os.makedirs(_session_dir(), exist_ok=True)
+    purge_expired_sessions()
+
+    upload_id = uuid.uuid4().hex
+    data_path, meta_path = _paths(upload_id)
+    meta = {
+        "upload_id": upload_id,
+        "project_id": project_id,
+        "account": _account_ref(account),
+        "filename": filename,
+        "content_type": content_type,
+        "length": length,
+        "expires_at": int(time.time()) + config.RESUMABLE_UPLOAD_TTL_SECONDS,
+    }
+    open(data_path, "wb").close()
+    with open(meta_path, "w") as meta_file:
+        json.dump(meta, meta_file)
+    return meta
+
+
+def load_session(upload_id: str, account) -> dict:
+    if not _upload_id_pattern.match(upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+    data_path, meta_path = _paths(upload_id)
+    try:
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if meta["expires_at"] < time.time():
+        discard_session(upload_id)
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if meta["account"] != _account_ref(account):
+        raise HTTPException(status_code=403, detail="Upload belongs to another account")
+    return meta
+
+
+def current_offset(upload_id: str) -> int:
+    try:
+        return os.path.getsize(_paths(upload_id)[0])
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+
+def _open_for_append(data_path: str) -> BinaryIO:
+    try:
+        handle = open(data_path, "ab")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    try:
+        # One writer per session, across all API workers.
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        raise HTTPException(status_code=409, detail="Another request is writing to this upload")
+    return handle
+
+
+def _write(handle: BinaryIO, data: bytes) -> None:
+    handle.write(data)
+    handle.flush()
+
+
+async def append_chunks(upload_id: str, meta: dict, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """Append the request body at ``offset`` and return the new offset.
+
+    Whatever arrived before a disconnect is kept, so the client can resume.
+    """
+    handle = await run_in_threadpool(_open_for_append, _paths(upload_id)[0])
+    try:
+        written = handle.seek(0, os.SEEK_END)
+        if offset != written:
+            raise HTTPException(
+                status_code=409,
+                detail="Upload-Offset does not match the current offset",
+                headers={"Upload-Offset": str(written)},
+            )
+
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                if written + len(buffer) + len(chunk) > meta["length"]:
+                    raise HTTPException(status_code=413, detail="Chunk exceeds the declared upload length")
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER:
+                    await run_in_threadpool(_write, handle, bytes(buffer))
+                    written += len(buffer)
+                    buffer.clear()
+        finally:
+            if buffer:
+                await run_in_threadpool(_write, handle, bytes(buffer))
+                written += len(buffer)
+        return written
+    finally:
+        await run_in_threadpool(handle.close)
+
+
+async def finalize_session(upload_id: str, meta: dict) -> str:
+    """Validate the completed upload, store it and return the document URL."""
+    data_path, _ = _paths(upload_id)
+    offset = current_offset(upload_id)
+    if offset != meta["length"]:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload is incomplete",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    with open(data_path, "rb") as spooled:
+        if not matches_signature(os.path.splitext(meta["filename"])[1].lower(), spooled.read(SIGNATURE_BYTES)):
+            discard_session(upload_id)
+            raise HTTPException(status_code=400, detail="Uploaded document does not match the declared type")
+        spooled.seek(0)
+        document = UploadFile(
+            spooled,
+            size=offset,
+            filename=meta["filename"],
+            headers=Headers({"content-type": meta["content_type"]}),
+        )
+        # store_upload runs validate_file on the spooled document before storing it.
+        document_url = await store_upload(document)
+    discard_session(upload_id)
+    return document_url
+
+
+def discard_session(upload_id: str) -> None:
+    for path in _paths(upload_id):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def purge_expired_sessions(now: Optional[float] = None) -> int:
+    now = now if now is not None else time.time()
+    removed = 0
+    try:
+        names = os.listdir(_session_dir())
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        upload_id = name[:-len(".json")]
+        try:
+            with open(os.path.join(_session_dir(), name)) as meta_file:
+                expired = json.load(meta_file)["expires_at"] < now
+        except (OSError, ValueError, KeyError):
+            continue
+        if expired:
+            discard_session(upload_id)
+            removed += 1
+    return removed
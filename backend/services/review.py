@@ -0,0 +1,69 @@
+"""Reviewing many projects in one request.
+
+Ownership for the whole batch is checked with a single query over the
+requested ids. The accepted reviews are then written with one bulk UPDATE
+by primary key and committed together, so a batch of fifty costs a handful
+of statements instead of a get, commit and refresh per project.
+
+Each item gets its own outcome; a bad item never fails the rest:
+
+- ``updated``: the review was applied
+- ``not_found``: no project with that id
+- ``forbidden``: a supervisor reviewing a project they don't supervise
+- ``invalid_status``: only Approved and Rejected are review outcomes
+- ``duplicate``: the project already appeared earlier in the batch
+"""
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import select, update
+from sqlmodel import Session
+
+from models.projects import Project
+from schemas.project import ProjectReviewItem, ProjectReviewResult
+from services.cache import invalidate, project_tags
+from services.enums import Status
+
+REVIEW_STATUSES = (Status.APPROVED, Status.REJECTED)
+
+
+def review_projects(session: Session, reviews: List[ProjectReviewItem], current_user) -> List[ProjectReviewResult]:
+    project_ids = {review.project_id for review in reviews}
+    statement = select(Project.id, Project.student_id, Project.supervisor_id).where(Project.id.in_(project_ids))
+    owners = {row.id: row for row in session.execute(statement)}
+
+    is_supervisor = current_user.role.value == "Supervisor"
+    now = datetime.now(timezone.utc)
+    results, changes, tags, seen = [], [], set(), set()
+    for review in reviews:
+        project = owners.get(review.project_id)
+        if review.project_id in seen:
+            outcome, detail = "duplicate", "Project already reviewed earlier in this batch"
+        elif project is None:
+            outcome, detail = "not_found", "Project not found"
+        elif is_supervisor and project.supervisor_id != current_user.id:
+            outcome, detail = "forbidden", "Supervisors can only review projects they supervise"
+        elif review.status not in REVIEW_STATUSES:
+            outcome, detail = "invalid_status", "Invalid review status"
+        else:
+            outcome, detail = "updated", None
+            changes.append({
+                "id": review.project_id,
+                "status": review.status,
+                "review_comment": review.review_comment,
+                "updated_at": now,
+            })
+            tags.update(project_tags(project))
+        seen.add(review.project_id)
+        results.append(ProjectReviewResult(
+            project_id=review.project_id,
+            outcome=outcome,
+            status=review.status if outcome == "updated" else None,
+            detail=detail,
+        ))
+
+    if changes:
+        session.execute(update(Project), changes)
+        session.commit()
+        invalidate(*tags)
+    return results
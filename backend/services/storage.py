@@ -0,0 +1,507 @@
+"""Document storage backends.
+
+Documents are addressed by the SHA-256 of their content. A resubmitted file is
+stored once, and two students uploading different ``report.pdf`` files never
+overwrite each other. ``STORAGE_BACKEND`` picks the backend:
+
+* ``cloudinary``: raw uploads whose public id is the content hash, uploaded
+  with ``overwrite=False`` and skipped entirely when the object already exists.
+* ``local``: files under ``LOCAL_STORAGE_ROOT``, served by ``routers.documents``.
+  Each object keeps a reference count, and the bytes are removed only when the
+  last reference is released.
+
+Projects only store the URL returned by ``put``. Callers give up a project's
+reference with ``release_document``. Cloudinary objects are deleted
+DOCUMENT_RELEASE_GRACE_SECONDS later by ``tasks.document_release``, because
+an upload of the same content may be about to reference the object again.
+"""
+import functools
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+import fcntl
+import requests
+from cloudinary import api as cloudinary_api
+from cloudinary.exceptions import Error as CloudinaryError
+from cloudinary.uploader import destroy as cloudinary_destroy
+from cloudinary.utils import cloudinary_url
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from config import config
+from core.metrics import STORAGE_UPLOAD_FAILURES, record_storage_upload
+from core.tracing import span
+from models.projects import Project
+from services.cache import invalidate, project_tags
+from services.cloudinary import _upload_slot, _upload_stream, delete_file_from_cloudinary, validate_file
+from services.enums import UploadState
+
+logger = logging.getLogger(__name__)
+
+HASH_BUFFER = 1024 * 1024
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class StoredObject(NamedTuple):
+    key: str
+    url: str
+    size: int
+    created: bool  # False when identical content was already stored
+
+
+def hash_file(fileobj: BinaryIO) -> Tuple[str, int]:
+    fileobj.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := fileobj.read(HASH_BUFFER):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+class StoredEntry(NamedTuple):
+    key: str
+    url: str
+    created_at: datetime
+
+
+def _measured(put):
+    """Record the duration and size of every ``put`` for ``/metrics``, and trace it."""
+    @functools.wraps(put)
+    def wrapper(self, fileobj: BinaryIO, filename: str) -> StoredObject:
+        started = time.perf_counter()
+        with span("storage.put", backend=self.name, filename=filename) as put_span:
+            try:
+                stored = put(self, fileobj, filename)
+            except Exception:
+                STORAGE_UPLOAD_FAILURES.labels(self.name).inc()
+                raise
+            if put_span is not None:
+                put_span.set_attribute("size", stored.size)
+                put_span.set_attribute("created", stored.created)
+        record_storage_upload(self.name, stored.size, time.perf_counter() - started)
+        return stored
+    return wrapper
+
+
+class StorageBackend(ABC):
+    name = ""
+    # Whether the backend counts references itself. If it doesn't, shared
+    # content is only deleted once no project points at it any more.
+    refcounted = False
+    # Largest batch delete_many accepts.
+    max_delete_batch = 100
+
+    @abstractmethod
+    def put(self, fileobj: BinaryIO, filename: str) -> StoredObject:
+        ...
+
+    @abstractmethod
+    def stream(self, url: str) -> Iterator[bytes]:
+        ...
+
+    @abstractmethod
+    def delete(self, url: str) -> bool:
+        ...
+
+    @abstractmethod
+    def exists(self, url: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, url: str) -> Optional[int]:
+        """Stored size in bytes, or None if the object doesn't exist."""
+
+    @abstractmethod
+    def key_for_url(self, url: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def list_objects(self, cursor: Optional[str] = None, limit: int = 500) -> Tuple[List[StoredEntry], Optional[str]]:
+        """One page of stored objects and the cursor for the next page (None at the end)."""
+
+    @abstractmethod
+    def delete_many(self, keys: List[str]) -> Tuple[List[str], List[str]]:
+        """Unconditionally remove ``keys``; returns ``(deleted, failed)``."""
+
+
+class CloudinaryStorage(StorageBackend):
+    name = "cloudinary"
+    _url_pattern = re.compile(r"https?://res\.cloudinary\.com/[^/]+/([^/]+)/upload/(?:v\d+/)?(.+)$")
+
+    def __init__(self, folder: str = "scholar_base/documents"):
+        self.folder = folder
+
+    def _public_id(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        match = self._url_pattern.match(url)
+        if not match:
+            return None, None
+        return match.group(2), match.group(1)
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        public_id, resource_type = self._public_id(url)
+        return public_id if resource_type == "raw" else None
+
+    @_measured
+    def put(self, fileobj: BinaryIO, filename: str) -> StoredObject:
+        sha256, size = hash_file(fileobj)
+        # Raw resources keep the extension in their public id.
+        public_id = f"{sha256}{os.path.splitext(filename)[1].lower()}"
+        url = cloudinary_url(f"{self.folder}/{public_id}", resource_type="raw", secure=True)[0]
+        if self.exists(url):
+            return StoredObject(sha256, url, size, False)
+
+        _upload_stream(fileobj, filename, self.folder, public_id, overwrite=False)
+        # Return the unversioned URL, so every project that shares this content
+        # stores the same string and release_document can match it.
+        return StoredObject(sha256, url, size, True)
+
+    def stream(self, url: str) -> Iterator[bytes]:
+        with requests.get(url, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            yield from response.iter_content(STREAM_CHUNK_SIZE)
+
+    def delete(self, url: str) -> bool:
+        public_id, resource_type = self._public_id(url)
+        if resource_type != "raw":
+            # Documents uploaded before content addressing.
+            return delete_file_from_cloudinary(url)
+        try:
+            with span("cloudinary.delete", public_id=public_id, resource_type="raw"):
+                result = cloudinary_destroy(public_id, resource_type="raw", invalidate=True)
+        except CloudinaryError as e:
+            logger.error(f"Failed to delete {public_id} from Cloudinary: {e}")
+            return False
+        return result.get("result") in ("ok", "not found")
+
+    def exists(self, url: str) -> bool:
+        # A HEAD on the delivery URL goes to the CDN. Unlike the Admin API, it is not rate limited.
+        return self.size(url) is not None
+
+    def size(self, url: str) -> Optional[int]:
+        stat = self.stat(url)
+        return stat[0] if stat else None
+
+    def stat(self, url: str) -> Optional[Tuple[int, Optional[str]]]:
+        """Size and Content-Type (without parameters) from a HEAD, or None if the object doesn't exist."""
+        try:
+            response = requests.head(url, timeout=10)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower() or None
+        return int(response.headers.get("Content-Length", 0)), content_type
+
+    def read_prefix(self, url: str, length: int) -> bytes:
+        """The first ``length`` bytes of the object, fetched with a Range request."""
+        with requests.get(url, headers={"Range": f"bytes=0-{length - 1}"}, stream=True, timeout=10) as response:
+            response.raise_for_status()
+            return next(response.iter_content(length), b"")[:length]
+
+    def list_objects(self, cursor: Optional[str] = None, limit: int = 500) -> Tuple[List[StoredEntry], Optional[str]]:
+        options = {"next_cursor": cursor} if cursor else {}
+        result = cloudinary_api.resources(
+            resource_type="raw", type="upload", prefix=f"{self.folder}/", max_results=limit, **options
+        )
+        entries = [
+            StoredEntry(
+                resource["public_id"],
+                cloudinary_url(resource["public_id"], resource_type="raw", secure=True)[0],
+                datetime.fromisoformat(resource["created_at"].replace("Z", "+00:00")),
+            )
+            for resource in result.get("resources", [])
+        ]
+        return entries, result.get("next_cursor")
+
+    def delete_many(self, keys: List[str]) -> Tuple[List[str], List[str]]:
+        result = cloudinary_api.delete_resources(keys[:self.max_delete_batch], resource_type="raw", invalidate=True)
+        outcome = result.get("deleted", {})
+        deleted = [key for key in keys if outcome.get(key) in ("deleted", "not_found")]
+        return deleted, [key for key in keys if outcome.get(key) not in ("deleted", "not_found")]
+
+
+class LocalStorage(StorageBackend):
+    name = "local"
+    refcounted = True
+    max_delete_batch = 1000
+
+    _key_pattern = re.compile(r"^[0-9a-f]{64}$")
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        prefix = f"{self.base_url}/"
+        if not url.startswith(prefix):
+            return None
+        key = url[len(prefix):]
+        return key if self._key_pattern.match(key) else None
+
+    def url_for_key(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], key)
+
+    def _meta_path(self, key: str) -> str:
+        return f"{self._object_path(key)}.json"
+
+    @contextmanager
+    def _locked(self):
+        # Refcounts are shared by every API and worker process on the host.
+        with self._lock, open(os.path.join(self.root, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write_meta(self, key: str, meta: dict) -> None:
+        path = self._meta_path(key)
+        with open(f"{path}.part", "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(f"{path}.part", path)
+
+    def metadata(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._meta_path(key)) as meta_file:
+                return json.load(meta_file)
+        except FileNotFoundError:
+            return None
+
+    @_measured
+    def put(self, fileobj: BinaryIO, filename: str) -> StoredObject:
+        # Hash while copying so the upload is read once.
+        fileobj.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.root, "tmp", uuid.uuid4().hex)
+        try:
+            with open(tmp_path, "wb") as tmp:
+                while chunk := fileobj.read(HASH_BUFFER):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    tmp.write(chunk)
+            key = digest.hexdigest()
+
+            with self._locked():
+                meta = self.metadata(key)
+                if meta is not None and os.path.exists(self._object_path(key)):
+                    meta["refs"] += 1
+                    self._write_meta(key, meta)
+                    return StoredObject(key, self.url_for_key(key), size, False)
+
+                os.makedirs(os.path.dirname(self._object_path(key)), exist_ok=True)
+                os.replace(tmp_path, self._object_path(key))
+                self._write_meta(key, {
+                    "size": size,
+                    "filename": filename,
+                    "content_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                    "refs": 1,
+                })
+                return StoredObject(key, self.url_for_key(key), size, True)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stream(self, url: str) -> Iterator[bytes]:
+        key = self.key_for_url(url)
+        if key is None:
+            raise FileNotFoundError(url)
+        with open(self._object_path(key), "rb") as stored:
+            while chunk := stored.read(STREAM_CHUNK_SIZE):
+                yield chunk
+
+    def delete(self, url: str) -> bool:
+        key = self.key_for_url(url)
+        if key is None:
+            return False
+        with self._locked():
+            meta = self.metadata(key)
+            if meta is None:
+                # Already gone; nothing is left to release.
+                return True
+            meta["refs"] -= 1
+            if meta["refs"] > 0:
+                self._write_meta(key, meta)
+                return True
+            for path in (self._object_path(key), self._meta_path(key)):
+                if os.path.exists(path):
+                    os.remove(path)
+        return True
+
+    def exists(self, url: str) -> bool:
+        key = self.key_for_url(url)
+        return key is not None and os.path.exists(self._object_path(key))
+
+    def size(self, url: str) -> Optional[int]:
+        key = self.key_for_url(url)
+        try:
+            return os.path.getsize(self._object_path(key)) if key else None
+        except FileNotFoundError:
+            return None
+
+    def list_objects(self, cursor: Optional[str] = None, limit: int = 500) -> Tuple[List[StoredEntry], Optional[str]]:
+        # Keys are listed in order, so the cursor is simply the last key returned.
+        objects_dir = os.path.join(self.root, "objects")
+        try:
+            shards = sorted(os.listdir(objects_dir))
+        except FileNotFoundError:
+            return [], None
+        entries = []
+        for shard in shards:
+            if cursor and shard < cursor[:2]:
+                continue
+            for key in sorted(os.listdir(os.path.join(objects_dir, shard))):
+                if not self._key_pattern.match(key) or (cursor and key <= cursor):
+                    continue
+                try:
+                    mtime = os.path.getmtime(self._object_path(key))
+                except FileNotFoundError:
+                    continue
+                entries.append(StoredEntry(key, self.url_for_key(key), datetime.fromtimestamp(mtime, timezone.utc)))
+                if len(entries) == limit:
+                    return entries, key
+        return entries, None
+
+    def delete_many(self, keys: List[str]) -> Tuple[List[str], List[str]]:
+        deleted, failed = [], []
+        with self._locked():
+            for key in keys:
+                if not self._key_pattern.match(key):
+                    failed.append(key)
+                    continue
+                for path in (self._object_path(key), self._meta_path(key)):
+                    if os.path.exists(path):
+                        os.remove(path)
+                deleted.append(key)
+        return deleted, failed
+
+
+@lru_cache()
+def get_storage() -> StorageBackend:
+    if config.STORAGE_BACKEND == "local":
+        return LocalStorage(config.LOCAL_STORAGE_ROOT, config.LOCAL_STORAGE_BASE_URL)
+    return CloudinaryStorage()
+
+
+async def store_upload(file: UploadFile) -> str:
+    """Validate and store an uploaded document and return its URL."""
+    validate_file(file)
+
+    try:
+        async with _upload_slot():
+            stored = await run_in_threadpool(get_storage().put, file.file, file.filename or "document")
+        return stored.url
+
+    except CloudinaryError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to upload file: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected error during file upload: {str(e)}"
+        )
+    finally:
+        await file.seek(0)
+
+
+def release_document(session, document_url: Optional[str], exclude_project_id: Optional[int] = None) -> bool:
+    """Drop one project's reference to ``document_url``.
+
+    Call this after the project's ``document_url`` was replaced or the project
+    was deleted. Pass ``exclude_project_id`` if that change isn't flushed yet.
+    """
+    if not document_url:
+        return False
+    storage = get_storage()
+    if not storage.refcounted:
+        statement = select(Project.id).where(Project.document_url == document_url)
+        if exclude_project_id is not None:
+            statement = statement.where(Project.id != exclude_project_id)
+        if session.execute(statement.limit(1)).first() is not None:
+            return True
+    return delete_released_document(document_url)
+
+
+def delete_released_document(document_url: str) -> bool:
+    """Delete a document whose last reference was just given up.
+
+    Refcounted backends drop the reference right away. Otherwise the
+    deletion is queued for after DOCUMENT_RELEASE_GRACE_SECONDS and checks the
+    references again when it runs. If it can't be queued, the orphan GC
+    removes the object later.
+    """
+    storage = get_storage()
+    if storage.refcounted:
+        try:
+            with span("storage.release", backend=storage.name, url=document_url):
+                return storage.delete(document_url)
+        except Exception as e:
+            logger.error(f"Failed to release document {document_url}: {e}")
+            return False
+
+    from tasks.document_release import delete_unreferenced_document
+
+    try:
+        delete_unreferenced_document.apply_async(args=[document_url], countdown=config.DOCUMENT_RELEASE_GRACE_SECONDS)
+    except Exception as e:
+        logger.warning(f"Could not schedule deletion of {document_url}; leaving it to the orphan GC: {e}")
+        return False
+    return True
+
+
+def documents_to_release(session, references: List[Tuple[int, str]]) -> List[str]:
+    """Bulk form of ``release_document`` for ``(project_id, document_url)`` pairs.
+
+    Returns the URLs to pass to ``delete_released_document`` once all of those projects
+    have dropped their documents. The list is computed with one query and may
+    repeat a URL for refcounted backends.
+    """
+    urls = [document_url for _, document_url in references if document_url]
+    if get_storage().refcounted or not urls:
+        return urls
+    statement = select(Project.document_url).where(
+        Project.document_url.in_(set(urls)),
+        Project.id.notin_([project_id for project_id, _ in references]),
+    )
+    shared = set(session.execute(statement).scalars())
+    return sorted(set(urls) - shared)
+
+
+def attach_document(session, project: Project, document_url: str) -> Project:
+    """Point ``project`` at an already stored document and release the old one."""
+    replaced_document_url = project.document_url
+    project.document_url = document_url
+    project.upload_state = UploadState.UPLOADED
+    project.updated_at = datetime.now(timezone.utc)
+    session.add(project)
+    session.commit()
+    session.refresh(project)
+    release_document(session, replaced_document_url)
+    invalidate(*project_tags(project))
+
+    from tasks.project_expiry import schedule_project_expiry
+
+    schedule_project_expiry(project)
+    return project
@@ -0,0 +1,232 @@
+"""Bulk import of student accounts from CSV.
+
+The CSV is read as a stream, one chunk of ``IMPORT_CHUNK_SIZE`` rows at a
+time, so memory stays flat however large the intake is. Each chunk goes
+through the same steps:
+
+1. Every row is validated with ``StudentRegister``. The header must include
+   name, email, matric_no and password. department and level are optional.
+2. Emails and matric numbers are checked against the file so far and against
+   all three account tables with one set-based query each.
+3. Passwords are hashed on a process pool of ``IMPORT_HASH_WORKERS``
+   processes (0 means one per CPU). bcrypt is CPU-bound, so threads would
+   not help. The pool is created on first use and shared by every import in
+   the process, so concurrent imports queue for the same workers instead of
+   each spawning its own.
+4. The accepted rows are inserted with a single executemany and committed.
+
+Rows that fail are reported with their CSV line number. They never stop the
+rest of the import. A dry run stops after step 2, and ``created`` counts the
+rows that would have been created.
+
+    python -m services.student_import students.csv --dry-run
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, List, Optional, Set, TextIO
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from config import config
+from models.account import AdminAccount, StudentAccount, SupervisorAccount
+from schemas.auth import StudentRegister
+from services.auth import get_password_hash
+from services.enums import Role
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_COLUMNS = {"name", "email", "matric_no", "password"}
+
+
+def _existing_emails(session: Session, emails: Iterable[str]) -> Set[str]:
+    emails = list(emails)
+    if not emails:
+        return set()
+    statement = union_all(*(
+        select(model.email).where(model.email.in_(emails))
+        for model in (StudentAccount, SupervisorAccount, AdminAccount)
+    ))
+    return set(session.execute(statement).scalars())
+
+
+def _existing_matric_numbers(session: Session, matric_numbers: Iterable[str]) -> Set[str]:
+    matric_numbers = list(matric_numbers)
+    if not matric_numbers:
+        return set()
+    statement = select(StudentAccount.matric_no).where(StudentAccount.matric_no.in_(matric_numbers))
+    return set(session.execute(statement).scalars())
+
+
+@lru_cache(maxsize=None)
+def _hash_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawned rather than forked: the API process has threads whose locks a fork would copy.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _row_errors(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+
+class _Import:
+    def __init__(self, session: Session, dry_run: bool, pool: Optional[ProcessPoolExecutor], workers: int):
+        self.session = session
+        self.dry_run = dry_run
+        self.pool = pool
+        self.workers = workers
+        self.seen_emails: Set[str] = set()
+        self.seen_matric_numbers: Set[str] = set()
+        self.report = {"dry_run": dry_run, "rows": 0, "created": 0, "failed": 0, "errors": []}
+
+    def fail(self, line: int, email: Optional[str], errors: List[str]) -> None:
+        self.report["failed"] += 1
+        self.report["errors"].append({"line": line, "email": email, "errors": errors})
+
+    def hash_passwords(self, passwords: List[str]) -> List[str]:
+        if self.pool is None:
+            return [get_password_hash(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        try:
+            return list(self.pool.map(get_password_hash, passwords, chunksize=chunksize))
+        except BrokenProcessPool:
+            # A worker died; the next import gets a fresh pool.
+            _hash_pool.cache_clear()
+            raise
+
+    def process(self, chunk: List[tuple]) -> None:
+        taken_emails = _existing_emails(self.session, {student.email for _, student in chunk})
+        taken_matric_numbers = _existing_matric_numbers(self.session, {student.matric_no for _, student in chunk})
+
+        accepted = []
+        for line, student in chunk:
+            errors = []
+            if student.email in taken_emails:
+                errors.append("email: Email already registered")
+            elif student.email in self.seen_emails:
+                errors.append("email: Email appears earlier in the file")
+            if student.matric_no in taken_matric_numbers:
+                errors.append("matric_no: Matric number already registered")
+            elif student.matric_no in self.seen_matric_numbers:
+                errors.append("matric_no: Matric number appears earlier in the file")
+            self.seen_emails.add(student.email)
+            self.seen_matric_numbers.add(student.matric_no)
+            if errors:
+                self.fail(line, student.email, errors)
+            else:
+                accepted.append((line, student))
+
+        if not accepted or self.dry_run:
+            self.report["created"] += len(accepted)
+            return
+
+        hashes = self.hash_passwords([student.password for _, student in accepted])
+        now = datetime.utcnow()
+        rows = [
+            {
+                "name": student.name,
+                "role": Role.STUDENT,
+                "email": student.email,
+                "email_verified": False,
+                "department": student.department,
+                "hashed_password": hashed_password,
+                "created_at": now,
+                "matric_no": student.matric_no,
+                "level": student.level,
+            }
+            for (_, student), hashed_password in zip(accepted, hashes)
+        ]
+        try:
+            self.session.execute(insert(StudentAccount), rows)
+            self.session.commit()
+        except IntegrityError:
+            # Someone registered one of these accounts since the uniqueness check.
+            self.session.rollback()
+            for line, student in accepted:
+                self.fail(line, student.email, ["Conflicts with an account registered during the import"])
+            return
+        self.report["created"] += len(rows)
+
+
+def import_students(
+    session: Session,
+    stream: TextIO,
+    dry_run: bool = False,
+    chunk_size: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> dict:
+    chunk_size = chunk_size or config.IMPORT_CHUNK_SIZE
+    workers = workers or config.IMPORT_HASH_WORKERS or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    reader = csv.DictReader(stream)
+    columns = {column.strip() for column in reader.fieldnames or []}
+    missing = REQUIRED_COLUMNS - columns
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    pool = _hash_pool(workers) if workers > 1 and not dry_run else None
+    job = _Import(session, dry_run, pool, workers)
+    chunk = []
+    for record in reader:
+        job.report["rows"] += 1
+        # Blank cells count as missing, so an empty password fails validation.
+        values = {key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()}
+        values["role"] = Role.STUDENT
+        try:
+            student = StudentRegister(**values)
+        except ValidationError as e:
+            job.fail(reader.line_num, values.get("email") or None, _row_errors(e))
+            continue
+        chunk.append((reader.line_num, student))
+        if len(chunk) >= chunk_size:
+            job.process(chunk)
+            chunk = []
+    if chunk:
+        job.process(chunk)
+
+    report = job.report
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_minute"] = round(report["rows"] / report["seconds"] * 60) if report["seconds"] else None
+    logger.info(
+        f"Student import {'dry run ' if dry_run else ''}finished: {report['rows']} rows, "
+        f"{report['created']} created, {report['failed']} failed in {report['seconds']}s"
+    )
+    return report
+
+
+def main():
+    from models.database import engine
+    from services.cache import invalidate
+
+    parser = argparse.ArgumentParser(description="Create student accounts from a CSV file.")
+    parser.add_argument("csv_file", help="CSV with name, email, matric_no, password and optional department, level")
+    parser.add_argument("--dry-run", action="store_true", help="validate and check uniqueness without inserting")
+    parser.add_argument("--chunk-size", type=int, default=None, help="rows per uniqueness check and insert")
+    parser.add_argument("--workers", type=int, default=None, help="password hashing processes")
+    args = parser.parse_args()
+
+    with open(args.csv_file, newline="", encoding="utf-8-sig") as csv_file, Session(engine) as session:
+        try:
+            report = import_students(session, csv_file, args.dry_run, args.chunk_size, args.workers)
+        except HTTPException as e:
+            sys.exit(e.detail)
+    if report["created"] and not args.dry_run:
+        invalidate("students")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Two-tier cache: an in-process LRU (L1) in front of a shared store (L2).
+
+Every uvicorn worker keeps its own L1, so a write handled by one worker has to
+reach the others: ``TieredCache.invalidate`` deletes the keys from L2 and
+publishes them on an invalidation bus, and every subscribed worker evicts them
+from its L1 as soon as the message arrives. L1 entries also carry a short TTL
+so a lost message only means bounded staleness.
+"""
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional
+
+import orjson
+
+from config import config
+from services.cache import CacheBackend, InMemoryCacheBackend, RedisCacheBackend
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def evict(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class InvalidationBus(ABC):
+    @abstractmethod
+    def publish(self, keys: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[List[str]], None]) -> None:
+        ...
+
+
+class LocalInvalidationBus(InvalidationBus):
+    """Synchronous in-process fan-out; stands in for Redis pub/sub in tests,
+    where each ``TieredCache`` sharing the bus plays the part of a worker."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[List[str]], None]] = []
+
+    def publish(self, keys: List[str]) -> None:
+        for callback in list(self._subscribers):
+            callback(keys)
+
+    def subscribe(self, callback: Callable[[List[str]], None]) -> None:
+        self._subscribers.append(callback)
+
+
+class RedisInvalidationBus(InvalidationBus):
+    def __init__(self, url: str, channel: str = "scholarbase:cache:invalidate"):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_connect_timeout=0.5)
+        self.channel = channel
+        self._subscribers: List[Callable[[List[str]], None]] = []
+        self._listener: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def publish(self, keys: List[str]) -> None:
+        self.client.publish(self.channel, orjson.dumps(keys))
+
+    def subscribe(self, callback: Callable[[List[str]], None]) -> None:
+        self._subscribers.append(callback)
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="cache-invalidation", daemon=True)
+                self._listener.start()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    keys = orjson.loads(message["data"])
+                    for callback in list(self._subscribers):
+                        callback(keys)
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener disconnected: {e}")
+                time.sleep(1)
+
+
+class TieredCache:
+    def __init__(self, namespace: str, l1: LRUCache, l2: CacheBackend, bus: InvalidationBus, ttl: int = 300):
+        self.namespace = namespace
+        self.l1 = l1
+        self.l2 = l2
+        self.bus = bus
+        self.ttl = ttl
+        bus.subscribe(self._on_invalidate)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        full_key = self._key(key)
+        value = self.l1.get(full_key)
+        if value is not _MISSING:
+            return value
+        try:
+            entry = self.l2.get(full_key)
+        except Exception as e:
+            logger.warning(f"L2 cache read failed for {full_key}: {e}")
+            return default
+        if entry is None:
+            return default
+        expires_at, body = entry
+        value = orjson.loads(body)
+        self.l1.set(full_key, value, ttl=max(expires_at - time.time(), 0))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        ttl = ttl or self.ttl
+        full_key = self._key(key)
+        self.l1.set(full_key, value, ttl=ttl)
+        try:
+            self.l2.set(full_key, (time.time() + ttl, orjson.dumps(value)), ttl, ())
+        except Exception as e:
+            logger.warning(f"L2 cache write failed for {full_key}: {e}")
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        full_keys = [self._key(key) for key in keys]
+        self.l1.evict(full_keys)
+        try:
+            self.l2.delete(full_keys)
+            self.bus.publish(full_keys)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {full_keys}: {e}")
+
+    def _on_invalidate(self, full_keys: List[str]) -> None:
+        self.l1.evict(full_keys)
+
+
+@lru_cache()
+def _shared_tiers():
+    if config.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(config.REDIS_URL, prefix="scholarbase:l2:"), RedisInvalidationBus(config.REDIS_URL)
+    return InMemoryCacheBackend(), LocalInvalidationBus()
+
+
+@lru_cache()
+def get_tiered_cache(namespace: str) -> TieredCache:
+    l2, bus = _shared_tiers()
+    l1 = LRUCache(maxsize=config.L1_CACHE_SIZE, ttl=config.L1_CACHE_TTL_SECONDS)
+    return TieredCache(namespace, l1, l2, bus)
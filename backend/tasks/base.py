@@ -0,0 +1,167 @@
+"""Shared runtime for Celery tasks that use the database.
+
+Each worker process gets its own pooled engine. It is built lazily on first
+use, and discarded in ``worker_process_init`` so a forked child never
+reuses connections inherited from the parent. Tasks declared with
+``base=DatabaseTask`` open sessions through ``self.session_scope()``, which
+commits on success and rolls back on error.
+
+Every run records its wall time and the time spent in SQL statements. They
+are logged per run and aggregated per task in ``task_stats()``. The run's
+outcome also goes to the Celery counters on ``/metrics``. Each run is traced
+as a ``celery.task`` span. It continues the trace of the request that
+published the task, and every statement on the task engine is a child span.
+"""
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from celery import Task
+from celery.exceptions import Retry
+from celery.signals import worker_process_init
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, create_engine
+
+from config import config
+from core.metrics import record_task
+from core.tracing import instrument_engine as instrument_tracing, span, task_parent
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+# [statement count, seconds] for the task running in this context.
+_db_usage: ContextVar[Optional[list]] = ContextVar("task_db_usage", default=None)
+
+_tracked_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+_stats: Dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def _track_db_time(engine: Engine) -> None:
+    if engine in _tracked_engines:
+        return
+    _tracked_engines.add(engine)
+    instrument_tracing(engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("task_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["task_query_start"].pop()
+        usage = _db_usage.get()
+        if usage is not None:
+            usage[0] += 1
+            usage[1] += time.perf_counter() - started
+
+
+def _create_task_engine() -> Engine:
+    if config.DATABASE_URL.startswith("sqlite"):
+        engine = create_engine(config.DATABASE_URL, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(
+            config.DATABASE_URL,
+            pool_size=config.TASK_DB_POOL_SIZE,
+            max_overflow=config.TASK_DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+    _track_db_time(engine)
+    return engine
+
+
+def get_task_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_task_engine()
+    return _engine
+
+
+def use_engine(engine: Optional[Engine]) -> None:
+    """Replace the task engine, e.g. with an in-memory SQLite engine. None resets it."""
+    global _engine
+    with _engine_lock:
+        if engine is not None:
+            _track_db_time(engine)
+        _engine = engine
+
+
+@worker_process_init.connect
+def _reset_engine_after_fork(**kwargs):
+    global _engine
+    # Pooled connections are not fork-safe: drop the parent's without closing them.
+    if _engine is not None:
+        _engine.dispose(close=False)
+    _engine = None
+    from models.database import engine as app_engine
+
+    app_engine.dispose(close=False)
+
+
+def _record(name: str, seconds: float, db_seconds: float, statements: int, failed: bool) -> None:
+    with _stats_lock:
+        entry = _stats.setdefault(name, {"runs": 0, "failures": 0, "seconds": 0.0, "db_seconds": 0.0,
+                                         "statements": 0, "max_seconds": 0.0})
+        entry["runs"] += 1
+        entry["failures"] += failed
+        entry["seconds"] += seconds
+        entry["db_seconds"] += db_seconds
+        entry["statements"] += statements
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+
+def task_stats() -> Dict[str, dict]:
+    with _stats_lock:
+        return {name: dict(entry) for name, entry in _stats.items()}
+
+
+class DatabaseTask(Task):
+    abstract = True
+
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        session = Session(get_task_engine())
+        try:
+            yield session
+            session.commit()
+        except BaseException:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def __call__(self, *args, **kwargs):
+        usage = [0, 0.0]
+        token = _db_usage.set(usage)
+        started = time.perf_counter()
+        outcome = "failure"
+        try:
+            with span("celery.task", task_parent(self.request), task=self.name, task_id=self.request.id,
+                      retries=self.request.retries):
+                result = super().__call__(*args, **kwargs)
+            outcome = "success"
+            return result
+        except Retry:
+            outcome = "retry"
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            failed = outcome != "success"
+            _db_usage.reset(token)
+            _record(self.name, seconds, usage[1], usage[0], failed)
+            record_task(self.name, outcome, seconds)
+            logger.info(
+                f"Task {self.name} {'failed' if failed else 'finished'} in {seconds:.3f}s "
+                f"({usage[0]} statements, {usage[1]:.3f}s in the database)"
+            )
@@ -0,0 +1,22 @@
+import logging
+from typing import Optional
+from celery_app import celery_app
+from services.checkpoint import Checkpoint
+from services.document_gc import CHECKPOINT_NAME, collect_orphans
+from tasks.base import DatabaseTask
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, base=DatabaseTask, name="tasks.document_gc.collect_orphaned_documents")
+def collect_orphaned_documents(self, dry_run: bool = False, max_pages: Optional[int] = None):
+    try:
+        with self.session_scope() as db:
+            return collect_orphans(db, dry_run=dry_run, max_pages=max_pages, checkpoint=Checkpoint(CHECKPOINT_NAME))
+    except Exception as e:
+        logger.error(f"Document GC failed: {e}", exc_info=True)
+        # The checkpoint keeps the progress made so far; a retry resumes from it.
+        if self.request.retries < 3:
+            raise self.retry(exc=e, countdown=300 * (2 ** self.request.retries), max_retries=3)
+        return {"status": "error", "message": str(e)}
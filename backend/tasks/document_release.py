@@ -0,0 +1,57 @@
+"""Deferred deletion of documents on backends without reference counts.
+
+There, a document is shared by content, and ``release_document`` can only
+tell from the projects table that nobody uses it. An upload of the same
+content may already have found the object stored and be about to commit a
+reference to it. The deletion therefore waits DOCUMENT_RELEASE_GRACE_SECONDS,
+checks the references again, and checks once more after deleting. A reference
+that appears after the deletion can't be saved. Its project loses the
+document and is marked FAILED, so the student uploads it again.
+"""
+from datetime import datetime, timezone
+import logging
+from sqlalchemy import select
+from celery_app import celery_app
+from models.projects import Project
+from services.cache import invalidate, project_tags
+from services.enums import UploadState
+from services.storage import get_storage
+from tasks.base import DatabaseTask
+
+
+logger = logging.getLogger(__name__)
+
+
+def _referencing_projects(db, document_url: str):
+    return db.execute(select(Project).where(Project.document_url == document_url)).scalars().all()
+
+
+@celery_app.task(bind=True, base=DatabaseTask, name="tasks.document_release.delete_unreferenced_document",
+                 max_retries=5, ignore_result=True)
+def delete_unreferenced_document(self, document_url: str):
+    with self.session_scope() as db:
+        if _referencing_projects(db, document_url):
+            return {"status": "skipped", "document_url": document_url}
+
+        try:
+            deleted = get_storage().delete(document_url)
+        except Exception as e:
+            logger.error(f"Error deleting document {document_url}: {e}")
+            deleted = False
+        if not deleted:
+            # After the last retry the orphan GC removes it.
+            raise self.retry(countdown=60 * (2 ** self.request.retries))
+
+        lost = _referencing_projects(db, document_url)
+        for project in lost:
+            logger.error(f"Project {project.id} referenced {document_url} while it was deleted; marking upload as failed")
+            project.document_url = None
+            project.upload_state = UploadState.FAILED
+            project.updated_at = datetime.now(timezone.utc)
+            db.add(project)
+        if lost:
+            db.commit()
+            for project in lost:
+                invalidate(*project_tags(project))
+
+    return {"status": "success", "document_url": document_url, "lost_references": len(lost)}
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+import logging
+from sqlmodel import Session
+from celery_app import celery_app
+from models.projects import Project
+from services.cache import invalidate, project_tags
+from services.storage import attach_document, get_storage, release_document
+from services.deferred_upload import discard_spool_file
+from services.enums import UploadState
+from tasks.base import DatabaseTask
+
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRIES = 5
+
+
+def _set_upload_state(db: Session, project_id: int, state: UploadState):
+    project = db.get(Project, project_id)
+    if project is None:
+        return
+    project.upload_state = state
+    project.updated_at = datetime.now(timezone.utc)
+    db.add(project)
+    db.commit()
+    db.refresh(project)
+    invalidate(*project_tags(project))
+
+
+@celery_app.task(bind=True, base=DatabaseTask, name="tasks.document_upload.upload_project_document",
+                 max_retries=MAX_RETRIES)
+def upload_project_document(self, project_id: int, spool_path: str, filename: str):
+    try:
+        with open(spool_path, "rb") as spooled:
+            document_url = get_storage().put(spooled, filename).url
+    except FileNotFoundError:
+        logger.error(f"Spooled document for project {project_id} is missing: {spool_path}")
+        with self.session_scope() as db:
+            _set_upload_state(db, project_id, UploadState.FAILED)
+        return {"status": "error", "project_id": project_id, "message": "Spool file missing"}
+    except Exception as e:
+        if self.request.retries < MAX_RETRIES:
+            countdown = min(30 * (2 ** self.request.retries), 900)
+            logger.warning(
+                f"Upload for project {project_id} failed ({e}); "
+                f"retrying in {countdown}s (attempt {self.request.retries + 1}/{MAX_RETRIES})"
+            )
+            raise self.retry(exc=e, countdown=countdown)
+        logger.error(f"Giving up on document upload for project {project_id}: {e}", exc_info=True)
+        try:
+            with self.session_scope() as db:
+                _set_upload_state(db, project_id, UploadState.FAILED)
+        finally:
+            # Nothing retries the upload after this, so the spooled copy would only leak disk.
+            discard_spool_file(spool_path)
+        return {"status": "error", "project_id": project_id, "message": str(e)}
+
+    with self.session_scope() as db:
+        project = db.get(Project, project_id)
+        if project is None:
+            # Project was deleted while the upload ran; don't leave the document behind.
+            release_document(db, document_url)
+            discard_spool_file(spool_path)
+            return {"status": "skipped", "project_id": project_id, "message": "Project no longer exists"}
+
+        attach_document(db, project, document_url)
+
+    discard_spool_file(spool_path)
+    logger.info(f"Uploaded document for project {project_id}: {document_url}")
+    return {"status": "success", "project_id": project_id, "document_url": document_url}
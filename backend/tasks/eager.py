@@ -0,0 +1,95 @@
+"""Run Celery tasks in-process against SQLite, without a broker.
+
+``eager_tasks()`` switches the app to eager mode: ``delay``/``apply_async``
+run the task immediately and re-raise its exceptions. A memory
+broker and result backend stand in for Redis, and the task engine is an
+in-memory SQLite database with the full schema. Use it from a shell, a
+script or a test:
+
+    with eager_tasks() as engine:
+        with Session(engine) as session:
+            ...  # seed rows
+        result = cleanup_pending_projects.delay().get()
+
+``python -m tasks.eager`` runs a short end-to-end check of the cleanup task.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, create_engine
+
+from celery_app import celery_app
+from tasks import base
+
+EAGER_SETTINGS = {
+    "task_always_eager": True,
+    "task_eager_propagates": True,
+    "broker_url": "memory://",
+    "result_backend": "cache+memory://",
+}
+
+
+@contextmanager
+def eager_tasks(database_url: str = "sqlite://") -> Iterator[Engine]:
+    import models.account  # noqa: F401  (register every table)
+    import models.projects  # noqa: F401
+
+    engine = create_engine(database_url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    previous = {key: celery_app.conf.get(key) for key in EAGER_SETTINGS}
+    celery_app.conf.update(EAGER_SETTINGS)
+    base.use_engine(engine)
+    try:
+        yield engine
+    finally:
+        base.use_engine(None)
+        celery_app.conf.update(previous)
+        engine.dispose()
+
+
+def main():
+    import io
+    import json
+    import tempfile
+    from datetime import datetime, timedelta, timezone
+
+    from sqlmodel import Session
+
+    from config import config
+    from models.account import StudentAccount
+    from services.enums import Role
+    from models.projects import Project
+    from services.checkpoint import Checkpoint
+    from services.storage import LocalStorage, get_storage
+    from tasks import project_cleanup
+
+    workdir = tempfile.mkdtemp(prefix="scholarbase-eager-")
+    config.STORAGE_BACKEND = "local"
+    config.LOCAL_STORAGE_ROOT = f"{workdir}/storage"
+    config.CHECKPOINT_DIR = f"{workdir}/checkpoints"
+    get_storage.cache_clear()
+    storage = get_storage()
+    assert isinstance(storage, LocalStorage)
+
+    with eager_tasks() as engine:
+        stale = datetime.now(timezone.utc) - timedelta(hours=2)
+        with Session(engine) as session:
+            session.add(StudentAccount(id=1, name="Student", email="student@example.com", matric_no="M1",
+                                       department="CS", role=Role.STUDENT, hashed_password="-"))
+            for i in range(5):
+                url = storage.put(io.BytesIO(b"document %d" % i), "document.pdf").url
+                session.add(Project(title=f"Stale {i}", description="-", year="2025", student_id=1,
+                                    document_url=url, created_at=stale))
+            session.commit()
+
+        result = project_cleanup.cleanup_pending_projects.delay().get()
+        assert result["documents_deleted"] == 5, result
+        assert not Checkpoint(project_cleanup.CHECKPOINT_NAME).load()
+        print(json.dumps({"result": result, "task_stats": base.task_stats()}, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""Memory diagnostics inside a worker process. See ``core.memory``.
+
+The task runs in whichever worker process of the queue picks it up, and the
+result names that ``pid``. ``/api/admin/memory/worker`` queues it and waits
+for the result.
+"""
+import logging
+from celery_app import celery_app
+from core.memory import run_action
+from fastapi import HTTPException
+
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="tasks.memory.memory_diagnostics")
+def memory_diagnostics(action: str, params: dict = None):
+    try:
+        return run_action(action, **(params or {}))
+    except HTTPException as e:
+        return {"action": action, "error": e.detail}
+    except TypeError as e:
+        return {"action": action, "error": f"Invalid parameters: {e}"}
@@ -1,142 +1,258 @@
-from celery import Celery
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
+from sqlalchemy import select, tuple_, update
 import logging
-from typing import List
+import time
+from celery_app import celery_app
 from models.projects import Project
-from models.account import StudentAccount, SupervisorAccount
-from models.database import get_session
-from services.cloudinary import delete_file_from_cloudinary
+from services.cache import invalidate
+from services.checkpoint import Checkpoint
+from services.storage import delete_released_document, documents_to_release, get_storage
 from services.enums import Status
+from tasks.base import DatabaseTask
 from config import config
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
-celery_app = Celery(
-    "Scholar Base",
-    broker=config.CELERY_BROKER_URL,
-    backend=config.CELERY_RESULT_BACKEND
-)
+CHECKPOINT_NAME = "project_cleanup"
+MAX_REPORTED_FAILURES = 100
 
 
-engine = create_engine(config.DATABASE_URL)
+def stale_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(seconds=config.PENDING_DOCUMENT_TTL_SECONDS)
 
 
-@celery_app.task(bind=True, name="tasks.project_cleanup.cleanup_pending_projects")
+def stale_candidates(cutoff: datetime):
+    return select(
+        Project.id, Project.title, Project.student_id, Project.supervisor_id,
+        Project.document_url, Project.created_at
+    ).where(
+        Project.status == Status.PENDING,
+        Project.created_at <= cutoff,
+        Project.document_url.isnot(None),  # Only projects with documents
+    )
+
+
+def _candidate_batch(db: Session, cutoff: datetime, after_id: int, limit: int):
+    return db.execute(
+        stale_candidates(cutoff)
+        .where(Project.id > after_id)
+        .order_by(Project.id)
+        .limit(limit)
+    ).all()
+
+
+def claim_documents(db: Session, batch) -> list:
+    """Clear ``document_url`` on the rows of ``batch`` that still hold it, and return those rows.
+
+    A row another sweep or expiry task claimed first, or one reviewed or
+    given a new document since it was read, is not claimed. Only the caller
+    that claimed a row may release its document, so it is released once.
+    """
+    if not batch:
+        return []
+    now = datetime.now(timezone.utc)
+    if db.get_bind().dialect.update_returning:
+        claimed_ids = set(db.execute(
+            update(Project)
+            .where(
+                tuple_(Project.id, Project.document_url).in_([(row.id, row.document_url) for row in batch]),
+                Project.status == Status.PENDING,
+            )
+            .values(document_url=None, updated_at=now)
+            .returning(Project.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+    else:
+        claimed_ids = {
+            row.id for row in batch
+            if db.execute(
+                update(Project)
+                .where(Project.id == row.id, Project.status == Status.PENDING,
+                       Project.document_url == row.document_url)
+                .values(document_url=None, updated_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        }
+    return [row for row in batch if row.id in claimed_ids]
+
+
+def cleanup_batch(db: Session, batch, map_fn=map) -> dict:
+    """Claim the ``batch`` rows, then release the documents of the rows claimed.
+
+    The claim is committed before storage is touched, so a concurrent sweep,
+    expiry task or redelivery can't release the same reference again. If a
+    deletion fails, only the rows whose reference it was dropping get their
+    ``document_url`` back for a later retry.
+    ``map_fn`` runs the deletions, e.g. a thread pool's ``map``. On backends
+    without reference counts a deletion only has to be queued.
+    """
+    claimed = claim_documents(db, batch)
+    db.commit()
+
+    to_delete = documents_to_release(db, [(row.id, row.document_url) for row in claimed])
+    refcounted = get_storage().refcounted
+    holders = {}
+    for row in claimed:
+        holders.setdefault(row.document_url, []).append(row)
+    failed_ids = set()
+    for document_url, released in zip(to_delete, map_fn(delete_released_document, to_delete)):
+        # A refcounted release drops one row's reference; elsewhere one deletion covers every row.
+        rows = holders[document_url]
+        covered = rows[:1] if refcounted else rows
+        holders[document_url] = rows[len(covered):]
+        if not released:
+            failed_ids.update(row.id for row in covered)
+
+    # Documents still used by other projects need no deletion and count as released.
+    cleaned = [row for row in claimed if row.id not in failed_ids]
+    failed = [row for row in claimed if row.id in failed_ids]
+
+    for row in failed:
+        # Unless the project got a new document meanwhile, hand the reference back for a retry.
+        db.execute(
+            update(Project)
+            .where(Project.id == row.id, Project.document_url.is_(None))
+            .values(document_url=row.document_url)
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+
+    for row in cleaned:
+        logger.info(
+            f"CLEANUP ACTION: Project ID: {row.id}, "
+            f"Title: {row.title}, "
+            f"Student ID: {row.student_id}, "
+            f"Document released: {row.document_url}, "
+            f"Created at: {row.created_at}"
+        )
+    if claimed:
+        tags = {"projects"}
+        for row in claimed:
+            tags.update({f"project:{row.id}", f"student:{row.student_id}", f"supervisor:{row.supervisor_id}"})
+        invalidate(*tags)
+
+    return {
+        "cleaned": len(cleaned),
+        "skipped": len(batch) - len(claimed),
+        "deletions": len(to_delete),
+        "failed": [
+            {"project_id": row.id, "title": row.title, "document_url": row.document_url}
+            for row in failed
+        ],
+    }
+
+
+@celery_app.task(bind=True, base=DatabaseTask, name="tasks.project_cleanup.cleanup_pending_projects")
 def cleanup_pending_projects(self):
+    """Release documents of projects still pending PENDING_DOCUMENT_TTL_SECONDS after creation.
+
+    Each such project normally has its own expiry task (tasks.project_expiry);
+    this sweep is the safety net for expiries that were never queued or got
+    lost. Candidates are read in id order, CLEANUP_BATCH_SIZE at a time. Each batch is
+    committed on its own and followed by a checkpoint, so a failed run
+    resumes after the last committed batch with the same cutoff.
+    """
+    checkpoint = Checkpoint(CHECKPOINT_NAME)
     try:
-        logger.info("Starting cleanup of pending projects...")
-        
-  
-        cutoff_date = datetime.now(timezone.utc) - timedelta(hours=1)
+        state = checkpoint.load()
+        if state:
+            cutoff_date = datetime.fromisoformat(state["cutoff_date"])
+            logger.info(f"Resuming cleanup of pending projects after project {state['last_id']}")
+        else:
+            cutoff_date = stale_cutoff()
+            state = {"cutoff_date": cutoff_date.isoformat(), "last_id": 0, "projects_processed": 0,
+                     "documents_deleted": 0, "deletions": 0, "batches": 0, "batch_seconds": 0.0,
+                     "max_batch_seconds": 0.0, "failed_deletions": []}
+            logger.info("Starting cleanup of pending projects...")
         logger.info(f"Looking for pending projects created before: {cutoff_date}")
-        
 
-        with Session(engine) as db:
-            pending_projects = db.query(Project).filter(
-                Project.status == Status.PENDING,
-                Project.created_at <= cutoff_date,
-                Project.document_url.isnot(None)  # Only projects with documents
-            ).all()
-            
-            if not pending_projects:
-                logger.info("No pending projects found for cleanup")
-                return {
-                    "status": "success",
-                    "message": "No projects to clean up",
-                    "projects_processed": 0,
-                    "documents_deleted": 0
-                }
-            
-            logger.info(f"Found {len(pending_projects)} pending projects for cleanup")
-            
-            processed_count = 0
-            deleted_count = 0
-            failed_deletions = []
-            
-            for project in pending_projects:
-                try:
-                    processed_count += 1
-                    document_url = project.document_url
-                    
-                    logger.info(f"Processing project {project.id} - {project.title}")
-                    
-                   
-                    if document_url:
-                        deletion_success = delete_file_from_cloudinary(document_url)
-                        
-                        if deletion_success:
-                            project.document_url = None
-                            project.updated_at = datetime.now(timezone.utc)
-                            
-                            deleted_count += 1
-                            logger.info(f"Successfully deleted document for project {project.id}")
-                            
-                            # Log the cleanup action
-                            logger.info(
-                                f"CLEANUP ACTION: Project ID: {project.id}, "
-                                f"Title: {project.title}, "
-                                f"Student ID: {project.student_id}, "
-                                f"Document deleted from Cloudinary: {document_url}, "
-                                f"Created at: {project.created_at}"
-                            )
-                        else:
-                            failed_deletions.append({
-                                "project_id": project.id,
-                                "title": project.title,
-                                "document_url": document_url
-                            })
-                            logger.warning(f"Failed to delete document from Cloudinary for project {project.id}")
-                    
-                except Exception as e:
-                    logger.error(f"Error processing project {project.id}: {str(e)}")
-                    failed_deletions.append({
-                        "project_id": project.id,
-                        "title": project.title,
-                        "error": str(e)
-                    })
-            
-            db.commit()
-            
-            # Prepare result summary
-            result = {
-                "status": "success",
-                "message": f"Cleanup completed. Processed {processed_count} projects, deleted {deleted_count} documents",
-                "projects_processed": processed_count,
-                "documents_deleted": deleted_count,
-                "failed_deletions": failed_deletions,
-                "cutoff_date": cutoff_date.isoformat()
-            }
-            
-            logger.info(f"Cleanup task completed: {result['message']}")
-            
-            if failed_deletions:
-                logger.warning(f"Failed to delete {len(failed_deletions)} documents")
-                for failure in failed_deletions:
-                    logger.warning(f"Failed deletion: {failure}")
-            
-            return result
-            
+        started = time.perf_counter()
+        with self.session_scope() as db, ThreadPoolExecutor(
+            max_workers=config.CLEANUP_WORKERS, thread_name_prefix="cleanup"
+        ) as pool:
+            while True:
+                batch = _candidate_batch(db, cutoff_date, state["last_id"], config.CLEANUP_BATCH_SIZE)
+                if not batch:
+                    break
+
+                batch_started = time.perf_counter()
+                result = cleanup_batch(db, batch, pool.map)
+                batch_seconds = time.perf_counter() - batch_started
+
+                state["last_id"] = batch[-1].id
+                state["batches"] += 1
+                state["projects_processed"] += len(batch)
+                state["documents_deleted"] += result["cleaned"]
+                state["deletions"] += result["deletions"]
+                state["batch_seconds"] += batch_seconds
+                state["max_batch_seconds"] = max(state["max_batch_seconds"], batch_seconds)
+                room = MAX_REPORTED_FAILURES - len(state["failed_deletions"])
+                state["failed_deletions"].extend(result["failed"][:max(room, 0)])
+                checkpoint.save(state)
+                logger.info(
+                    f"Cleanup batch {state['batches']}: {len(batch)} projects, "
+                    f"{result['cleaned']} cleaned, {len(result['failed'])} failed "
+                    f"in {batch_seconds:.2f}s"
+                )
+
+        checkpoint.clear()
+        elapsed = time.perf_counter() - started
+        # Rates use time spent in batches, including runs before a resume.
+        busy = state["batch_seconds"]
+        processed_count = state["projects_processed"]
+        deleted_count = state["documents_deleted"]
+        failed_deletions = state["failed_deletions"]
+
+        if not processed_count:
+            logger.info("No pending projects found for cleanup")
+
+        result = {
+            "status": "success",
+            "message": f"Cleanup completed. Processed {processed_count} projects, deleted {deleted_count} documents",
+            "projects_processed": processed_count,
+            "documents_deleted": deleted_count,
+            "failed_deletions": failed_deletions,
+            "cutoff_date": cutoff_date.isoformat(),
+            "metrics": {
+                "batches": state["batches"],
+                "batch_size": config.CLEANUP_BATCH_SIZE,
+                "workers": config.CLEANUP_WORKERS,
+                "storage_deletions": state["deletions"],
+                "elapsed_seconds": round(elapsed, 3),
+                "batch_seconds": round(busy, 3),
+                "projects_per_second": round(processed_count / busy, 2) if busy else 0.0,
+                "deletions_per_second": round(state["deletions"] / busy, 2) if busy else 0.0,
+                "mean_batch_seconds": round(busy / state["batches"], 3) if state["batches"] else 0.0,
+                "max_batch_seconds": round(state["max_batch_seconds"], 3),
+            },
+        }
+
+        logger.info(f"Cleanup task completed: {result['message']}")
+
+        if failed_deletions:
+            logger.warning(f"Failed to delete {len(failed_deletions)} documents")
+            for failure in failed_deletions:
+                logger.warning(f"Failed deletion: {failure}")
+
+        return result
+
     except Exception as e:
         error_msg = f"Cleanup task failed with error: {str(e)}"
         logger.error(error_msg, exc_info=True)
-        
-        # Retry the task up to 3 times with exponential backoff
+
+        # Retry the task up to 3 times with exponential backoff; the
+        # checkpoint makes the retry continue after the last committed batch.
         if self.request.retries < 3:
             logger.info(f"Retrying cleanup task (attempt {self.request.retries + 1}/3)")
             raise self.retry(countdown=60 * (2 ** self.request.retries), max_retries=3)
-        
+
         return {
             "status": "error",
             "message": error_msg,
             "projects_processed": 0,
             "documents_deleted": 0
         }
-
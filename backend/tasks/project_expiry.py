@@ -0,0 +1,58 @@
+"""Per-project expiry of documents on projects left pending.
+
+A project that gets a document gets one ETA task, due
+PENDING_DOCUMENT_TTL_SECONDS after the project was created. The task
+checks the project again when it runs. If the project has been reviewed,
+deleted or lost its document by then, the task does nothing, so reviews
+don't need to revoke anything. The hourly ``cleanup_pending_projects``
+sweep catches expiries that were never queued.
+"""
+from datetime import datetime, timedelta, timezone
+import logging
+from celery_app import celery_app
+from models.projects import Project
+from services.enums import Status
+from config import config
+from tasks.base import DatabaseTask
+from tasks.project_cleanup import cleanup_batch, stale_candidates, stale_cutoff
+
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_project_expiry(project: Project) -> None:
+    if project.status != Status.PENDING or not project.document_url:
+        return
+    created_at = project.created_at
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    eta = created_at + timedelta(seconds=config.PENDING_DOCUMENT_TTL_SECONDS)
+    try:
+        expire_pending_project.apply_async(args=[project.id], eta=max(eta, datetime.now(timezone.utc)))
+    except Exception as e:
+        # The reconciliation sweep picks the project up instead.
+        logger.warning(f"Could not schedule document expiry for project {project.id}: {e}")
+
+
+# ignore_result: nobody reads the outcome, and skipping the result backend keeps
+# apply_async from stalling a request when Redis is unreachable.
+@celery_app.task(bind=True, base=DatabaseTask, name="tasks.project_expiry.expire_pending_project",
+                 max_retries=3, ignore_result=True)
+def expire_pending_project(self, project_id: int):
+    try:
+        with self.session_scope() as db:
+            batch = db.execute(stale_candidates(stale_cutoff()).where(Project.id == project_id)).all()
+            if not batch:
+                return {"status": "skipped", "project_id": project_id}
+            result = cleanup_batch(db, batch)
+    except Exception as e:
+        logger.error(f"Expiry of project {project_id} failed: {e}", exc_info=True)
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+
+    if result["skipped"]:
+        # Reviewed, re-attached or expired by someone else since it was read.
+        return {"status": "skipped", "project_id": project_id}
+    if result["failed"]:
+        raise self.retry(countdown=60 * (2 ** self.request.retries))
+    logger.info(f"Expired document of pending project {project_id}")
+    return {"status": "success", "project_id": project_id}
@@ -0,0 +1,64 @@
+"""Shared fixtures. The environment is set before the app is imported, so
+every test runs against a throwaway SQLite database, in-memory caches, local
+storage and an in-memory Celery broker."""
+import os
+import tempfile
+from datetime import timedelta
+
+_workdir = tempfile.mkdtemp(prefix="scholarbase-tests-")
+os.environ.update({
+    "ENV_STATE": "dev",
+    "DEV_DATABASE_URL": f"sqlite:///{_workdir}/test.db",
+    "DEV_CACHE_BACKEND": "memory",
+    "DEV_CELERY_BROKER_URL": "memory://",
+    "DEV_CELERY_RESULT_BACKEND": "cache+memory://",
+    "STORAGE_BACKEND": "local",
+    "LOCAL_STORAGE_ROOT": f"{_workdir}/storage",
+    "UPLOAD_SPOOL_DIR": f"{_workdir}/spool",
+    "CHECKPOINT_DIR": f"{_workdir}/checkpoints",
+})
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from services.auth import create_access_token
+from services.cache import get_result_cache
+from services.storage import get_storage
+from services.tiered_cache import _shared_tiers, get_tiered_cache
+
+
+def auth_headers(account_id: int, email: str, role) -> dict:
+    token = create_access_token({"sub": email, "role": role.value, "user_id": account_id}, timedelta(hours=1))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    from main import app
+
+    # Entering the client runs the lifespan, which creates the tables.
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def clear_tables() -> None:
+    """Delete every row from the app database, so modules seed their own data."""
+    from models.database import engine
+
+    with engine.begin() as connection:
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+def reset_caches() -> None:
+    """Start from cold result and account caches, as query budgets assume."""
+    for factory in (get_result_cache, get_tiered_cache, _shared_tiers):
+        factory.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    reset_caches()
+    get_storage.cache_clear()
+    yield
@@ -0,0 +1,151 @@
+"""Balancing students over supervisors, and applying exactly the previewed plan."""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert, update
+from sqlmodel import Session
+
+from models.account import AdminAccount, StudentAccount, SupervisorAccount
+from models.database import engine
+from services.assignment import balance
+from services.enums import Role
+from tests.conftest import auth_headers, clear_tables
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def test_least_loaded_supervisor_is_taken_first():
+    assignments, unassigned, loads = balance(
+        [(1, "CS"), (2, "CS"), (3, "CS")], [(10, "CS"), (11, "CS")], {10: 2}, capacity=5)
+
+    assert [supervisor_id for _, supervisor_id, _ in assignments] == [11, 11, 10]
+    assert unassigned == []
+    assert loads == {10: 3, 11: 2}
+
+
+def test_capacity_is_never_exceeded():
+    students = [(i, "CS") for i in range(1, 6)]
+    assignments, unassigned, loads = balance(students, [(10, "CS"), (11, "CS")], {10: 1}, capacity=2)
+
+    assert len(assignments) == 3
+    assert unassigned == [4, 5]
+    assert loads == {10: 2, 11: 2}
+
+
+def test_full_supervisors_take_no_one():
+    assignments, unassigned, loads = balance([(1, "CS")], [(10, "CS")], {10: 3}, capacity=2)
+
+    assert (assignments, unassigned, loads) == ([], [1], {10: 3})
+
+
+def test_same_department_is_preferred_over_lighter_load():
+    assignments, _, _ = balance([(1, "Physics")], [(10, "CS"), (11, "Physics")], {11: 3}, capacity=5)
+
+    assert assignments == [(1, 11, True)]
+
+
+def test_department_names_match_loosely():
+    assignments, _, _ = balance([(1, " computer science ")], [(10, "Computer Science")], {}, capacity=1)
+
+    assert assignments == [(1, 10, True)]
+
+
+def test_leftovers_fall_back_to_any_department():
+    assignments, unassigned, _ = balance(
+        [(1, "History"), (2, None), (3, "CS")], [(10, "CS"), (11, "Physics")], {11: 1}, capacity=2)
+
+    assert assignments[0] == (3, 10, True)
+    assert sorted(assignments[1:]) == [(1, 10, False), (2, 11, False)]
+    assert unassigned == []
+
+
+def test_fallback_does_not_take_seats_same_department_students_need():
+    # Student 1 comes first but has no department match; student 2 must still get the only CS seat.
+    assignments, unassigned, _ = balance([(1, "History"), (2, "CS")], [(10, "CS")], {}, capacity=1)
+
+    assert assignments == [(2, 10, True)]
+    assert unassigned == [1]
+
+
+@pytest.fixture
+def admin(client):
+    with Session(engine) as session:
+        session.execute(insert(SupervisorAccount), [
+            {"id": i, "name": f"Supervisor {i}", "role": Role.SUPERVISOR, "email": f"supervisor{i}@assign.edu",
+             "department": department, "hashed_password": "-", "created_at": EPOCH}
+            for i, department in ((1, "CS"), (2, "Physics"))
+        ])
+        session.execute(insert(StudentAccount), [
+            {"id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"student{i}@assign.edu",
+             "department": "CS" if i <= 3 else "Physics", "matric_no": f"A{i}", "level": "400",
+             "hashed_password": "-", "created_at": EPOCH}
+            for i in range(1, 5)
+        ])
+        session.execute(insert(AdminAccount), [{"id": 1, "name": "Admin", "role": Role.ADMIN,
+                                                "email": "admin@assign.edu", "hashed_password": "-",
+                                                "created_at": EPOCH}])
+        session.commit()
+    yield auth_headers(1, "admin@assign.edu", Role.ADMIN)
+    clear_tables()
+
+
+def supervisors_of_students() -> dict:
+    with Session(engine) as session:
+        return dict(session.execute(StudentAccount.__table__.select().with_only_columns(
+            StudentAccount.id, StudentAccount.supervisor_id)).all())
+
+
+def test_apply_writes_exactly_the_previewed_plan(client, admin):
+    preview = client.post("/api/admin/assignments/preview", headers=admin, json={"capacity": 2}).json()
+    # A student who registers after the preview is not swept into the apply.
+    with Session(engine) as session:
+        session.execute(insert(StudentAccount), [{"id": 5, "name": "Late", "role": Role.STUDENT,
+                                                  "email": "late@assign.edu", "department": "CS",
+                                                  "matric_no": "A5", "hashed_password": "-", "created_at": EPOCH}])
+        session.commit()
+
+    response = client.post("/api/admin/assignments/apply", headers=admin,
+                           json={"capacity": 2, "assignments": preview["assignments"]})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["applied"]
+    assert response.json()["assignments"] == preview["assignments"]
+    expected = {a["student_id"]: a["supervisor_id"] for a in preview["assignments"]}
+    assert supervisors_of_students() == {**{i: None for i in range(1, 6)}, **expected}
+
+
+def test_student_assigned_since_the_preview_is_a_conflict(client, admin):
+    preview = client.post("/api/admin/assignments/preview", headers=admin, json={}).json()
+    with Session(engine) as session:
+        session.execute(update(StudentAccount).where(StudentAccount.id == 1).values(supervisor_id=2))
+        session.commit()
+
+    response = client.post("/api/admin/assignments/apply", headers=admin,
+                           json={"assignments": preview["assignments"]})
+
+    assert response.status_code == 409
+    assert supervisors_of_students() == {1: 2, 2: None, 3: None, 4: None}
+
+
+def test_plan_that_no_longer_fits_capacity_is_a_conflict(client, admin):
+    preview = client.post("/api/admin/assignments/preview", headers=admin, json={"capacity": 2}).json()
+    with Session(engine) as session:
+        session.execute(insert(StudentAccount), [{"id": 5, "name": "Other", "role": Role.STUDENT,
+                                                  "email": "other@assign.edu", "department": "CS",
+                                                  "matric_no": "A5", "supervisor_id": 1,
+                                                  "hashed_password": "-", "created_at": EPOCH}])
+        session.commit()
+
+    response = client.post("/api/admin/assignments/apply", headers=admin,
+                           json={"capacity": 2, "assignments": preview["assignments"]})
+
+    assert response.status_code == 409
+    assert supervisors_of_students()[1] is None
+
+
+def test_unknown_supervisor_is_a_conflict(client, admin):
+    response = client.post("/api/admin/assignments/apply", headers=admin, json={
+        "assignments": [{"student_id": 1, "supervisor_id": 99, "same_department": False}]})
+
+    assert response.status_code == 409
+    assert supervisors_of_students()[1] is None
@@ -0,0 +1,115 @@
+"""Single-flight coalescing of concurrent identical reads."""
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from core.coalescing import SingleFlight, single_flight
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def request(**headers) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"",
+                    "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]})
+
+
+def test_followers_share_the_leaders_result():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+
+    assert run(main()) == ["result"] * 5
+    assert len(calls) == 1
+    assert (flight.leaders, flight.followers) == (1, 4)
+
+
+def test_leader_exception_reaches_followers():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.errors == 1
+    assert not flight.stats()["in_flight"]
+
+
+def test_follower_takes_over_from_cancelled_leader():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("key", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    # One follower reruns the computation; the other two follow it.
+    assert run(main()) == [2, 2, 2]
+    assert (flight.leaders, flight.followers, flight.takeovers) == (2, 2, 1)
+
+
+def test_cancelled_follower_leaves_leader_running():
+    flight = SingleFlight("test")
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert run(main()) == "result"
+
+
+def test_conditional_headers_are_part_of_the_key():
+    calls = []
+
+    @single_flight("test.conditional", params=("year",))
+    async def endpoint(request: Request, year: str = None):
+        calls.append(request.headers.get("if-none-match"))
+        await asyncio.sleep(0.01)
+        return year
+
+    async def main():
+        return await asyncio.gather(
+            endpoint(request=request(), year="2025"),
+            endpoint(request=request(), year="2025"),
+            endpoint(request=request(if_none_match='"abc"'), year="2025"),
+            endpoint(request=request(), year="2024"),
+        )
+
+    assert run(main()) == ["2025", "2025", "2025", "2024"]
+    assert sorted(calls, key=str) == sorted([None, '"abc"', None], key=str)
@@ -0,0 +1,62 @@
+"""Conditional GETs on paged project listings."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from models.account import AdminAccount, StudentAccount
+from models.database import engine
+from models.projects import Project
+from services.enums import Role, Status
+from tests.conftest import auth_headers, clear_tables, reset_caches
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+PAGE_TWO = "/api/admin/projects?page=2&per_page=2"
+
+
+@pytest.fixture
+def admin(client):
+    with Session(engine) as session:
+        session.execute(insert(AdminAccount), [{"id": 1, "name": "Admin", "role": Role.ADMIN,
+                                                "email": "admin@conditional.edu", "hashed_password": "-",
+                                                "created_at": EPOCH}])
+        session.execute(insert(StudentAccount), [{"id": 1, "name": "Student", "role": Role.STUDENT,
+                                                  "email": "student@conditional.edu", "hashed_password": "-",
+                                                  "department": "CS", "matric_no": "C1", "created_at": EPOCH}])
+        session.execute(insert(Project), [
+            {"id": i, "title": f"Project {i}", "year": "2025", "description": "-", "status": Status.PENDING,
+             "created_at": EPOCH + timedelta(minutes=i), "updated_at": EPOCH, "student_id": 1, "tags": []}
+            for i in range(1, 7)
+        ])
+        session.commit()
+    yield auth_headers(1, "admin@conditional.edu", Role.ADMIN)
+    clear_tables()
+
+
+def test_unchanged_page_is_not_modified(client, admin):
+    first = client.get(PAGE_TWO, headers=admin)
+    assert first.status_code == 200
+    assert "Last-Modified" not in first.headers
+
+    again = client.get(PAGE_TWO, headers={**admin, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_deletion_on_earlier_page_changes_later_page(client, admin):
+    first = client.get(PAGE_TWO, headers=admin)
+    with Session(engine) as session:
+        # Newest first: project 6 is on page one.
+        session.delete(session.get(Project, 6))
+        session.commit()
+    reset_caches()
+
+    after = client.get(PAGE_TWO, headers={**admin, "If-None-Match": first.headers["ETag"]})
+    assert after.status_code == 200
+    assert [project["id"] for project in after.json()] != [project["id"] for project in first.json()]
+
+
+def test_pages_have_distinct_etags(client, admin):
+    one = client.get("/api/admin/projects?page=1&per_page=2", headers=admin)
+    two = client.get(PAGE_TWO, headers=admin)
+    assert one.headers["ETag"] != two.headers["ETag"]
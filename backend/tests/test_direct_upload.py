@@ -0,0 +1,163 @@
+"""Signing and confirming direct-to-Cloudinary uploads, without the network."""
+import time
+from types import SimpleNamespace
+
+import cloudinary
+import pytest
+import requests
+from cloudinary.utils import api_sign_request
+from fastapi import HTTPException
+
+from config import config
+from services import direct_upload
+from services.cloudinary import MAX_FILE_SIZE
+from services.enums import Role
+from services.storage import CloudinaryStorage
+
+SECRET = "test-secret"
+PDF = b"%PDF-1.7"
+STUDENT = SimpleNamespace(role=Role.STUDENT, id=1)
+
+
+class FakeCloudinary(CloudinaryStorage):
+    """Answers the HEAD and ranged GET that confirmation makes."""
+
+    def __init__(self, size=1000, content_type="application/pdf", head=PDF):
+        super().__init__()
+        self.object = (size, content_type) if size is not None else None
+        self.head = head
+
+    def stat(self, url):
+        return self.object
+
+    def read_prefix(self, url, length):
+        if isinstance(self.head, Exception):
+            raise self.head
+        return self.head[:length]
+
+
+@pytest.fixture(autouse=True)
+def cloudinary_account():
+    previous = cloudinary.config()
+    saved = (previous.cloud_name, previous.api_key, previous.api_secret)
+    cloudinary.config(cloud_name="test-cloud", api_key="test-key", api_secret=SECRET)
+    yield
+    cloudinary.config(cloud_name=saved[0], api_key=saved[1], api_secret=saved[2])
+
+
+@pytest.fixture
+def destroyed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(direct_upload, "cloudinary_destroy", lambda public_id, **options: calls.append(public_id))
+    return calls
+
+
+def ticket(filename="report.pdf", content_type="application/pdf", size=1000, now=None):
+    return direct_upload.sign_upload(7, STUDENT, filename, content_type, size, now=now)
+
+
+def confirm(monkeypatch, upload, storage=None, signature=None, account=STUDENT, version=1700000000):
+    monkeypatch.setattr(direct_upload, "get_storage", lambda: storage or FakeCloudinary())
+    claims = direct_upload.read_upload_token(upload["upload_token"])
+    public_id = claims["public_id"]
+    if signature is None:
+        signature = api_sign_request({"public_id": public_id, "version": version}, SECRET)
+    return direct_upload.confirm_upload(claims, account, public_id, version, signature)
+
+
+def status_of(call) -> int:
+    with pytest.raises(HTTPException) as raised:
+        call()
+    return raised.value.status_code
+
+
+def test_signed_fields_verify_with_the_api_secret():
+    upload = ticket()
+    fields = dict(upload["fields"])
+    signature = fields.pop("signature")
+    fields.pop("api_key")
+
+    assert api_sign_request(fields, SECRET) == signature
+    assert fields["public_id"].endswith(".pdf")
+    assert fields["folder"] == direct_upload.DIRECT_UPLOAD_FOLDER
+
+
+def test_token_binds_project_account_size_and_type():
+    claims = direct_upload.read_upload_token(ticket()["upload_token"])
+
+    assert (claims["project_id"], claims["account"], claims["size"], claims["content_type"]) == (
+        7, "Student:1", 1000, "application/pdf")
+
+
+def test_signing_validates_the_declared_document():
+    assert status_of(lambda: ticket(content_type="image/png")) == 400
+    assert status_of(lambda: ticket(filename="report.exe")) == 400
+    assert status_of(lambda: ticket(size=MAX_FILE_SIZE + 1)) == 413
+
+
+def test_signing_requires_cloudinary_credentials():
+    cloudinary.config(api_secret="")
+    assert status_of(ticket) == 503
+
+
+def test_expired_or_foreign_tokens_are_rejected():
+    expired = ticket(now=time.time() - config.DIRECT_UPLOAD_TTL_SECONDS - 60)
+    assert status_of(lambda: direct_upload.read_upload_token(expired["upload_token"])) == 400
+    assert status_of(lambda: direct_upload.read_upload_token("not-a-token")) == 400
+
+
+def test_matching_upload_is_confirmed(monkeypatch, destroyed):
+    url = confirm(monkeypatch, ticket())
+
+    assert url.startswith("https://res.cloudinary.com/test-cloud/raw/upload/")
+    assert not destroyed
+
+
+def test_other_account_cannot_confirm(monkeypatch, destroyed):
+    other = SimpleNamespace(role=Role.STUDENT, id=2)
+    assert status_of(lambda: confirm(monkeypatch, ticket(), account=other)) == 403
+
+
+def test_forged_response_signature_is_rejected(monkeypatch, destroyed):
+    assert status_of(lambda: confirm(monkeypatch, ticket(), signature="0" * 40)) == 400
+    assert not destroyed
+
+
+def test_missing_object_is_not_found(monkeypatch, destroyed):
+    assert status_of(lambda: confirm(monkeypatch, ticket(), FakeCloudinary(size=None))) == 404
+
+
+@pytest.mark.parametrize("stored_size, status", [(999, 400), (MAX_FILE_SIZE + 1, 413)])
+def test_size_mismatch_destroys_the_upload(monkeypatch, destroyed, stored_size, status):
+    assert status_of(lambda: confirm(monkeypatch, ticket(), FakeCloudinary(size=stored_size))) == status
+    assert len(destroyed) == 1
+
+
+def test_content_type_mismatch_destroys_the_upload(monkeypatch, destroyed):
+    storage = FakeCloudinary(content_type="text/plain")
+    assert status_of(lambda: confirm(monkeypatch, ticket(), storage)) == 400
+    assert len(destroyed) == 1
+
+
+def test_leading_bytes_must_fit_the_extension(monkeypatch, destroyed):
+    storage = FakeCloudinary(head=b"MZ\x90\x00\x03\x00\x00\x00")
+    assert status_of(lambda: confirm(monkeypatch, ticket(), storage)) == 400
+    assert len(destroyed) == 1
+
+
+def test_untyped_object_is_judged_by_its_leading_bytes(monkeypatch, destroyed):
+    upload = ticket("slides.pptx", "application/vnd.openxmlformats-officedocument.presentationml.presentation")
+    confirm(monkeypatch, upload, FakeCloudinary(content_type="application/octet-stream", head=b"PK\x03\x04rest"))
+    assert not destroyed
+
+
+def test_text_with_nul_bytes_is_rejected(monkeypatch, destroyed):
+    upload = ticket("notes.txt", "text/plain")
+    storage = FakeCloudinary(content_type="text/plain", head=b"ab\x00cd")
+    assert status_of(lambda: confirm(monkeypatch, upload, storage)) == 400
+
+
+def test_unreadable_object_is_kept_for_a_retry(monkeypatch, destroyed):
+    storage = FakeCloudinary(head=requests.ConnectionError("reset"))
+    assert status_of(lambda: confirm(monkeypatch, ticket(), storage)) == 502
+    assert not destroyed
@@ -0,0 +1,37 @@
+"""Serving documents from local storage."""
+import io
+from urllib.parse import quote
+
+import pytest
+
+from services.storage import get_storage
+
+
+@pytest.fixture
+def document_url():
+    return get_storage().put(io.BytesIO(b"%PDF-1.7 shared bytes"), "first uploader's secret name.pdf").url
+
+
+def test_does_not_leak_first_uploaders_filename(client, document_url):
+    response = client.get(document_url)
+    assert response.status_code == 200
+    assert response.content == b"%PDF-1.7 shared bytes"
+    assert "secret" not in response.headers["Content-Disposition"]
+    assert 'filename="document.pdf"' in response.headers["Content-Disposition"]
+
+
+def test_unicode_filename_uses_rfc5987(client, document_url):
+    response = client.get(document_url, params={"filename": 'Résumé_项目 "final"'})
+    assert response.status_code == 200
+    disposition = response.headers["Content-Disposition"]
+    assert disposition.startswith('inline; filename="Resume_ _final_.pdf"')
+    assert f"filename*=UTF-8''{quote('Résumé_项目 _final_.pdf', safe='')}" in disposition
+
+
+def test_unknown_document_is_not_found(client):
+    assert client.get(f"/api/documents/{'0' * 64}").status_code == 404
+
+
+def test_revalidation_is_not_modified(client, document_url):
+    etag = client.get(document_url).headers["ETag"]
+    assert client.get(document_url, headers={"If-None-Match": etag}).status_code == 304
@@ -0,0 +1,87 @@
+"""Request profiles only sample threads while they work for the request."""
+import asyncio
+import threading
+import time
+
+import anyio.to_thread
+import pytest
+
+from config import config
+from core import profiling
+
+
+@pytest.fixture(autouse=True)
+def fast_sampling(monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_SAMPLE_INTERVAL_MS", 1)
+    profiling.instrument_threadpool()
+
+
+def spin_for_profiled_request(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def spin_for_someone_else(stop: threading.Event) -> None:
+    while not stop.is_set():
+        pass
+
+
+async def other_request(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(0)
+
+
+def profile_run(body) -> str:
+    async def main():
+        profile = profiling._Profile("test", "GET /test", "/test")
+        token = profiling._active.set(profile)
+        profile.start()
+        try:
+            await body()
+        finally:
+            profile.stop()
+            profiling._active.reset(token)
+        return profile.collapsed()
+
+    return asyncio.run(main())
+
+
+def test_pool_thread_is_sampled_only_inside_the_requests_call():
+    stop = threading.Event()
+    bystander = threading.Thread(target=spin_for_someone_else, args=(stop,))
+    bystander.start()
+    try:
+        collapsed = profile_run(lambda: anyio.to_thread.run_sync(spin_for_profiled_request, 0.1))
+    finally:
+        stop.set()
+        bystander.join()
+
+    assert "spin_for_profiled_request" in collapsed
+    assert "spin_for_someone_else" not in collapsed
+
+
+def test_loop_thread_is_not_sampled_for_other_tasks():
+    async def body():
+        # Another request keeps the loop busy while this one waits.
+        busy = asyncio.create_task(other_request(0.1))
+        await asyncio.sleep(0.1)
+        await busy
+
+    collapsed = profile_run(body)
+    assert "other_request" not in collapsed
+
+
+def test_loop_thread_is_sampled_while_running_the_request():
+    async def body():
+        spin_for_profiled_request(0.05)
+
+    assert "spin_for_profiled_request" in profile_run(body)
+
+
+def test_calls_outside_a_profile_are_not_marked():
+    async def main():
+        return await anyio.to_thread.run_sync(lambda: "done")
+
+    assert asyncio.run(main()) == "done"
@@ -0,0 +1,183 @@
+"""Expiry of documents on stale pending projects, run eagerly against SQLite
+with local (refcounted) storage."""
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from celery.exceptions import Retry
+from sqlmodel import Session
+
+from config import config
+from models.account import StudentAccount
+from models.projects import Project
+from services.enums import Role, Status
+from services.storage import get_storage
+from tasks.eager import eager_tasks
+from tasks.project_cleanup import cleanup_batch, cleanup_pending_projects, stale_candidates, stale_cutoff
+from tasks.project_expiry import expire_pending_project
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_BACKEND", "local")
+    monkeypatch.setattr(config, "LOCAL_STORAGE_ROOT", str(tmp_path / "storage"))
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    get_storage.cache_clear()
+    with eager_tasks() as engine:
+        with Session(engine) as session:
+            session.add(StudentAccount(id=1, name="Student", email="student@example.com", matric_no="M1",
+                                       department="CS", role=Role.STUDENT, hashed_password="-"))
+            session.commit()
+        yield engine
+    get_storage.cache_clear()
+
+
+def store(content: bytes) -> str:
+    return get_storage().put(io.BytesIO(content), "document.pdf").url
+
+
+def add_project(engine, document_url: str, stale: bool = True, status: Status = Status.PENDING) -> int:
+    age = timedelta(seconds=config.PENDING_DOCUMENT_TTL_SECONDS + 3600) if stale else timedelta(0)
+    with Session(engine) as session:
+        project = Project(title="Project", description="-", year="2025", student_id=1, status=status,
+                          document_url=document_url, created_at=datetime.now(timezone.utc) - age)
+        session.add(project)
+        session.commit()
+        return project.id
+
+
+def document_of(engine, project_id: int):
+    with Session(engine) as session:
+        return session.get(Project, project_id).document_url
+
+
+def refs(document_url: str):
+    meta = get_storage().metadata(get_storage().key_for_url(document_url))
+    return meta["refs"] if meta else 0
+
+
+def test_expires_stale_pending_document(engine):
+    url = store(b"stale")
+    project_id = add_project(engine, url)
+
+    assert expire_pending_project.delay(project_id).get()["status"] == "success"
+    assert document_of(engine, project_id) is None
+    assert not get_storage().exists(url)
+
+
+def test_skips_project_reviewed_before_expiry(engine):
+    url = store(b"reviewed")
+    project_id = add_project(engine, url, status=Status.APPROVED)
+
+    assert expire_pending_project.delay(project_id).get()["status"] == "skipped"
+    assert document_of(engine, project_id) == url
+    assert refs(url) == 1
+
+
+def test_skips_project_not_yet_stale(engine):
+    url = store(b"fresh")
+    project_id = add_project(engine, url, stale=False)
+
+    assert expire_pending_project.delay(project_id).get()["status"] == "skipped"
+    assert document_of(engine, project_id) == url
+
+
+def test_shared_document_outlives_first_release(engine):
+    url = store(b"shared")
+    assert store(b"shared") == url
+    first, second = add_project(engine, url), add_project(engine, url)
+
+    expire_pending_project.delay(first).get()
+    assert refs(url) == 1
+    assert get_storage().exists(url)
+
+    expire_pending_project.delay(second).get()
+    assert not get_storage().exists(url)
+
+
+def test_sweep_releases_shared_document_once_per_project(engine):
+    url = store(b"swept")
+    store(b"swept")
+    store(b"swept")
+    expired = [add_project(engine, url), add_project(engine, url)]
+    kept = add_project(engine, url, stale=False)
+
+    result = cleanup_pending_projects.delay().get()
+
+    assert result["documents_deleted"] == 2
+    assert [document_of(engine, project_id) for project_id in expired] == [None, None]
+    assert document_of(engine, kept) == url
+    assert refs(url) == 1
+
+
+def test_failed_delete_restores_document_and_retries(engine, monkeypatch):
+    url = store(b"undeletable")
+    project_id = add_project(engine, url)
+    monkeypatch.setattr(type(get_storage()), "delete", lambda self, document_url: False)
+
+    with pytest.raises(Retry):
+        expire_pending_project.delay(project_id).get()
+    assert document_of(engine, project_id) == url
+
+    monkeypatch.undo()
+    assert expire_pending_project.delay(project_id).get()["status"] == "success"
+    assert not get_storage().exists(url)
+
+
+def test_concurrent_expiries_release_once(engine):
+    url = store(b"contended")
+    store(b"contended")
+    project_id = add_project(engine, url)
+    add_project(engine, url, stale=False)
+
+    # Both workers read the candidate before either claims it.
+    with Session(engine) as first, Session(engine) as second:
+        query = stale_candidates(stale_cutoff()).where(Project.id == project_id)
+        first_batch, second_batch = first.execute(query).all(), second.execute(query).all()
+        first_result = cleanup_batch(first, first_batch)
+        second_result = cleanup_batch(second, second_batch)
+
+    assert (first_result["cleaned"], first_result["skipped"]) == (1, 0)
+    assert (second_result["cleaned"], second_result["skipped"]) == (0, 1)
+    assert refs(url) == 1
+
+
+def test_redelivered_expiry_is_skipped(engine):
+    url = store(b"redelivered")
+    store(b"redelivered")
+    project_id = add_project(engine, url)
+
+    assert expire_pending_project.delay(project_id).get()["status"] == "success"
+    assert expire_pending_project.delay(project_id).get()["status"] == "skipped"
+    assert refs(url) == 1
+
+
+def test_partial_failure_restores_only_the_failed_reference(engine, monkeypatch):
+    url = store(b"partial")
+    store(b"partial")
+    first, second = add_project(engine, url), add_project(engine, url)
+    storage_type = type(get_storage())
+    delete = storage_type.delete
+    outcomes = iter([True, False])
+    monkeypatch.setattr(storage_type, "delete", lambda self, document_url: next(outcomes) and delete(self, document_url))
+
+    with Session(engine) as session:
+        result = cleanup_batch(session, session.execute(stale_candidates(stale_cutoff())).all())
+
+    assert result["cleaned"] == 1
+    assert [row["project_id"] for row in result["failed"]] == [second]
+    assert (document_of(engine, first), document_of(engine, second)) == (None, url)
+    assert refs(url) == 1
+
+    monkeypatch.undo()
+    assert expire_pending_project.delay(second).get()["status"] == "success"
+    assert not get_storage().exists(url)
+
+
+def test_releasing_a_missing_document_succeeds(engine):
+    url = store(b"gone")
+    project_id = add_project(engine, url)
+    get_storage().delete_many([get_storage().key_for_url(url)])
+
+    assert expire_pending_project.delay(project_id).get()["status"] == "success"
+    assert document_of(engine, project_id) is None
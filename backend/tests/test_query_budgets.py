@@ -0,0 +1,76 @@
+"""The listing routes run the same number of statements however many rows
+they return. A relationship loaded per row would push them over budget."""
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from core.query_budget import ROUTE_QUERY_BUDGETS, route_budget
+from models.account import AdminAccount, StudentAccount, SupervisorAccount
+from models.database import engine
+from models.projects import Project
+from services.enums import Role, Status
+from tests.conftest import auth_headers, clear_tables, reset_caches
+
+SUPERVISORS = 4
+STUDENTS_PER_SUPERVISOR = 25
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def accounts(client):
+    students = [
+        {"id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"student{i}@budget.edu",
+         "department": "Computer Science", "hashed_password": "-", "created_at": EPOCH,
+         "matric_no": f"BG{i:05d}", "level": "300", "supervisor_id": (i - 1) % SUPERVISORS + 1}
+        for i in range(1, SUPERVISORS * STUDENTS_PER_SUPERVISOR + 1)
+    ]
+    with Session(engine) as session:
+        session.execute(insert(SupervisorAccount), [
+            {"id": i, "name": f"Supervisor {i}", "role": Role.SUPERVISOR, "email": f"supervisor{i}@budget.edu",
+             "department": "Computer Science", "faculty": "Science", "hashed_password": "-", "created_at": EPOCH}
+            for i in range(1, SUPERVISORS + 1)
+        ])
+        session.execute(insert(StudentAccount), students)
+        session.execute(insert(AdminAccount), [{"id": 1, "name": "Admin", "role": Role.ADMIN,
+                                                "email": "admin@budget.edu", "hashed_password": "-",
+                                                "created_at": EPOCH}])
+        session.execute(insert(Project), [
+            {"title": f"Project {student['id']}.{n}", "year": "2025", "description": "-",
+             "status": Status.PENDING if n else Status.APPROVED, "created_at": EPOCH, "updated_at": EPOCH,
+             "student_id": student["id"], "supervisor_id": student["supervisor_id"], "tags": []}
+            for student in students for n in range(2)
+        ])
+        session.commit()
+    yield {
+        "admin": auth_headers(1, "admin@budget.edu", Role.ADMIN),
+        "supervisor": auth_headers(1, "supervisor1@budget.edu", Role.SUPERVISOR),
+    }
+    clear_tables()
+
+
+def _within_budget(client, route: str, path: str, headers: dict, expected_rows: int) -> int:
+    # route_budget is strict: the statement that crosses the budget fails the request.
+    with route_budget(route, ROUTE_QUERY_BUDGETS[route]):
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == expected_rows
+    return int(response.headers["X-Query-Count"])
+
+
+@pytest.mark.parametrize("route, path, role, rows", [
+    ("GET /api/admin/students", "/api/admin/students?per_page={per_page}", "admin",
+     SUPERVISORS * STUDENTS_PER_SUPERVISOR),
+    ("GET /api/admin/supervisors", "/api/admin/supervisors?per_page={per_page}", "admin", SUPERVISORS),
+    ("GET /api/supervisor/students", "/api/supervisor/students?per_page={per_page}", "supervisor",
+     STUDENTS_PER_SUPERVISOR),
+])
+def test_listing_stays_within_budget(client, accounts, route, path, role, rows):
+    full = _within_budget(client, route, path.format(per_page=500), accounts[role], rows)
+
+    # Same statement count for one row as for all of them.
+    reset_caches()
+    single = _within_budget(client, route, path.format(per_page=1), accounts[role], 1)
+    assert single == full
+
@@ -0,0 +1,91 @@
+"""Tag invalidation and stale-while-revalidate in the result cache."""
+import threading
+
+from services.cache import InMemoryCacheBackend, ResultCache
+
+
+def counter(*bodies):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return bodies[min(len(calls), len(bodies)) - 1]
+
+    return compute, calls
+
+
+def test_second_read_is_a_hit():
+    cache = ResultCache(InMemoryCacheBackend(), ttl=60, stale_ttl=60)
+    compute, calls = counter(b"one")
+
+    assert cache.get_or_compute("key", compute, ["projects"]) == (b"one", "miss")
+    assert cache.get_or_compute("key", compute, ["projects"]) == (b"one", "hit")
+    assert len(calls) == 1
+
+
+def test_invalidation_drops_only_tagged_entries():
+    cache = ResultCache(InMemoryCacheBackend(), ttl=60, stale_ttl=60)
+    cache.get_or_compute("project", lambda: b"project", ["project:1", "projects"])
+    cache.get_or_compute("student", lambda: b"student", ["student:1"])
+
+    cache.invalidate(["project:1"])
+
+    assert cache.get_or_compute("project", lambda: b"rebuilt", ["project:1", "projects"]) == (b"rebuilt", "miss")
+    assert cache.get_or_compute("student", lambda: b"rebuilt", ["student:1"]) == (b"student", "hit")
+
+
+def test_body_computed_across_an_invalidation_is_not_stored():
+    cache = ResultCache(InMemoryCacheBackend(), ttl=60, stale_ttl=60)
+
+    def compute_during_write():
+        cache.invalidate(["projects"])
+        return b"maybe stale"
+
+    assert cache.get_or_compute("key", compute_during_write, ["projects"]) == (b"maybe stale", "miss")
+    assert cache.get_or_compute("key", lambda: b"current", ["projects"]) == (b"current", "miss")
+
+
+def test_stale_entry_is_served_while_refreshed_once():
+    cache = ResultCache(InMemoryCacheBackend(), ttl=0, stale_ttl=60)
+    cache.get_or_compute("key", lambda: b"old", ["projects"])
+    release = threading.Event()
+    refreshes = []
+
+    def refresh():
+        refreshes.append(1)
+        release.wait(5)
+        return b"new"
+
+    assert cache.get_or_compute("key", lambda: b"unused", ["projects"], refresh) == (b"old", "stale")
+    assert cache.get_or_compute("key", lambda: b"unused", ["projects"], refresh) == (b"old", "stale")
+    release.set()
+    cache._executor.shutdown(wait=True)
+
+    assert len(refreshes) == 1
+    assert cache.backend.get("key")[1] == b"new"
+
+
+def test_stale_entry_without_refresh_is_recomputed():
+    cache = ResultCache(InMemoryCacheBackend(), ttl=0, stale_ttl=60)
+    cache.get_or_compute("key", lambda: b"old", ["projects"])
+
+    assert cache.get_or_compute("key", lambda: b"new", ["projects"]) == (b"new", "miss")
+
+
+def test_unreadable_backend_falls_back_to_compute():
+    class Broken(InMemoryCacheBackend):
+        def get(self, key):
+            raise ConnectionError("down")
+
+    cache = ResultCache(Broken(), ttl=60, stale_ttl=60)
+    assert cache.get_or_compute("key", lambda: b"body", ["projects"]) == (b"body", "miss")
+
+
+def test_eviction_prunes_the_tag_index():
+    backend = InMemoryCacheBackend(max_entries=2)
+    for key in ("a", "b", "c"):
+        backend.set(key, (0.0, b""), 60, [f"tag:{key}", "shared"])
+
+    assert backend.get("a") is None
+    assert "tag:a" not in backend._tags
+    assert backend._tags["shared"] == {"b", "c"}
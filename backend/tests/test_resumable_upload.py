@@ -0,0 +1,126 @@
+"""The resumable upload session lifecycle, through the API."""
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from models.account import StudentAccount
+from models.database import engine
+from models.projects import Project
+from services.enums import Role
+from services.resumable_upload import _paths, purge_expired_sessions
+from services.storage import get_storage
+from tests.conftest import auth_headers, clear_tables
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+DOCUMENT = b"%PDF-1.7\n" + b"x" * 300
+
+
+@pytest.fixture
+def students(client):
+    with Session(engine) as session:
+        session.execute(insert(StudentAccount), [
+            {"id": i, "name": f"Student {i}", "role": Role.STUDENT, "email": f"student{i}@resumable.edu",
+             "department": "CS", "matric_no": f"R{i}", "hashed_password": "-", "created_at": EPOCH}
+            for i in (1, 2)
+        ])
+        session.execute(insert(Project), [{"id": 1, "title": "Project", "year": "2025", "description": "-",
+                                           "student_id": 1, "created_at": EPOCH, "updated_at": EPOCH,
+                                           "tags": []}])
+        session.commit()
+    yield {i: auth_headers(i, f"student{i}@resumable.edu", Role.STUDENT) for i in (1, 2)}
+    clear_tables()
+
+
+def start(client, headers, length=len(DOCUMENT), filename="report.pdf") -> str:
+    response = client.post("/api/uploads/resumable", headers=headers, json={
+        "project_id": 1, "filename": filename, "content_type": "application/pdf", "size": length})
+    assert response.status_code == 201, response.text
+    assert response.json()["offset"] == 0
+    return response.headers["Location"]
+
+
+def send(client, location, headers, offset, data):
+    return client.patch(location, headers={**headers, "Upload-Offset": str(offset)}, content=data)
+
+
+def test_chunks_resume_from_the_reported_offset(client, students):
+    location = start(client, students[1])
+
+    assert send(client, location, students[1], 0, DOCUMENT[:100]).headers["Upload-Offset"] == "100"
+    head = client.head(location, headers=students[1])
+    assert (head.headers["Upload-Offset"], head.headers["Upload-Length"]) == ("100", str(len(DOCUMENT)))
+
+    response = send(client, location, students[1], 100, DOCUMENT[100:])
+    assert response.status_code == 204
+    assert response.headers["Upload-Offset"] == str(len(DOCUMENT))
+
+
+def test_offset_mismatch_is_a_conflict(client, students):
+    location = start(client, students[1])
+    send(client, location, students[1], 0, DOCUMENT[:100])
+
+    response = send(client, location, students[1], 50, DOCUMENT[50:150])
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "100"
+    assert client.head(location, headers=students[1]).headers["Upload-Offset"] == "100"
+
+
+def test_chunk_beyond_declared_length_is_rejected(client, students):
+    location = start(client, students[1], length=10)
+    assert send(client, location, students[1], 0, DOCUMENT[:11]).status_code == 413
+
+
+def test_incomplete_upload_cannot_be_finalized(client, students):
+    location = start(client, students[1])
+    send(client, location, students[1], 0, DOCUMENT[:100])
+
+    response = client.post(f"{location}/finalize", headers=students[1])
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "100"
+
+
+def test_finalize_stores_and_attaches_the_document(client, students):
+    location = start(client, students[1])
+    send(client, location, students[1], 0, DOCUMENT)
+
+    response = client.post(f"{location}/finalize", headers=students[1])
+    assert response.status_code == 200, response.text
+    document_url = response.json()["document_url"]
+    assert b"".join(get_storage().stream(document_url)) == DOCUMENT
+    assert not any(os.path.exists(path) for path in _paths(location.rsplit("/", 1)[1]))
+
+
+def test_finalize_rejects_content_that_does_not_fit_the_extension(client, students):
+    fake = b"MZ" + b"\x00" * 98
+    location = start(client, students[1], length=len(fake))
+    send(client, location, students[1], 0, fake)
+
+    assert client.post(f"{location}/finalize", headers=students[1]).status_code == 400
+    assert client.head(location, headers=students[1]).status_code == 404
+    with Session(engine) as session:
+        assert session.get(Project, 1).document_url is None
+
+
+def test_session_belongs_to_its_uploader(client, students):
+    location = start(client, students[1])
+
+    assert send(client, location, students[2], 0, DOCUMENT).status_code == 403
+    assert client.head(location, headers=students[2]).status_code == 403
+
+
+def test_cancelled_session_is_gone(client, students):
+    location = start(client, students[1])
+
+    assert client.delete(location, headers=students[1]).status_code == 204
+    assert client.head(location, headers=students[1]).status_code == 404
+
+
+def test_expired_sessions_are_purged(client, students):
+    location = start(client, students[1])
+
+    assert purge_expired_sessions(now=time.time() + 10 ** 7) >= 1
+    assert client.head(location, headers=students[1]).status_code == 404
@@ -0,0 +1,182 @@
+"""Content-addressed storage: deduplication, reference counts and release."""
+import hashlib
+import io
+
+import pytest
+from sqlmodel import Session
+
+from models.account import StudentAccount
+from models.projects import Project
+from services import storage as storage_module
+from services.enums import Role, UploadState
+from services.storage import LocalStorage, StorageBackend, documents_to_release, release_document
+from tasks.eager import eager_tasks
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(str(tmp_path / "storage"), "/api/documents")
+
+
+def put(storage, content: bytes, filename: str = "report.pdf"):
+    return storage.put(io.BytesIO(content), filename)
+
+
+def test_identical_content_is_stored_once(local):
+    first = put(local, b"same bytes", "a.pdf")
+    second = put(local, b"same bytes", "b.pdf")
+
+    assert first.url == second.url
+    assert first.key == hashlib.sha256(b"same bytes").hexdigest()
+    assert (first.created, second.created) == (True, False)
+    assert local.metadata(first.key)["refs"] == 2
+    assert [entry.key for entry in local.list_objects()[0]] == [first.key]
+
+
+def test_different_content_with_the_same_name_is_kept_apart(local):
+    first = put(local, b"one", "report.pdf")
+    second = put(local, b"two", "report.pdf")
+
+    assert first.url != second.url
+    assert b"".join(local.stream(first.url)) == b"one"
+    assert b"".join(local.stream(second.url)) == b"two"
+
+
+def test_bytes_outlive_all_but_the_last_reference(local):
+    url = put(local, b"shared").url
+    put(local, b"shared")
+
+    assert local.delete(url)
+    assert local.exists(url)
+    assert local.metadata(local.key_for_url(url))["refs"] == 1
+
+    assert local.delete(url)
+    assert not local.exists(url)
+    assert local.metadata(local.key_for_url(url)) is None
+
+
+def test_deleting_a_missing_document_counts_as_released(local):
+    url = put(local, b"gone").url
+    local.delete(url)
+
+    assert local.delete(url)
+    assert not local.delete("https://elsewhere.example/document.pdf")
+
+
+def test_size_and_keys(local):
+    stored = put(local, b"12345")
+
+    assert local.size(stored.url) == 5
+    assert local.key_for_url(stored.url) == stored.key
+    assert local.key_for_url("/api/documents/not-a-hash") is None
+    assert local.size("/api/documents/" + "0" * 64) is None
+
+
+def test_listing_pages_in_key_order(local):
+    keys = sorted(put(local, bytes([i])).key for i in range(5))
+
+    first, cursor = local.list_objects(limit=3)
+    rest, end = local.list_objects(cursor=cursor, limit=3)
+
+    assert [entry.key for entry in first + rest] == keys
+    assert end is None
+
+
+class SharedBlobStorage(StorageBackend):
+    """A backend without reference counts, like Cloudinary."""
+    name = "shared"
+
+    def __init__(self):
+        self.objects = set()
+        self.on_delete = None
+
+    def put(self, fileobj, filename):
+        raise NotImplementedError
+
+    def stream(self, url):
+        raise NotImplementedError
+
+    def delete(self, url):
+        self.objects.discard(url)
+        if self.on_delete:
+            self.on_delete()
+        return True
+
+    def exists(self, url):
+        return url in self.objects
+
+    def size(self, url):
+        return 0 if url in self.objects else None
+
+    def key_for_url(self, url):
+        return url
+
+    def list_objects(self, cursor=None, limit=500):
+        return [], None
+
+    def delete_many(self, keys):
+        return keys, []
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    backend = SharedBlobStorage()
+    monkeypatch.setattr(storage_module, "get_storage", lambda: backend)
+    monkeypatch.setattr("tasks.document_release.get_storage", lambda: backend)
+    with eager_tasks() as engine:
+        with Session(engine) as session:
+            session.add(StudentAccount(id=1, name="Student", email="student@example.com", matric_no="M1",
+                                       department="CS", role=Role.STUDENT, hashed_password="-"))
+            session.commit()
+        yield backend, engine
+
+
+def add_project(engine, document_url: str) -> int:
+    with Session(engine) as session:
+        project = Project(title="Project", description="-", year="2025", student_id=1, document_url=document_url)
+        session.add(project)
+        session.commit()
+        return project.id
+
+
+def test_shared_document_is_kept_while_referenced(shared):
+    backend, engine = shared
+    backend.objects.add("blob")
+    add_project(engine, "blob")
+
+    with Session(engine) as session:
+        assert release_document(session, "blob")
+    assert backend.exists("blob")
+
+
+def test_unreferenced_document_is_deleted_after_recheck(shared):
+    backend, engine = shared
+    backend.objects.add("blob")
+
+    with Session(engine) as session:
+        assert release_document(session, "blob")
+    assert not backend.exists("blob")
+
+
+def test_reference_committed_during_delete_marks_project_failed(shared):
+    backend, engine = shared
+    backend.objects.add("blob")
+    late = []
+    backend.on_delete = lambda: late.append(add_project(engine, "blob"))
+
+    with Session(engine) as session:
+        release_document(session, "blob")
+
+    with Session(engine) as session:
+        project = session.get(Project, late[0])
+        assert (project.document_url, project.upload_state) == (None, UploadState.FAILED)
+
+
+def test_documents_to_release_skips_urls_still_in_use(shared):
+    _, engine = shared
+    released = add_project(engine, "only")
+    sharing = add_project(engine, "shared")
+    add_project(engine, "shared")
+
+    with Session(engine) as session:
+        assert documents_to_release(session, [(released, "only"), (sharing, "shared")]) == ["only"]
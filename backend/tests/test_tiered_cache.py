@@ -0,0 +1,84 @@
+"""Two workers' tiered caches sharing an L2 and an invalidation bus."""
+from services.cache import InMemoryCacheBackend
+from services.tiered_cache import LocalInvalidationBus, LRUCache, TieredCache
+
+
+def workers(count: int = 2):
+    l2, bus = InMemoryCacheBackend(), LocalInvalidationBus()
+    return [TieredCache("accounts", LRUCache(maxsize=16, ttl=60), l2, bus) for _ in range(count)]
+
+
+def test_value_set_by_one_worker_is_read_by_another_through_l2():
+    first, second = workers()
+    first.set("a@example.com", {"role": "Student", "id": 1})
+
+    assert second.get("a@example.com") == {"role": "Student", "id": 1}
+    # Now promoted to the second worker's L1 as well.
+    assert second.l1.get("accounts:a@example.com") == {"role": "Student", "id": 1}
+
+
+def test_invalidation_evicts_every_workers_l1():
+    first, second = workers()
+    first.set("a@example.com", {"id": 1})
+    second.get("a@example.com")
+
+    first.invalidate("a@example.com")
+
+    assert len(first.l1) == len(second.l1) == 0
+    assert second.get("a@example.com") is None
+
+
+def test_invalidation_leaves_other_keys_and_namespaces():
+    l2, bus = InMemoryCacheBackend(), LocalInvalidationBus()
+    accounts = TieredCache("accounts", LRUCache(), l2, bus)
+    profiles = TieredCache("profiles", LRUCache(), l2, bus)
+    accounts.set("a", 1)
+    accounts.set("b", 2)
+    profiles.set("a", 3)
+
+    accounts.invalidate("a")
+
+    assert (accounts.get("a"), accounts.get("b"), profiles.get("a")) == (None, 2, 3)
+
+
+def test_get_or_set_loads_once_and_skips_none():
+    (cache,) = workers(1)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return {"id": 7}
+
+    assert cache.get_or_set("key", loader) == {"id": 7}
+    assert cache.get_or_set("key", loader) == {"id": 7}
+    assert len(loads) == 1
+    assert cache.get_or_set("missing", lambda: None) is None
+    assert cache.get("missing", "default") == "default"
+
+
+def test_l1_ttl_is_capped_and_expires():
+    l1 = LRUCache(maxsize=16, ttl=0)
+    cache = TieredCache("accounts", l1, InMemoryCacheBackend(), LocalInvalidationBus())
+    cache.set("key", 1, ttl=300)
+
+    assert l1.get("accounts:key", None) is None
+    assert cache.get("key") == 1
+
+
+def test_l2_failure_is_a_miss():
+    class Broken(InMemoryCacheBackend):
+        def get(self, key):
+            raise ConnectionError("down")
+
+    cache = TieredCache("accounts", LRUCache(), Broken(), LocalInvalidationBus())
+    assert cache.get("key", "default") == "default"
+
+
+def test_lru_evicts_least_recently_used():
+    l1 = LRUCache(maxsize=2, ttl=60)
+    l1.set("a", 1)
+    l1.set("b", 2)
+    l1.get("a")
+    l1.set("c", 3)
+
+    assert (l1.get("a"), l1.get("b", None), l1.get("c")) == (1, None, 3)